@@ -35,10 +35,46 @@ from .client import (
     EcodeInvalidForm,
     EcodeInscientPermissions,
     EtcdKeysResult,
+    EtcdBatchResult,
     Response,
     EtcdError,
     Client,
 )
+from .codec import (
+    JsonCodec,
+    get_codec,
+)
+from .pool import (
+    HttpConnection,
+    ConnectionPool,
+)
+from .selector import (
+    EndpointSelector,
+)
+from .hedge import (
+    ReadHedger,
+)
+from .retry import (
+    RetryPolicy,
+)
+from .membership import (
+    Membership,
+)
+from .aioclient import (
+    AsyncHttpConnection,
+    AsyncConnectionPool,
+    AsyncClient,
+)
+from .cache import (
+    ReadCache,
+)
+from .mirror import (
+    TreeMirror,
+)
+from .watchhub import (
+    Subscription,
+    WatchHub,
+)
 
 __all__ = [
     "EtcdException",
@@ -66,7 +102,23 @@ __all__ = [
     "EcodeInvalidForm",
     "EcodeInscientPermissions",
     "EtcdKeysResult",
+    "EtcdBatchResult",
     "Response",
     "EtcdError",
     "Client",
+    "JsonCodec",
+    "get_codec",
+    "HttpConnection",
+    "ConnectionPool",
+    "EndpointSelector",
+    "ReadHedger",
+    "RetryPolicy",
+    "Membership",
+    "AsyncHttpConnection",
+    "AsyncConnectionPool",
+    "AsyncClient",
+    "ReadCache",
+    "TreeMirror",
+    "Subscription",
+    "WatchHub",
 ]
@@ -0,0 +1,862 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import asyncio
+import logging
+import socket
+import time
+
+import k3http
+
+from .client import (
+    Client,
+    EcodeKeyNotFound,
+    EtcdException,
+    EtcdIncompleteRead,
+    EtcdReadTimeoutError,
+    EtcdRequestError,
+    EtcdResponseError,
+    NoMoreMachineError,
+    Response,
+)
+from .codec import get_codec
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpConnection(object):
+    """
+    One HTTP/1.1 keep-alive connection to an etcd server, on top of
+    asyncio streams.
+    The socket is connected by the first request and kept open until the
+    server closes it or a response can not be reused.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        # whether the current request is sent over a socket that has been
+        # used by a previous request.
+        self.reused = False
+        # whether the current request has been written to the socket.
+        self.sent = False
+        self.last_used = time.time()
+
+        self.status = None
+        self.headers = {}
+        self._complete = False
+
+    async def request(self, uri, method, headers, body):
+        """
+        Send a request and read the whole response.
+        :param uri: path and query string of the request.
+        :param method: http method.
+        :param headers: a `dict` of request headers.
+        :param body: request body, `str` or `bytes`.
+        :return: the response body in `bytes`.
+        The response status and headers are in `status` and `headers`.
+        """
+        if self.writer is None:
+            self.reused = False
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            sock = self.writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.reused = True
+
+        self.sent = False
+        self.status = None
+        self.headers = {}
+        self._complete = False
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        self.writer.write(self._request_head(uri, method, headers) + (body or b""))
+        await self.writer.drain()
+        self.sent = True
+
+        try:
+            await self._read_head()
+            return await self._read_body(method)
+        except asyncio.IncompleteReadError as e:
+            raise ConnectionResetError("connection closed by server: {e}".format(e=repr(e)))
+
+    def _request_head(self, uri, method, headers):
+        host = self.host
+        if self.port != 80:
+            host = "{h}:{p}".format(h=self.host, p=self.port)
+
+        headers = k3http.headers_add_host(dict(headers or {}), host)
+
+        bufs = ["{m} {u} HTTP/1.1".format(m=method, u=uri)]
+        for k, v in headers.items():
+            bufs.append("{k}: {v}".format(k=k, v=v))
+        bufs.extend(["", ""])
+
+        return "\r\n".join(bufs).encode("utf-8")
+
+    async def _read_head(self):
+        line = await self.reader.readline()
+        if line == b"":
+            raise ConnectionResetError("connection closed by server")
+
+        parts = line.decode("iso-8859-1").strip().split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise k3http.BadStatusLineError(line)
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n"):
+                break
+            if line == b"":
+                raise ConnectionResetError("connection closed by server")
+
+            k, _, v = line.decode("iso-8859-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+
+        self.headers = headers
+        self.status = int(parts[1])
+
+    async def _read_body(self, method):
+        if method == "HEAD" or self.status in (204, 304) or self.status < 200:
+            self._complete = True
+            return b""
+
+        if k3http.client._is_chunked(self.headers.get("transfer-encoding", "")):
+            bufs = []
+            while True:
+                line = await self.reader.readline()
+                size = int(line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    break
+                bufs.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+
+            # trailers
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            self._complete = True
+            return b"".join(bufs)
+
+        length = self.headers.get("content-length")
+        if length is not None:
+            data = await self.reader.readexactly(int(length))
+            self._complete = True
+            return data
+
+        # body is delimited by closing the connection
+        return await self.reader.read()
+
+    def is_reusable(self):
+        """
+        Whether the response has been read completely and the server
+        allows another request over the same socket.
+        """
+        if self.writer is None or self.status is None or not self._complete:
+            return False
+
+        return self.headers.get("connection", "").lower() != "close"
+
+    def is_alive(self):
+        """
+        Check an idle connection: the server must not have closed it.
+        """
+        if self.writer is None:
+            return False
+
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+        self.reader = None
+        self.writer = None
+
+
+class AsyncConnectionPool(object):
+    """
+    A pool of idle keep-alive `etcd.AsyncHttpConnection`, keyed by `(host, port)`.
+    It must be used in only one event loop.
+
+    ##  etcd.AsyncConnectionPool.max_idle
+
+    Type is `int`, the max number of idle connections kept for each endpoint.
+    `0` disables connection reuse.
+
+    ##  etcd.AsyncConnectionPool.idle_timeout
+
+    Type is `int` or `float`, seconds an idle connection is kept.
+    Older connections are closed instead of being reused.
+    """
+
+    def __init__(self, max_idle=8, idle_timeout=30):
+        """
+        :param max_idle: max idle connections kept for each endpoint. Defaults to `8`.
+        :param idle_timeout: seconds an idle connection is kept. Defaults to `30`.
+        """
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+
+    def acquire(self, host, port):
+        """
+        Get a healthy idle connection to `host:port`, or a new one if there
+        is none.
+        :param host: ip or domain of the endpoint.
+        :param port: port of the endpoint.
+        :return: a `etcd.AsyncHttpConnection` object.
+        """
+        now = time.time()
+        conns = self._idle.get((host, port)) or []
+        while len(conns) > 0:
+            h = conns.pop()
+            if now - h.last_used < self.idle_timeout and h.is_alive():
+                return h
+
+            logger.debug("close stale connection to {h}:{p}".format(h=host, p=port))
+            h.close()
+
+        return AsyncHttpConnection(host, port)
+
+    def release(self, h):
+        """
+        Put a connection back to the pool after its response is read.
+        It is closed if it can not be reused or the pool is full.
+        :param h: a `etcd.AsyncHttpConnection` object returned by `acquire`.
+        :return: nothing
+        """
+        if not h.is_reusable():
+            h.close()
+            return
+
+        h.last_used = time.time()
+        conns = self._idle.setdefault((h.host, h.port), [])
+        if len(conns) < self.max_idle:
+            conns.append(h)
+            return
+
+        h.close()
+
+    def clear(self):
+        """
+        Close all idle connections.
+        :return: nothing
+        """
+        idle, self._idle = self._idle, {}
+
+        for conns in idle.values():
+            for h in conns:
+                h.close()
+
+
+class AsyncClient(object):
+    """
+    An asyncio etcd client with the same api as `etcd.Client`.
+    Methods that send requests are coroutines, and the properties that
+    query the cluster, such as `members` or `st_self`, return awaitables:
+
+    ```python
+    c = etcd.AsyncClient(host=hosts)
+    await c.set('key', 'val')
+    res = await c.get('key')
+    members = await c.members
+
+    async for res in c.eternal_watch('key'):
+        ...
+    ```
+
+    Requests do not block the event loop, a waiting watch holds only a
+    socket, so a large number of watches can run in one event loop.
+
+    Membership changes and user or role management are only provided by
+    `etcd.Client`.
+    """
+
+    _MGET = Client._MGET
+    _MPUT = Client._MPUT
+    _MPOST = Client._MPOST
+    _MDELETE = Client._MDELETE
+
+    _write_conditions = Client._write_conditions
+    _read_options = Client._read_options
+    _del_conditions = Client._del_conditions
+    _idempotent_methods = Client._idempotent_methods
+
+    # helpers that do not send requests are shared with Client.
+    _init_endpoints = Client._init_endpoints
+    _endpoints = Client._endpoints
+    _set_endpoints = Client._set_endpoints
+    _rotate = Client._rotate
+    _parse_url = Client._parse_url
+    _sanitize_key = Client._sanitize_key
+    _generate_params = Client._generate_params
+    _build_request = Client._build_request
+    _to_keysresult = Client._to_keysresult
+    _to_dict = Client._to_dict
+    _handle_server_response = Client._handle_server_response
+
+    _base_uri = Client._base_uri
+    _protocol = Client._protocol
+    _host = Client._host
+    _port = Client._port
+    _machines_cache = Client._machines_cache
+
+    base_uri = Client.base_uri
+    host = Client.host
+    port = Client.port
+    protocol = Client.protocol
+    read_timeout = Client.read_timeout
+    allow_redirect = Client.allow_redirect
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=2379,
+        version_prefix="/v2",
+        read_timeout=10,
+        allow_redirect=True,
+        protocol="http",
+        allow_reconnect=True,
+        basic_auth_account=None,
+        conn_pool=None,
+        json_codec=None,
+    ):
+        """
+        Asyncio etcd client class.
+        The arguments are the same as `etcd.Client`, except that it does not
+        connect to the cluster here. If `host` is a single server, the other
+        machines of the cluster are fetched by the first request.
+        :param conn_pool: A `etcd.AsyncConnectionPool` object.
+        If `None`, the client creates its own one. Defaults to `None`.
+        """
+        base_uri, machines = self._init_endpoints(host, port, protocol)
+
+        self.version_prefix = version_prefix
+        self._keys_path = self.version_prefix + "/keys"
+        self._stats_path = self.version_prefix + "/stats"
+        self._mem_path = self.version_prefix + "/members"
+        self._read_timeout = read_timeout
+        self._allow_redirect = allow_redirect
+        self._allow_reconnect = allow_reconnect
+        self.basic_auth_account = basic_auth_account
+        self.json_codec = get_codec(json_codec)
+
+        if conn_pool is None:
+            conn_pool = AsyncConnectionPool()
+        self._conn_pool = conn_pool
+
+        self._machines_loaded = True
+        if self._allow_reconnect:
+            if len(machines) <= 0:
+                self._machines_loaded = False
+            self._set_endpoints(base_uri, [m for m in machines if m != base_uri])
+        else:
+            self._set_endpoints(base_uri, [])
+
+    async def close(self):
+        """
+        Close idle connections kept by the client.
+        :return: nothing
+        """
+        self._conn_pool.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def machines(self):
+        return self._machines()
+
+    async def _machines(self):
+        res = await self.api_execute(self.version_prefix + "/machines", self._MGET, need_refresh_machines=False)
+
+        data = res.data
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+
+        return [n.strip() for n in data.split(",")]
+
+    @property
+    def members(self):
+        return self._members()
+
+    async def _members(self):
+        res = await self.api_execute(self._mem_path, self._MGET)
+
+        return self.json_codec.loads(res.data)["members"]
+
+    @property
+    def leader(self):
+        return self._leader()
+
+    async def _leader(self):
+        res = await self.api_execute(self._stats_path + "/self", self._MGET)
+        self_st = self.json_codec.loads(res.data)
+
+        leader_id = self_st.get("leaderInfo", {}).get("leader")
+        if leader_id is None:
+            return None
+
+        for mem in await self._members():
+            if mem["id"] == leader_id:
+                return mem.copy()
+
+    @property
+    def version(self):
+        return self._version()
+
+    async def _version(self):
+        res = await self.api_execute("/version", self._MGET)
+
+        return self.json_codec.loads(res.data)
+
+    @property
+    def st_leader(self):
+        return self._st_leader()
+
+    async def _st_leader(self):
+        leader = await self._leader()
+        if leader is None:
+            return None
+
+        _, protocol, _, _, _ = self._endpoint
+
+        # the leader stats is only served by the leader
+        for url in leader["clientURLs"]:
+            if not url.startswith(protocol):
+                url = protocol + "://" + url
+
+            try:
+                response = await self._request(url + self._stats_path + "/leader", self._MGET, None, None, False)
+            except (socket.error, k3http.HttpError) as e:
+                logger.info("{err} while get leader stats from {url}".format(err=repr(e), url=url))
+                continue
+
+            return self._to_dict(self._handle_server_response(response))
+
+        raise NoMoreMachineError("No more machines in the cluster")
+
+    @property
+    def st_self(self):
+        return self._st("/self")
+
+    @property
+    def st_store(self):
+        return self._st("/store")
+
+    async def _st(self, st_path):
+        st_path = self._sanitize_key(st_path)
+        response = await self.api_execute(self._stats_path + st_path, self._MGET)
+        return self._to_dict(response)
+
+    @property
+    def names(self):
+        return self._member_fields("name")
+
+    @property
+    def ids(self):
+        return self._member_fields("id")
+
+    @property
+    def clienturls(self):
+        return self._member_fields("clientURLs")
+
+    @property
+    def peerurls(self):
+        return self._member_fields("peerURLs")
+
+    async def _member_fields(self, field):
+        rst = []
+        for n in await self._members():
+            if isinstance(n[field], list):
+                rst.extend(n[field])
+            else:
+                rst.append(n[field])
+
+        return rst
+
+    def __contains__(self, key):
+        raise TypeError("use `await AsyncClient.contains(key)` instead of `in`")
+
+    async def contains(self, key):
+        """
+        Whether `key` exists.
+        :param key: The key to check.
+        :return: `bool`
+        """
+        try:
+            await self.get(key)
+            return True
+        except EcodeKeyNotFound:
+            return False
+
+    async def _wait_for(self, aw, timeout):
+        if timeout is None:
+            return await aw
+
+        try:
+            return await asyncio.wait_for(aw, timeout)
+        except asyncio.TimeoutError:
+            raise socket.timeout("timed out")
+
+    async def _send_request(self, host, port, path, method, headers, body, timeout):
+        h = self._conn_pool.acquire(host, port)
+        try:
+            try:
+                data = await self._wait_for(h.request(path, method, headers, body), timeout)
+            except (socket.error, k3http.HttpError) as e:
+                # An idle pooled socket may have been closed by the server.
+                # Send again with a new connection only if the server can not
+                # have handled it: it failed while sending, or it is idempotent.
+                if not h.reused or h.status is not None or isinstance(e, socket.timeout):
+                    raise
+
+                if h.sent and method not in self._idempotent_methods:
+                    raise
+
+                logger.debug("{err} on reused connection to {h}:{p}, reconnect".format(err=repr(e), h=host, p=port))
+                h.close()
+                data = await self._wait_for(h.request(path, method, headers, body), timeout)
+
+            resp = Response(status=h.status, headers=h.headers, body=data)
+        except BaseException:
+            h.close()
+            raise
+
+        self._conn_pool.release(h)
+        return resp
+
+    async def _request(self, url, method, params, timeout, bodyinjson, basic_auth_account=None):
+        while True:
+            host, port, path = self._parse_url(url)
+            if host is None or port is None or path is None:
+                raise EtcdException("url is invalid, {url}".format(url=url))
+
+            path, headers, body = self._build_request(path, method, params, bodyinjson, basic_auth_account)
+            if method in (self._MGET, self._MDELETE):
+                # use once, coz params is in location's query string
+                params = None
+
+            logger.debug(
+                "connect -> {mtd} {host}:{port}{path} {timeout}".format(
+                    mtd=method, host=host, port=port, path=path, timeout=timeout
+                )
+            )
+
+            resp = await self._send_request(host, port, path, method, headers, body, timeout)
+
+            if not self.allow_redirect:
+                return resp
+
+            if resp.status not in Response.REDIRECT_STATUSES:
+                return resp
+
+            url = resp.get_redirect_location()
+            if url is None:
+                raise EtcdResponseError("location not found in {header}".format(header=resp.headers))
+
+            logger.debug("redirect -> " + url)
+
+    async def _api_execute_with_retry(
+        self,
+        path,
+        method,
+        params=None,
+        timeout=None,
+        bodyinjson=False,
+        raise_read_timeout=False,
+        basic_auth_account=None,
+    ):
+        base_uri, machines = self._endpoints()
+        for uri in [base_uri] + machines:
+            url = uri + path
+
+            try:
+                response = await self._request(url, method, params, timeout, bodyinjson, basic_auth_account)
+                break
+            except (socket.error, k3http.HttpError) as e:
+                if raise_read_timeout and isinstance(e, socket.timeout):
+                    raise EtcdReadTimeoutError(e)
+
+                if len(machines) > 0:
+                    nxt = self._rotate(uri)
+
+                    logger.info("{err} while connect {cur}, try connect {nxt}".format(err=repr(e), cur=url, nxt=nxt))
+
+                else:
+                    logger.info("no more host to retry")
+
+            except Exception as e:
+                logger.exception(repr(e) + " while send request to etcd")
+                raise EtcdException(e)
+
+        else:
+            raise NoMoreMachineError("No more machines in the cluster")
+
+        return self._handle_server_response(response)
+
+    async def _load_machines(self):
+        machines = await self._machines()
+        base_uri, _ = self._endpoints()
+        self._set_endpoints(base_uri, [m for m in machines if m != base_uri])
+        self._machines_loaded = True
+
+    async def api_execute(
+        self,
+        path,
+        method,
+        params=None,
+        timeout=None,
+        bodyinjson=False,
+        raise_read_timeout=False,
+        need_refresh_machines=True,
+        basic_auth_account=None,
+    ):
+        if timeout is None:
+            timeout = self.read_timeout
+        if timeout == 0:
+            timeout = None
+
+        if not path.startswith("/"):
+            raise ValueError("Path does not start with /")
+
+        if need_refresh_machines and not self._machines_loaded:
+            await self._load_machines()
+
+        for i in range(0, 2):
+            try:
+                return await self._api_execute_with_retry(
+                    path,
+                    method,
+                    params=params,
+                    timeout=timeout,
+                    bodyinjson=bodyinjson,
+                    raise_read_timeout=raise_read_timeout,
+                    basic_auth_account=basic_auth_account,
+                )
+
+            except NoMoreMachineError as e:
+                logger.info(repr(e) + " while send_request path:{path}, method:{mtd}".format(path=path, mtd=method))
+
+                if i == 1 or not need_refresh_machines or not self._allow_reconnect:
+                    raise
+
+                new_machines = await self._machines()
+                base_uri, machines = self._endpoints()
+
+                if set(new_machines) == set(machines + [base_uri]):
+                    raise
+
+                self._set_endpoints(new_machines[0], new_machines[1:])
+
+    async def read(self, key, **argkv):
+        """
+        Get the value with `key`.
+        See `etcd.Client.read`.
+        :return: A `etcd.EtcdKeysResult` object.
+        """
+        key = self._sanitize_key(key)
+        params = self._generate_params(self._read_options, argkv)
+        timeout = argkv.get("timeout")
+        response = await self.api_execute(self._keys_path + key, self._MGET, params=params, timeout=timeout)
+
+        return self._to_keysresult(response)
+
+    get = read
+
+    async def write(self, key, value=None, ttl=None, dir=False, append=False, refresh=False, **argkv):
+        """
+        Writes the value for a key, possibly doing atomic Compare-and-Swap.
+        See `etcd.Client.write`.
+        :return: A `etcd.EtcdKeysResult` object.
+        """
+        key = self._sanitize_key(key)
+
+        params = {}
+        if ttl is not None:
+            params["ttl"] = ttl
+
+        if dir and value is not None:
+            raise EtcdRequestError("Cannot create a directory with a value " + repr(value))
+        elif value is not None:
+            params["value"] = value
+        elif dir:
+            params["dir"] = "true"
+
+        if refresh:
+            params["refresh"] = "true"
+
+        params.update(self._generate_params(self._write_conditions, argkv))
+
+        method = append and self._MPOST or self._MPUT
+        response = await self.api_execute(self._keys_path + key, method, params=params)
+
+        return self._to_keysresult(response)
+
+    async def test_and_set(self, key, value, ttl=None, **argkv):
+        """
+        See `etcd.Client.test_and_set`.
+        """
+        return await self.write(key, value=value, ttl=ttl, **argkv)
+
+    async def set(self, key, value, ttl=None):
+        """
+        See `etcd.Client.set`.
+        """
+        return await self.write(key, value=value, ttl=ttl)
+
+    async def update(self, res):
+        """
+        See `etcd.Client.update`.
+        """
+        argkv = {
+            "dir": res.dir,
+            "ttl": res.ttl,
+            "prevExist": True,
+        }
+
+        if not res.dir:
+            argkv["prevIndex"] = res.modifiedIndex
+
+        return await self.write(res.key, value=res.value, **argkv)
+
+    async def delete(self, key, recursive=None, dir=None, **argkv):
+        """
+        Remove a key from etcd.
+        See `etcd.Client.delete`.
+        :return: A `etcd.EtcdKeysResult` object.
+        """
+        key = self._sanitize_key(key)
+
+        params = {}
+        if recursive is not None:
+            params["recursive"] = recursive and "true" or "false"
+
+        if dir is not None:
+            params["dir"] = dir and "true" or "false"
+
+        params.update(self._generate_params(self._del_conditions, argkv))
+
+        response = await self.api_execute(self._keys_path + key, self._MDELETE, params=params)
+
+        return self._to_keysresult(response)
+
+    async def test_and_delete(self, key, **argkv):
+        """
+        See `etcd.Client.test_and_delete`.
+        """
+        return await self.delete(key, **argkv)
+
+    async def watch(self, key, waitindex=None, timeout=None, **argkv):
+        """
+        Wait until a new event has been received or timeout.
+        See `etcd.Client.watch`.
+        :return: A `etcd.EtcdKeysResult` object.
+        """
+        newest_v = await self.get(key)
+
+        if waitindex is None:
+            waitindex = argkv.get("waitIndex")
+
+        if waitindex is not None and 0 < waitindex <= newest_v.modifiedIndex:
+            return newest_v
+
+        waitindex = newest_v.etcd_index + 1
+        return await self._watch(key, waitindex, timeout, **argkv)
+
+    async def _watch(self, key, waitindex=None, timeout=None, **argkv):
+        key = self._sanitize_key(key)
+
+        params = self._generate_params(self._read_options, argkv)
+        params["wait"] = "true"
+
+        if waitindex is not None:
+            params["waitIndex"] = waitindex
+
+        # timeout is 0 means infinite waiting
+        while timeout == 0:
+            try:
+                response = await self.api_execute(self._keys_path + key, self._MGET, params=params, timeout=timeout)
+                return self._to_keysresult(response)
+            except EtcdIncompleteRead:
+                pass
+
+        timeout = timeout or self.read_timeout
+
+        while True:
+            st = time.time()
+            try:
+                response = await self.api_execute(
+                    self._keys_path + key, self._MGET, params=params, timeout=timeout, raise_read_timeout=True
+                )
+                return self._to_keysresult(response)
+            except (EtcdIncompleteRead, EtcdReadTimeoutError):
+                timeout = timeout - (time.time() - st)
+                if timeout <= 0:
+                    raise EtcdReadTimeoutError("Watch Timeout: " + key)
+
+    async def eternal_watch(self, key, waitindex=None, until=None, **argkv):
+        """
+        Wait for changes of `key` until the modify index is ge than `until`.
+        See `etcd.Client.eternal_watch`.
+        :return: an async iterator. Each element is a `etcd.EtcdKeysResult` object.
+        """
+        local_index = waitindex
+        while True:
+            res = await self._watch(key, waitindex=local_index, timeout=0, **argkv)
+            if until is not None and res.modifiedIndex is not None and res.modifiedIndex >= until:
+                yield res
+                return
+
+            if local_index is not None:
+                local_index = (res.modifiedIndex or local_index) + 1
+
+            yield res
+
+    async def mkdir(self, key, ttl=None, **argkv):
+        """
+        See `etcd.Client.mkdir`.
+        """
+        return await self.write(key, ttl=ttl, dir=True, **argkv)
+
+    async def refresh(self, key, ttl=None, **argkv):
+        """
+        See `etcd.Client.refresh`.
+        """
+        argkv["prevExist"] = True
+        return await self.write(key, ttl=ttl, refresh=True, **argkv)
+
+    async def lsdir(self, key, **argkv):
+        """
+        See `etcd.Client.lsdir`.
+        """
+        return await self.read(key, **argkv)
+
+    async def rlsdir(self, key, **argkv):
+        argkv["recursive"] = True
+        return await self.read(key, **argkv)
+
+    async def deldir(self, key, **argkv):
+        """
+        See `etcd.Client.deldir`.
+        """
+        return await self.delete(key, dir=True, **argkv)
+
+    async def rdeldir(self, key, **argkv):
+        """
+        See `etcd.Client.rdeldir`.
+        """
+        argkv["recursive"] = True
+        return await self.delete(key, dir=True, **argkv)
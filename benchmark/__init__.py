@@ -0,0 +1,43 @@
+"""
+Benchmarks of `k3etcd.Client` against an in-process fake etcd cluster.
+
+No etcd server is needed. Run all scenarios and print the result as json:
+
+```
+python -m k3etcd.benchmark --output result.json
+```
+"""
+
+from .fake_etcd import (
+    FakeEtcdCluster,
+    FakeEtcdMember,
+    FakeEtcdStore,
+)
+from .scenarios import (
+    bench_failover,
+    bench_get_set,
+    bench_hedged_read,
+    bench_json_codec,
+    bench_leader_writes,
+    bench_partial_outage,
+    bench_recursive_read,
+    bench_watch_latency,
+    run,
+    summary,
+)
+
+__all__ = [
+    "FakeEtcdCluster",
+    "FakeEtcdMember",
+    "FakeEtcdStore",
+    "bench_failover",
+    "bench_get_set",
+    "bench_hedged_read",
+    "bench_json_codec",
+    "bench_leader_writes",
+    "bench_partial_outage",
+    "bench_recursive_read",
+    "bench_watch_latency",
+    "run",
+    "summary",
+]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import json
+import sys
+
+from .scenarios import run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m k3etcd.benchmark", description="benchmark k3etcd.Client")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run, all if not given")
+    parser.add_argument(
+        "--ops",
+        type=int,
+        default=2000,
+        help="sets and gets in get_set, gets in partial_outage and hedged_read, sets in leader_writes",
+    )
+    parser.add_argument("--threads", type=int, default=1, help="threads in get_set")
+    parser.add_argument(
+        "--tree-sizes",
+        default="10000,100000",
+        help="comma separated leaf numbers of the trees in recursive_read and json_codec",
+    )
+    parser.add_argument("--events", type=int, default=200, help="events in watch_latency")
+    parser.add_argument("--repeat", type=int, default=10, help="failovers in failover")
+    parser.add_argument("--output", help="write the json result to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    rst = run(
+        names=args.scenarios or None,
+        ops=args.ops,
+        threads=args.threads,
+        tree_sizes=[int(x) for x in args.tree_sizes.split(",")],
+        events=args.events,
+        repeat=args.repeat,
+    )
+
+    out = json.dumps(rst, indent=2, sort_keys=True)
+    if args.output is None:
+        sys.stdout.write(out + "\n")
+    else:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,770 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+An in-process fake of the etcd v2 http api, used by the unit tests and the
+benchmarks.
+
+It implements the `keys`, `machines`, `members`, `stats` and `version`
+endpoints on top of one in-memory store shared by every member of a
+`FakeEtcdCluster`.
+"""
+
+import http.server
+import json
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+
+HISTORY_SIZE = 1000
+
+
+class FakeEtcdError(Exception):
+    def __init__(self, status, ecode, message, cause, index):
+        super(FakeEtcdError, self).__init__(message)
+        self.status = status
+        self.body = {"errorCode": ecode, "message": message, "cause": cause, "index": index}
+
+
+class FakeEtcdStore(object):
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.index = 0
+        self.root = {"dir": True, "children": {}, "modifiedIndex": 0, "createdIndex": 0}
+        self.history = []
+        # key -> (parent, name, node) of nodes created with a ttl
+        self.expiring = {}
+        self.stats = {
+            "getsSuccess": 0,
+            "getsFail": 0,
+            "setsSuccess": 0,
+            "setsFail": 0,
+            "deleteSuccess": 0,
+            "deleteFail": 0,
+            "updateSuccess": 0,
+            "updateFail": 0,
+            "createSuccess": 0,
+            "createFail": 0,
+            "compareAndSwapSuccess": 0,
+            "compareAndSwapFail": 0,
+            "compareAndDeleteSuccess": 0,
+            "compareAndDeleteFail": 0,
+            "expireCount": 0,
+            "watchers": 0,
+        }
+
+    def _err(self, ecode, cause):
+        messages = {
+            100: (404, "Key not found"),
+            101: (412, "Compare failed"),
+            102: (403, "Not a file"),
+            104: (403, "Not a directory"),
+            105: (412, "Key already exists"),
+            107: (403, "Root is read only"),
+            108: (403, "Directory not empty"),
+            300: (500, "Raft Internal Error"),
+            301: (500, "During Leader Election"),
+            401: (400, "The event in requested index is outdated and cleared"),
+        }
+        status, msg = messages[ecode]
+        return FakeEtcdError(status, ecode, msg, cause, self.index)
+
+    def _split(self, key):
+        return [p for p in key.split("/") if p != ""]
+
+    def _lookup(self, key):
+        node = self.root
+        for name in self._split(key):
+            if not node.get("dir"):
+                return None
+            node = node["children"].get(name)
+            if node is None:
+                return None
+
+        return node
+
+    def _expire(self):
+        if len(self.expiring) == 0:
+            return
+
+        now = time.time()
+        for key, (parent, name, node) in list(self.expiring.items()):
+            if node.get("expireAt") is None or parent["children"].get(name) is not node:
+                del self.expiring[key]
+                continue
+
+            if node["expireAt"] > now:
+                continue
+
+            del self.expiring[key]
+            del parent["children"][name]
+            self.index += 1
+            self.stats["expireCount"] += 1
+            rst = {"key": node["key"], "modifiedIndex": self.index, "createdIndex": node["createdIndex"]}
+            self._record("expire", rst, self.export(node))
+
+    def _record(self, action, node, prev):
+        ev = {"action": action, "node": node}
+        if prev is not None:
+            ev["prevNode"] = prev
+
+        self.history.append((self.index, node["key"], ev))
+        if len(self.history) > HISTORY_SIZE:
+            self.history.pop(0)
+
+        self.cond.notify_all()
+
+    def export(self, node, recursive=False, sort=False, depth=0):
+        rst = {}
+        if "key" in node:
+            rst["key"] = node["key"]
+
+        if node.get("dir"):
+            rst["dir"] = True
+            if depth == 0 or recursive:
+                # like etcd, a hidden node whose name starts with "_" is not listed
+                children = [c for c in node["children"].values() if not c["key"].rsplit("/", 1)[-1].startswith("_")]
+                if sort:
+                    children.sort(key=lambda n: n["key"])
+                nodes = [self.export(c, recursive, sort, depth + 1) for c in children]
+                if len(nodes) > 0:
+                    rst["nodes"] = nodes
+        else:
+            rst["value"] = node["value"]
+
+        if node.get("expireAt") is not None:
+            rst["expiration"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(node["expireAt"]))
+            rst["ttl"] = max(int(node["expireAt"] - time.time() + 0.5), 1)
+
+        if "key" in node:
+            rst["modifiedIndex"] = node["modifiedIndex"]
+            rst["createdIndex"] = node["createdIndex"]
+
+        return rst
+
+    def get(self, key, recursive=False, sort=False):
+        with self.cond:
+            self._expire()
+            node = self._lookup(key)
+            if node is None:
+                self.stats["getsFail"] += 1
+                raise self._err(100, key)
+
+            self.stats["getsSuccess"] += 1
+            return 200, {"action": "get", "node": self.export(node, recursive, sort)}
+
+    def _match(self, ev_key, key, recursive):
+        if ev_key == key:
+            return True
+
+        return recursive and ev_key.startswith(key.rstrip("/") + "/")
+
+    def _find_event(self, key, wait_index, recursive):
+        if wait_index is None:
+            return None
+
+        if len(self.history) >= HISTORY_SIZE and wait_index < self.history[0][0]:
+            raise self._err(401, "the requested history has been cleared")
+
+        for idx, ev_key, ev in self.history:
+            if idx >= wait_index and self._match(ev_key, key, recursive):
+                return ev
+
+        return None
+
+    def wait(self, key, wait_index, recursive, stopped, timeout=None):
+        key = "/" + "/".join(self._split(key))
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        with self.cond:
+            self._expire()
+            if wait_index is None:
+                wait_index = self.index + 1
+
+            self.stats["watchers"] += 1
+            try:
+                while True:
+                    ev = self._find_event(key, wait_index, recursive)
+                    if ev is not None:
+                        return ev
+
+                    if stopped.is_set():
+                        return None
+
+                    if deadline is not None and time.time() >= deadline:
+                        return None
+
+                    self.cond.wait(0.05)
+            finally:
+                self.stats["watchers"] -= 1
+
+    def set(
+        self,
+        key,
+        value=None,
+        dir=False,
+        ttl=None,
+        prevValue=None,
+        prevIndex=None,
+        prevExist=None,
+        refresh=False,
+        append=False,
+    ):
+        with self.cond:
+            self._expire()
+            names = self._split(key)
+            if len(names) == 0:
+                raise self._err(107, "/")
+
+            parent = self.root
+            path = ""
+            for name in names[:-1]:
+                path += "/" + name
+                child = parent["children"].get(name)
+                if child is None:
+                    self.index += 1
+                    child = {
+                        "key": path,
+                        "dir": True,
+                        "children": {},
+                        "modifiedIndex": self.index,
+                        "createdIndex": self.index,
+                    }
+                    parent["children"][name] = child
+                elif not child.get("dir"):
+                    raise self._err(104, path)
+                parent = child
+
+            key = "/" + "/".join(names)
+            if append:
+                node = parent["children"].get(names[-1])
+                if node is None:
+                    self.index += 1
+                    node = {
+                        "key": key,
+                        "dir": True,
+                        "children": {},
+                        "modifiedIndex": self.index,
+                        "createdIndex": self.index,
+                    }
+                    parent["children"][names[-1]] = node
+                if not node.get("dir"):
+                    raise self._err(104, key)
+                parent = node
+                names.append("%020d" % (self.index + 1))
+                key = key + "/" + names[-1]
+
+            name = names[-1]
+            existing = parent["children"].get(name)
+            prev = None
+            if existing is not None:
+                prev = self.export(existing)
+
+            stat = "sets"
+            if prevValue is not None or prevIndex is not None:
+                stat = "compareAndSwap"
+            elif prevExist is True:
+                stat = "update"
+            elif prevExist is False:
+                stat = "create"
+
+            try:
+                action = self._check_set(existing, key, dir, prevValue, prevIndex, prevExist, refresh)
+            except FakeEtcdError:
+                self.stats[stat + "Fail"] += 1
+                raise
+
+            self.stats[stat + "Success"] += 1
+            if append:
+                action = "create"
+
+            self.index += 1
+            expire_at = None
+            if ttl not in (None, ""):
+                expire_at = time.time() + int(ttl)
+
+            if refresh:
+                existing["expireAt"] = expire_at
+                existing["modifiedIndex"] = self.index
+                node = existing
+            elif existing is not None and existing.get("dir") and dir:
+                existing["expireAt"] = expire_at
+                existing["modifiedIndex"] = self.index
+                node = existing
+            else:
+                created = self.index
+                if existing is not None:
+                    created = existing["createdIndex"]
+                node = {"key": key, "modifiedIndex": self.index, "createdIndex": created, "expireAt": expire_at}
+                if dir:
+                    node["dir"] = True
+                    node["children"] = {}
+                else:
+                    node["value"] = value or ""
+                parent["children"][name] = node
+
+            if expire_at is not None:
+                self.expiring[key] = (parent, name, node)
+
+            rst = self.export(node)
+            self._record(action, rst, prev)
+
+            body = {"action": action, "node": rst}
+            if prev is not None:
+                body["prevNode"] = prev
+
+            status = 201 if existing is None else 200
+            return status, body
+
+    def _check_set(self, existing, key, dir, prevValue, prevIndex, prevExist, refresh):
+        if prevExist is False and existing is not None:
+            raise self._err(105, key)
+
+        if (prevExist is True or refresh) and existing is None:
+            raise self._err(100, key)
+
+        if existing is not None and existing.get("dir") and not dir and not refresh:
+            raise self._err(102, key)
+
+        if prevValue is not None or prevIndex is not None:
+            if existing is None:
+                raise self._err(100, key)
+            if prevValue is not None and existing.get("value") != prevValue:
+                raise self._err(101, "[%s != %s]" % (prevValue, existing.get("value")))
+            if prevIndex is not None and existing["modifiedIndex"] != int(prevIndex):
+                raise self._err(101, "[%s != %d]" % (prevIndex, existing["modifiedIndex"]))
+            return "compareAndSwap"
+
+        if prevExist is True:
+            return "update"
+
+        if prevExist is False:
+            return "create"
+
+        return "set"
+
+    def delete(self, key, dir=False, recursive=False, prevValue=None, prevIndex=None):
+        with self.cond:
+            self._expire()
+            names = self._split(key)
+            if len(names) == 0:
+                raise self._err(107, "/")
+
+            key = "/" + "/".join(names)
+            parent = self._lookup("/" + "/".join(names[:-1]))
+            node = None
+            if parent is not None and parent.get("dir"):
+                node = parent["children"].get(names[-1])
+
+            action = "delete"
+            if prevValue is not None or prevIndex is not None:
+                action = "compareAndDelete"
+
+            if node is None:
+                self.stats[action + "Fail"] += 1
+                raise self._err(100, key)
+
+            if node.get("dir"):
+                if not dir and not recursive:
+                    self.stats[action + "Fail"] += 1
+                    raise self._err(102, key)
+                if len(node["children"]) > 0 and not recursive:
+                    self.stats[action + "Fail"] += 1
+                    raise self._err(108, key)
+
+            if prevValue is not None and node.get("value") != prevValue:
+                self.stats[action + "Fail"] += 1
+                raise self._err(101, "[%s != %s]" % (prevValue, node.get("value")))
+
+            if prevIndex is not None and node["modifiedIndex"] != int(prevIndex):
+                self.stats[action + "Fail"] += 1
+                raise self._err(101, "[%s != %d]" % (prevIndex, node["modifiedIndex"]))
+
+            self.stats[action + "Success"] += 1
+            del parent["children"][names[-1]]
+            self.index += 1
+
+            prev = self.export(node)
+            rst = {"key": key, "modifiedIndex": self.index, "createdIndex": node["createdIndex"]}
+            if node.get("dir"):
+                rst["dir"] = True
+
+            self._record(action, rst, prev)
+            return 200, {"action": action, "node": rst, "prevNode": prev}
+
+
+class FakeEtcdHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def setup(self):
+        http.server.BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.member.on_connect(self.connection)
+
+    def finish(self):
+        try:
+            http.server.BaseHTTPRequestHandler.finish(self)
+        finally:
+            self.server.member.on_disconnect(self.connection)
+
+    def _params(self):
+        p = urllib.parse.urlparse(self.path)
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(p.query, keep_blank_values=True).items()}
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length > 0 else b""
+        ctype = self.headers.get("Content-Type") or ""
+        if body and ctype.startswith("application/x-www-form-urlencoded"):
+            form = urllib.parse.parse_qs(body.decode("utf-8"), keep_blank_values=True)
+            params.update({k: v[-1] for k, v in form.items()})
+
+        return urllib.parse.unquote(p.path), params
+
+    def _send(self, status, body, headers=None):
+        member = self.server.member
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode("utf-8")
+            ctype = "application/json"
+        else:
+            data = body.encode("utf-8")
+            ctype = "text/plain"
+
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Etcd-Cluster-Id", "7e27652122e8b2ae")
+        self.send_header("X-Etcd-Index", str(member.store.index))
+        self.send_header("X-Raft-Index", str(member.store.index + 100))
+        self.send_header("X-Raft-Term", "2")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+        self.wfile.flush()
+
+    def _handle(self, method):
+        member = self.server.member
+        member.requests += 1
+        member.last_authorization = self.headers.get("Authorization")
+        if member.delay > 0 and member.stopped.wait(member.delay):
+            # member stopped, drop the connection like a crashed server
+            self.close_connection = True
+            return
+
+        path, params = self._params()
+
+        try:
+            if path.startswith("/v2/keys"):
+                return self._keys(method, path[len("/v2/keys") :] or "/", params)
+
+            if method == "GET" and path == "/v2/machines":
+                return self._send(200, ", ".join(m.url for m in member.cluster.members))
+
+            if method == "GET" and path == "/v2/members":
+                return self._send(200, {"members": [m.info() for m in member.cluster.members]})
+
+            if method == "GET" and path.startswith("/v2/stats/"):
+                return self._stats(path[len("/v2/stats/") :])
+
+            if method == "GET" and path == "/version":
+                return self._send(200, {"etcdserver": "2.3.8", "etcdcluster": "2.3.0"})
+
+            self._send(404, "404 page not found\n")
+        except FakeEtcdError as e:
+            self._send(e.status, e.body)
+
+    def _bool(self, params, name):
+        v = params.get(name)
+        if v is None:
+            return None
+        return v == "true"
+
+    def _keys(self, method, key, params):
+        member = self.server.member
+        store = member.store
+
+        if member.cluster.electing():
+            raise store._err(301, "")
+
+        leader = member.cluster.leader
+        if member.cluster.redirect_to_leader and member is not leader:
+            if method != "GET" or (self._bool(params, "quorum") and not self._bool(params, "wait")):
+                member.redirects += 1
+                return self._send(307, "", headers={"Location": leader.url + self.path})
+
+        if method == "GET":
+            recursive = self._bool(params, "recursive") or False
+            if self._bool(params, "wait"):
+                wait_index = params.get("waitIndex")
+                if wait_index is not None:
+                    wait_index = int(wait_index)
+
+                if self._bool(params, "stream"):
+                    return self._stream(key, wait_index, recursive)
+
+                ev = store.wait(key, wait_index, recursive, member.stopped)
+                if ev is None:
+                    # member stopped, drop the connection like a crashed server
+                    self.close_connection = True
+                    return
+                return self._send(200, ev)
+
+            status, body = store.get(key, recursive, self._bool(params, "sorted") or False)
+            return self._send(status, body)
+
+        if method in ("PUT", "POST"):
+            prev_exist = self._bool(params, "prevExist")
+            status, body = store.set(
+                key,
+                value=params.get("value"),
+                dir=self._bool(params, "dir") or False,
+                ttl=params.get("ttl"),
+                prevValue=params.get("prevValue"),
+                prevIndex=params.get("prevIndex"),
+                prevExist=prev_exist,
+                refresh=self._bool(params, "refresh") or False,
+                append=method == "POST",
+            )
+            return self._send(status, body)
+
+        if method == "DELETE":
+            status, body = store.delete(
+                key,
+                dir=self._bool(params, "dir") or False,
+                recursive=self._bool(params, "recursive") or False,
+                prevValue=params.get("prevValue"),
+                prevIndex=params.get("prevIndex"),
+            )
+            return self._send(status, body)
+
+        self._send(405, "Method Not Allowed")
+
+    def _stream(self, key, wait_index, recursive):
+        member = self.server.member
+        store = member.store
+
+        with store.cond:
+            if wait_index is None:
+                wait_index = store.index + 1
+            index = store.index
+            # an error such as a cleared index is sent before the stream starts
+            ev = store.wait(key, wait_index, recursive, member.stopped, timeout=0)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Etcd-Index", str(index))
+        self.end_headers()
+        self.wfile.flush()
+
+        with member._lock:
+            member.streams += 1
+        try:
+            self._send_events(key, wait_index, recursive, ev)
+        finally:
+            with member._lock:
+                member.streams -= 1
+
+        self.close_connection = True
+
+    def _send_events(self, key, wait_index, recursive, ev):
+        member = self.server.member
+        store = member.store
+
+        while not member.stopped.is_set():
+            if ev is None:
+                ev = store.wait(key, wait_index, recursive, member.stopped, timeout=0.2)
+                if ev is None:
+                    continue
+
+            wait_index = ev["node"]["modifiedIndex"] + 1
+            data = (json.dumps(ev) + "\n").encode("utf-8")
+            try:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            except OSError:
+                break
+            ev = None
+
+    def _stats(self, name):
+        member = self.server.member
+        cluster = member.cluster
+        leader = cluster.leader
+
+        if name == "self":
+            st = {
+                "name": member.name,
+                "id": member.id,
+                "state": "StateLeader" if member is leader else "StateFollower",
+                "startTime": "2017-06-14T05:20:04.334273309Z",
+                "leaderInfo": {"leader": leader.id, "uptime": "1h", "startTime": "2017-06-14T05:20:04Z"},
+                "recvAppendRequestCnt": 0,
+                "sendAppendRequestCnt": 0,
+            }
+            return self._send(200, st)
+
+        if name == "store":
+            return self._send(200, dict(member.store.stats))
+
+        if name == "leader":
+            if member is not leader:
+                return self._send(403, {"message": "not current leader"})
+
+            followers = {}
+            for m in cluster.members:
+                if m is leader:
+                    continue
+                followers[m.id] = {
+                    "latency": {
+                        "current": 0.001,
+                        "average": 0.001,
+                        "standardDeviation": 0.0,
+                        "minimum": 0.001,
+                        "maximum": 0.001,
+                    },
+                    "counts": {"fail": 0, "success": 1},
+                }
+            return self._send(200, {"leader": leader.id, "followers": followers})
+
+        self._send(404, "404 page not found\n")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeEtcdServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # many clients connect at once in tests
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # a client that cancels a request closes its connection
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super(FakeEtcdServer, self).handle_error(request, client_address)
+
+
+class FakeEtcdMember(object):
+    def __init__(self, cluster, index, port=0):
+        self.cluster = cluster
+        self.store = cluster.store
+        self.name = "node_%d" % index
+        self.id = "%016x" % (0x1000 + index)
+        self.host = "127.0.0.1"
+        self.port = port
+        self.last_authorization = None
+        self.requests = 0
+        self.connections = 0
+        # open watch streams
+        self.streams = 0
+        # requests redirected to the leader
+        self.redirects = 0
+        # seconds to wait before handling each request, to make it slow
+        self.delay = 0
+        self.stopped = threading.Event()
+        self.server = None
+        self.thread = None
+        self._socks = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://%s:%d" % (self.host, self.port)
+
+    def info(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "peerURLs": ["http://%s:%d" % (self.host, self.port + 1)],
+            "clientURLs": [self.url],
+        }
+
+    def on_connect(self, sock):
+        with self._lock:
+            self.connections += 1
+            self._socks.add(sock)
+
+    def on_disconnect(self, sock):
+        with self._lock:
+            self._socks.discard(sock)
+
+    def start(self):
+        self.stopped.clear()
+        self.server = FakeEtcdServer((self.host, self.port), FakeEtcdHandler)
+        self.server.member = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05})
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        if self.server is None:
+            return
+
+        self.stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+        with self._lock:
+            socks = list(self._socks)
+        for s in socks:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.server = None
+        self.thread.join()
+
+
+class FakeEtcdCluster(object):
+    def __init__(self, size=3):
+        self.store = FakeEtcdStore()
+        self.members = [FakeEtcdMember(self, i) for i in range(size)]
+        self.leader = self.members[0]
+        # followers redirect writes and quorum reads to the leader
+        self.redirect_to_leader = False
+        # the number of key requests answered "During Leader Election"
+        self.elections = 0
+        self._lock = threading.Lock()
+
+    def electing(self):
+        with self._lock:
+            if self.elections <= 0:
+                return False
+            self.elections -= 1
+            return True
+
+    @property
+    def hosts(self):
+        return tuple((m.host, m.port) for m in self.members)
+
+    def start(self):
+        for m in self.members:
+            m.start()
+        return self
+
+    def stop(self):
+        for m in self.members:
+            m.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
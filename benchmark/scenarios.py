@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+import platform
+import queue
+import threading
+import time
+import tracemalloc
+
+import k3etcd
+from k3etcd import codec as json_codec
+from k3etcd import nodestream
+
+from .fake_etcd import FakeEtcdCluster
+
+# leaves in each dir of the trees built by `bench_recursive_read`
+TREE_FANOUT = 100
+
+# bytes of each piece of the response decoded by the stream decoder
+STREAM_CHUNK = 64 * 1024
+
+
+def summary(latencies, elapsed=None):
+    """
+    Summarize the latencies of a run.
+    :param latencies: seconds taken by each operation.
+    :param elapsed: wall time of the run. If `None`, the sum of `latencies`.
+    :return: a `dict` of `count`, `ops_per_sec` and latency percentiles in milliseconds.
+    """
+    lat = sorted(latencies)
+    if elapsed is None:
+        elapsed = sum(lat)
+
+    def _pct(p):
+        if len(lat) == 0:
+            return None
+        return round(lat[min(int(len(lat) * p), len(lat) - 1)] * 1000, 3)
+
+    return {
+        "count": len(lat),
+        "ops_per_sec": round(len(lat) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": _pct(0.50),
+        "p90_ms": _pct(0.90),
+        "p99_ms": _pct(0.99),
+        "max_ms": _pct(1),
+    }
+
+
+def _run_threads(n, target, *args):
+    ths = [threading.Thread(target=target, args=(i,) + args) for i in range(n)]
+    for th in ths:
+        th.start()
+    for th in ths:
+        th.join()
+
+
+def bench_get_set(cluster, ops=2000, threads=1):
+    """
+    Throughput and latency of `etcd.Client.set` then `etcd.Client.get`,
+    with `threads` threads sharing one client.
+    """
+    c = k3etcd.Client(host=cluster.hosts)
+    rst = {}
+    try:
+        for name in ("set", "get"):
+            latencies = [[] for _ in range(threads)]
+
+            def _work(i, name, latencies):
+                lat = latencies[i]
+                for j in range(i, ops, threads):
+                    key = "/bench/k%d" % j
+                    t0 = time.perf_counter()
+                    if name == "set":
+                        c.set(key, "v%d" % j)
+                    else:
+                        c.get(key)
+                    lat.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            _run_threads(threads, _work, name, latencies)
+            elapsed = time.perf_counter() - t0
+
+            rst[name] = summary([x for lat in latencies for x in lat], elapsed)
+    finally:
+        c.close()
+
+    rst["threads"] = threads
+    return rst
+
+
+def make_tree(nodes, fanout=TREE_FANOUT):
+    """
+    Build the json body of a `recursive=true` read of a dir with `nodes`
+    leaves, `fanout` leaves in each sub dir.
+    :return: the body as `bytes`.
+    """
+    dirs = []
+    index = 1
+    for d in range(0, nodes, fanout):
+        dkey = "/bench/d%d" % (d // fanout)
+        leaves = []
+        for i in range(d, min(d + fanout, nodes)):
+            index += 1
+            leaves.append(
+                {"key": "%s/k%d" % (dkey, i), "value": "v%d" % i, "modifiedIndex": index, "createdIndex": index}
+            )
+        dirs.append({"key": dkey, "dir": True, "nodes": leaves, "modifiedIndex": 1, "createdIndex": 1})
+
+    body = {"action": "get", "node": {"key": "/bench", "dir": True, "nodes": dirs}}
+    return json.dumps(body).encode("utf-8")
+
+
+def bench_recursive_read(cluster, sizes=(10000, 100000), repeat=3):
+    """
+    Client side cost of a recursive read of a big tree: decoding the
+    response into a `etcd.EtcdKeysResult` and walking its leaves, and the
+    memory taken by the decoded response and by a list of all the leaves.
+    The same for decoding it while it is received, with the peak memory.
+    The response is built once, so that the server does not count.
+    """
+    c = k3etcd.Client(host=cluster.hosts)
+    headers = {"x-etcd-index": "1", "x-raft-index": "1", "x-raft-term": "1"}
+    rst = []
+    try:
+        for n in sizes:
+            body = make_tree(n)
+            decode, walk = [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                res = c._to_keysresult(k3etcd.Response(status=200, headers=headers, body=body))
+                t1 = time.perf_counter()
+                leaves = sum(1 for _ in res.leaves)
+                t2 = time.perf_counter()
+
+                assert leaves == n
+                decode.append(t1 - t0)
+                walk.append(t2 - t1)
+                del res
+
+            tracemalloc.start()
+            try:
+                res = c._to_keysresult(k3etcd.Response(status=200, headers=headers, body=body))
+                decoded = tracemalloc.get_traced_memory()[0]
+                leaves = list(res.leaves)
+                leaves_mem = tracemalloc.get_traced_memory()[0] - decoded
+                del res, leaves
+            finally:
+                tracemalloc.stop()
+
+            # decode while receiving, as `etcd.Client.read_stream` does
+            chunks = [body[i : i + STREAM_CHUNK] for i in range(0, len(body), STREAM_CHUNK)]
+            stream = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                for _ in nodestream.iter_nodes(chunks):
+                    pass
+                stream.append(time.perf_counter() - t0)
+
+            tracemalloc.start()
+            try:
+                for _ in nodestream.iter_nodes(chunks):
+                    pass
+                stream_peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            rst.append(
+                {
+                    "nodes": n,
+                    "bytes": len(body),
+                    "decode_sec": round(min(decode), 4),
+                    "leaves_sec": round(min(walk), 4),
+                    "decoded_bytes": decoded,
+                    "leaves_bytes": leaves_mem,
+                    "stream_sec": round(min(stream), 4),
+                    "stream_peak_bytes": stream_peak,
+                }
+            )
+    finally:
+        c.close()
+
+    return rst
+
+
+def bench_json_codec(cluster, sizes=(10000, 100000), repeat=3):
+    """
+    Decoding time of each installed json codec on v2 responses: a key, a
+    dir of 100 keys and recursive reads of trees with `sizes` leaves, and
+    encoding time of a request body.
+    """
+    key = {"action": "get", "node": {"key": "/k", "value": "v", "modifiedIndex": 8, "createdIndex": 8}}
+    bodies = [("key", json.dumps(key).encode("utf-8")), ("dir_100", make_tree(100))]
+    bodies.extend([("tree_%d" % n, make_tree(n)) for n in sizes])
+
+    request = {"user": "u1", "password": "p", "roles": ["r%d" % i for i in range(10)]}
+
+    rst = {}
+    for name in json_codec.available_codecs():
+        c = json_codec.get_codec(name)
+        st = {}
+        for bname, body in bodies:
+            # small bodies are decoded many times for a stable result
+            loops = max(1, 1000000 // len(body))
+            best = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                for _ in range(loops):
+                    c.loads(body)
+                dt = (time.perf_counter() - t0) / loops
+                best = dt if best is None else min(best, dt)
+            st["loads_" + bname + "_us"] = round(best * 1000000, 2)
+
+        t0 = time.perf_counter()
+        for _ in range(10000):
+            c.dumps(request)
+        st["dumps_request_us"] = round((time.perf_counter() - t0) / 10000 * 1000000, 2)
+
+        rst[name] = st
+
+    return rst
+
+
+def bench_watch_latency(cluster, events=200, stream=False):
+    """
+    Time from sending a write to receiving its event from
+    `etcd.Client.eternal_watch`. The next write is sent after the event is
+    received.
+    """
+    c = k3etcd.Client(host=cluster.hosts)
+    writer = k3etcd.Client(host=cluster.hosts)
+    received = queue.Queue()
+    key = "/bench/watched"
+
+    try:
+        res = writer.set(key, "init")
+
+        def _watch():
+            until = res.modifiedIndex + events
+            for r in c.eternal_watch(key, waitindex=res.modifiedIndex + 1, until=until, stream=stream):
+                received.put((r.value, time.perf_counter()))
+
+        th = threading.Thread(target=_watch)
+        th.daemon = True
+        th.start()
+
+        latencies = []
+        t0 = time.perf_counter()
+        for i in range(events):
+            sent = time.perf_counter()
+            writer.set(key, str(i))
+            value, got = received.get(timeout=10)
+            assert value == str(i)
+            latencies.append(got - sent)
+        elapsed = time.perf_counter() - t0
+
+        th.join(10)
+    finally:
+        c.close()
+        writer.close()
+
+    return summary(latencies, elapsed)
+
+
+def bench_failover(cluster, repeat=10):
+    """
+    Time of a read when the current member is down and
+    `etcd.Client._api_execute_with_retry` moves to the next one.
+    """
+    m = cluster.members[0]
+    c = k3etcd.Client(host=cluster.hosts)
+    c.set("/bench/failover", "1")
+    c.close()
+
+    latencies = []
+    for _ in range(repeat):
+        c = k3etcd.Client(host=cluster.hosts)
+        m.stop()
+        try:
+            t0 = time.perf_counter()
+            c.get("/bench/failover")
+            latencies.append(time.perf_counter() - t0)
+        finally:
+            m.start()
+            c.close()
+
+    return summary(latencies)
+
+
+def bench_leader_writes(cluster, ops=2000):
+    """
+    Latency of `etcd.Client.set` when the followers redirect writes to the
+    leader, and the number of writes redirected.
+    """
+    c = k3etcd.Client(host=cluster.hosts)
+    cluster.redirect_to_leader = True
+    try:
+        latencies = []
+        for i in range(ops):
+            t0 = time.perf_counter()
+            c.set("/bench/w%d" % i, "v")
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        cluster.redirect_to_leader = False
+        c.close()
+
+    rst = summary(latencies)
+    rst["redirects"] = sum(m.redirects for m in cluster.members)
+    return rst
+
+
+def bench_partial_outage(cluster, ops=2000, delay=0.02):
+    """
+    Latency of `etcd.Client.get` while one member is `delay` seconds slow
+    and another is down, and the share of the gets sent to each member.
+    """
+    slow, down = cluster.members[0], cluster.members[1]
+    c = k3etcd.Client(host=cluster.hosts)
+    try:
+        c.set("/bench/outage", "1")
+        slow.delay = delay
+        down.stop()
+
+        before = [m.requests for m in cluster.members]
+        latencies = []
+        for _ in range(ops):
+            t0 = time.perf_counter()
+            c.get("/bench/outage")
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        slow.delay = 0
+        down.start()
+        c.close()
+
+    rst = summary(latencies)
+    rst["requests"] = [m.requests - b for m, b in zip(cluster.members, before)]
+    return rst
+
+
+def bench_hedged_read(cluster, ops=2000, pause=0.05, interval=0.2):
+    """
+    Latency of `etcd.Client.get` while one member pauses for `pause`
+    seconds every `interval` seconds, such as for garbage collection,
+    without and with `hedge=True`, the number of gets that waited for a
+    pause, and the number of duplicates sent.
+    """
+    m = cluster.members[0]
+    stop = threading.Event()
+
+    def _pause():
+        while not stop.wait(interval):
+            m.delay = pause
+            stop.wait(pause)
+            m.delay = 0
+
+    th = threading.Thread(target=_pause)
+    th.daemon = True
+    th.start()
+
+    rst = {}
+    try:
+        for hedge in (False, True):
+            # a new client does not know which member pauses
+            c = k3etcd.Client(host=cluster.hosts)
+            try:
+                c.set("/bench/hedge", "1")
+                latencies = []
+                for _ in range(ops):
+                    t0 = time.perf_counter()
+                    c.get("/bench/hedge", hedge=hedge)
+                    latencies.append(time.perf_counter() - t0)
+            finally:
+                c.close()
+
+            st = summary(latencies)
+            st["paused"] = len([x for x in latencies if x > pause / 2])
+            rst["hedged" if hedge else "plain"] = st
+            if hedge:
+                rst["hedges"] = c.read_hedger.hedges
+    finally:
+        stop.set()
+        th.join()
+        m.delay = 0
+
+    return rst
+
+
+def run(names=None, ops=2000, threads=1, tree_sizes=(10000, 100000), events=200, repeat=10):
+    """
+    Run benchmark scenarios, each on a new 3 member fake cluster.
+    :param names: names of scenarios to run. If `None`, run all of them:
+    `get_set`, `recursive_read`, `json_codec`, `watch_latency`, `failover`,
+    `partial_outage`, `leader_writes`, `hedged_read`.
+    :param ops: number of sets and of gets in `get_set`, of gets in
+    `partial_outage` and `hedged_read` and of sets in `leader_writes`.
+    Defaults to `2000`.
+    :param threads: number of threads in `get_set`. Defaults to `1`.
+    :param tree_sizes: number of leaves of the trees in `recursive_read` and
+    `json_codec`.
+    :param events: number of events in `watch_latency`. Defaults to `200`.
+    :param repeat: number of failovers in `failover`. Defaults to `10`.
+    :return: a `dict` of the environment and the result of each scenario,
+    that can be dumped as json.
+    """
+    scenarios = {
+        "get_set": lambda cl: bench_get_set(cl, ops=ops, threads=threads),
+        "recursive_read": lambda cl: bench_recursive_read(cl, sizes=tree_sizes),
+        "json_codec": lambda cl: bench_json_codec(cl, sizes=tree_sizes),
+        "watch_latency": lambda cl: {
+            "long_poll": bench_watch_latency(cl, events=events),
+            "stream": bench_watch_latency(cl, events=events, stream=True),
+        },
+        "failover": lambda cl: bench_failover(cl, repeat=repeat),
+        "partial_outage": lambda cl: bench_partial_outage(cl, ops=ops),
+        "leader_writes": lambda cl: bench_leader_writes(cl, ops=ops),
+        "hedged_read": lambda cl: bench_hedged_read(cl, ops=ops),
+    }
+
+    if names is None:
+        names = list(scenarios)
+
+    for name in names:
+        if name not in scenarios:
+            raise ValueError("unknown scenario {name}, choose from {names}".format(name=name, names=list(scenarios)))
+
+    rst = {
+        "k3etcd": k3etcd.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": int(time.time()),
+        "scenarios": {},
+    }
+
+    for name in names:
+        with FakeEtcdCluster(size=3) as cluster:
+            rst["scenarios"][name] = scenarios[name](cluster)
+
+    return rst
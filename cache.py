@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections
+import copy
+import logging
+import threading
+import time
+
+from .client import (
+    EcodeKeyNotFound,
+    EtcdException,
+    EtcdReadTimeoutError,
+    EtcdWatchError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ReadCache(object):
+    """
+    A local cache in front of `etcd.Client.read` for keys under a prefix.
+
+    A background thread keeps one recursive watch on the prefix and drops
+    cached entries as soon as an event about them arrives, so a cached
+    value is never older than the last event received.
+    Entries are ordered by `etcd_index`: a read result is cached only if
+    it is not older than the last event applied, and an event drops only
+    entries read before it.
+
+    Reads with options such as `recursive`, `wait` or `quorum`, and keys
+    out of the prefix, are sent to the cluster.
+
+    ##  etcd.ReadCache.max_size
+
+    Type is `int`, max number of cached keys, least recently used keys are
+    evicted first.
+
+    ##  etcd.ReadCache.ttl
+
+    Type is `int` or `float`, seconds a cached entry is used.
+    If `None`, entries are kept until they are changed or evicted.
+
+    ##  etcd.ReadCache.stale_while_revalidate
+
+    Type is `bool`. If `True`, an entry older than `ttl` is still returned
+    while it is refreshed in background.
+
+    ##  etcd.ReadCache.hits
+
+    Type is `int`, number of reads served from the cache.
+
+    ##  etcd.ReadCache.misses
+
+    Type is `int`, number of reads sent to the cluster.
+    """
+
+    def __init__(self, client, prefix="/", max_size=1024, ttl=None, stale_while_revalidate=False, watch_timeout=10):
+        """
+        Create the cache and start watching `prefix`.
+        :param client: a `etcd.Client` object.
+        :param prefix: dir to cache. Defaults to `/`.
+        :param max_size: max number of cached keys. Defaults to `1024`.
+        :param ttl: seconds a cached entry is used. Defaults to `None`.
+        :param stale_while_revalidate: return expired entries while refreshing them.
+        Defaults to `False`.
+        :param watch_timeout: seconds of each long-poll request of the background watch.
+        Defaults to `10`.
+        """
+        self.client = client
+        self.prefix = client._sanitize_key(prefix).rstrip("/") + "/"
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.watch_timeout = watch_timeout
+
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (EtcdKeysResult, time cached)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # etcd index of the last event applied. None when the watch is not
+        # established, nothing is cached then.
+        self._applied_index = None
+        self._refreshing = set()
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._watch_loop, name="etcd-read-cache")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _cacheable(self, key, argkv):
+        if len(argkv) > 0:
+            return False
+
+        return key.startswith(self.prefix) or key == self.prefix.rstrip("/")
+
+    def read(self, key, **argkv):
+        """
+        Get the value with `key`, from the cache if possible.
+        See `etcd.Client.read`.
+        :return: A `etcd.EtcdKeysResult` object.
+        """
+        key = self.client._sanitize_key(key)
+        if not self._cacheable(key, argkv):
+            return self.client.read(key, **argkv)
+
+        now = time.time()
+        with self._lock:
+            ent = self._entries.get(key)
+            if ent is not None:
+                res, cached_at = ent
+                if self.ttl is None or now - cached_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.copy(res)
+
+                if self.stale_while_revalidate:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self._revalidate(key)
+                    return copy.copy(res)
+
+                del self._entries[key]
+
+            self.misses += 1
+
+        res = self.client.read(key)
+        self._put(key, res)
+        return copy.copy(res)
+
+    get = read
+
+    def _put(self, key, res):
+        with self._lock:
+            # a read older than the applied events may miss an invalidation
+            if self._applied_index is None or res.etcd_index < self._applied_index:
+                return
+
+            self._entries[key] = (res, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _revalidate(self, key):
+        # called with self._lock held
+        if key in self._refreshing:
+            return
+
+        self._refreshing.add(key)
+        th = threading.Thread(target=self._refresh, args=(key,))
+        th.daemon = True
+        th.start()
+
+    def _refresh(self, key):
+        try:
+            self._put(key, self.client.read(key))
+        except EcodeKeyNotFound:
+            self.invalidate(key)
+        except EtcdException as e:
+            logger.info("{err} while refresh cached {key}".format(err=repr(e), key=key))
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key=None):
+        """
+        Drop cached entries.
+        :param key: drop only `key`, its parent dirs and the keys in it.
+        If `None`, drop all entries. Defaults to `None`.
+        :return: nothing
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._invalidate(self.client._sanitize_key(key), None, True)
+
+    def _invalidate(self, key, index, is_dir):
+        # called with self._lock held. Drop the key, the dirs listing it and
+        # the keys in it if it is a dir.
+        keys = [key]
+        parent = key
+        while parent != "/" and parent != "":
+            parent = parent.rsplit("/", 1)[0] or "/"
+            keys.append(parent)
+
+        if is_dir:
+            sub = key.rstrip("/") + "/"
+            keys.extend([k for k in self._entries if k.startswith(sub)])
+
+        for k in keys:
+            ent = self._entries.get(k)
+            if ent is None:
+                continue
+
+            if index is None or ent[0].etcd_index < index:
+                del self._entries[k]
+
+    def _reset(self):
+        # start watching from the current index, and drop everything that
+        # may have changed while not watching.
+        res = self.client.read("/")
+        with self._lock:
+            self._entries.clear()
+            self._applied_index = res.etcd_index
+
+        return res.etcd_index + 1
+
+    def _watch_loop(self):
+        waitindex = None
+        while not self._stopped.is_set():
+            try:
+                if waitindex is None:
+                    waitindex = self._reset()
+
+                ev = self.client._watch(self.prefix, waitindex, timeout=self.watch_timeout, recursive=True)
+            except EtcdReadTimeoutError:
+                continue
+            except EtcdWatchError as e:
+                logger.info("{err} while watch {p}, reload".format(err=repr(e), p=self.prefix))
+                waitindex = None
+                continue
+            except EtcdException as e:
+                logger.info("{err} while watch {p}, retry".format(err=repr(e), p=self.prefix))
+                with self._lock:
+                    self._applied_index = None
+                    self._entries.clear()
+                waitindex = None
+                self._stopped.wait(1)
+                continue
+
+            index = ev.modifiedIndex
+            with self._lock:
+                if self._applied_index is None:
+                    # closed
+                    return
+
+                self._invalidate(ev.key, index, ev.dir)
+                self._applied_index = max(self._applied_index, index)
+
+            waitindex = index + 1
+
+    def close(self):
+        """
+        Stop the background watch and drop all entries.
+        The background watch stops when its current long-poll request returns.
+        :return: nothing
+        """
+        self._stopped.set()
+        with self._lock:
+            self._applied_index = None
+            self._entries.clear()
@@ -4,13 +4,25 @@
 import http.client
 import logging
 import socket
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import base64
+import collections
+import concurrent.futures
+import copy
+import itertools
 import k3http
-import k3utfjson
+
+from . import nodestream
+from .codec import JsonCodec, get_codec
+from .pool import ConnectionPool, HttpConnection
+from .hedge import ReadHedger
+from .membership import Membership
+from .retry import RetryPolicy
+from .selector import EndpointSelector
 
 logger = logging.getLogger(__name__)
 
@@ -247,6 +259,9 @@ def list_type(x):
     return False
 
 
+_default_codec = JsonCodec()
+
+
 class EtcdError(object):
     error_exceptions = {
         100: EcodeKeyNotFound,
@@ -273,8 +288,10 @@ class EtcdError(object):
     }
 
     @classmethod
-    def handle(cls, response):
+    def handle(cls, response, codec=None):
         body = response.data
+        if codec is None:
+            codec = _default_codec
 
         e = {}
         e["status"] = response.status
@@ -282,10 +299,11 @@ class EtcdError(object):
         e["response"] = body
 
         try:
-            r = k3utfjson.load(body)
+            r = codec.loads(body)
         except ValueError:
             r = {"message": "response body is not json", "cause": str(body)}
         ecode = r.get("errorCode")
+        e["errorCode"] = ecode
         default_exc = EtcdException
         if response.status == 404:
             ecode = 100
@@ -305,9 +323,39 @@ class EtcdError(object):
         raise exc(e)
 
 
+def _node_property(name, default):
+    # read a field from the raw node dict only when it is accessed. The dict
+    # may be shared with copies and with the response of a parent dir, it is
+    # copied before being changed.
+    def _get(self):
+        return self._node.get(name, default)
+
+    def _set(self, value):
+        node = dict(self._node)
+        node[name] = value
+        self._node = node
+
+    return property(_get, _set)
+
+
 class EtcdKeysResult(object):
     """
-    `etcd.EtcdKeysResult.expiration`
+    The attributes of the node are read from the decoded response only when
+    they are accessed, and the child nodes of a dir are converted to
+    `etcd.EtcdKeysResult` only when they are iterated. The object has
+    `__slots__`, other attributes can not be set on it.
+
+    ##  etcd.EtcdKeysResult.key
+
+    Type is `str`, the key of the node.
+
+    ##  etcd.EtcdKeysResult.value
+
+    Type is `str`, the value of the node. `None` for a dir.
+
+    ##  etcd.EtcdKeysResult.expiration
+
+    Type is `str`, the current node expire time. Defaults to `None`.
 
     Type is `str`, the current node expire time. Defaults to `None`.
 
@@ -353,20 +401,23 @@ class EtcdKeysResult(object):
         "dir": False,
     }
 
+    __slots__ = ("action", "_node", "_prev", "etcd_index", "raft_index", "raft_term")
+
+    key = _node_property("key", None)
+    value = _node_property("value", None)
+    expiration = _node_property("expiration", None)
+    ttl = _node_property("ttl", None)
+    modifiedIndex = _node_property("modifiedIndex", None)
+    createdIndex = _node_property("createdIndex", None)
+    newKey = _node_property("newKey", False)
+    dir = _node_property("dir", False)
+
     def __init__(self, action=None, node=None, prevNode=None, **argkv):
         self.action = action
-        for key, default in self._node_props.items():
-            if node is not None and key in node:
-                setattr(self, key, node[key])
-            else:
-                setattr(self, key, default)
-
-        self._children = []
-        if self.dir and "nodes" in node:
-            self._children = node["nodes"]
+        self._node = node if node is not None else {}
+        self._prev = prevNode or None
 
         if prevNode:
-            self._prev_node = EtcdKeysResult(None, node=prevNode)
             """
             #fix this bug
             r = c.write('/foo', None, dir=True, ttl=50)
@@ -374,9 +425,22 @@ class EtcdKeysResult(object):
             r2 = c.write('/foo', None, dir=True, ttl=120, prevExist=True)
             print(r2.dir) #False
             """
-            if self._prev_node.dir and not self.dir:
+            if prevNode.get("dir") and not self.dir:
                 self.dir = True
 
+    @property
+    def _children(self):
+        # the raw child nodes of a dir
+        if self.dir:
+            return self._node.get("nodes") or []
+        return []
+
+    @property
+    def _prev_node(self):
+        if self._prev is None:
+            raise AttributeError("_prev_node")
+        return EtcdKeysResult(None, node=self._prev)
+
     def parse_response(self, response):
         if response.status == http.client.CREATED:
             self.newKey = True
@@ -394,19 +458,111 @@ class EtcdKeysResult(object):
 
         :return: It is an iterator. Each element is a `etcd.EtcdKeysResult` object.
         """
-        if not self._children:
+        return self.walk(leaves_only=leaves_only)
+
+    def walk(self, leaves_only=False, order="dfs", key_filter=None):
+        """
+        Iterate the nodes of the subtree with an explicit stack, without
+        recursion, so that the depth of the tree does not matter.
+        A node without children, a value or an empty dir, is a leaf.
+        :param leaves_only: If `True`, only leaves are returned.
+        Defaults to `False`.
+        :param order: `"dfs"` for depth first, parents before their children,
+        the order of `get_subtree`. `"bfs"` for breadth first, level by level.
+        Defaults to `"dfs"`.
+        :param key_filter: a callable that receives the key of a node below
+        this one. If it returns `False`, the node and all the nodes in it are
+        skipped without being converted. Defaults to `None`.
+        :return: It is an iterator. Each element is a `etcd.EtcdKeysResult` object.
+        """
+        if order not in ("dfs", "bfs"):
+            raise ValueError("order must be dfs or bfs, not {o}".format(o=order))
+
+        children = self._children
+        if not children:
             yield self
             return
 
         if not leaves_only:
             yield self
 
-        for n in self._children:
-            node = EtcdKeysResult(None, n)
-            for child in node.get_subtree(leaves_only=leaves_only):
-                yield child
+        # raw node dicts, converted only when they are yielded
+        if order == "dfs":
+            stack = list(reversed(children))
+            pop = stack.pop
+        else:
+            stack = collections.deque(children)
+            pop = stack.popleft
+
+        while stack:
+            n = pop()
+            if key_filter is not None and not key_filter(n.get("key")):
+                continue
+
+            sub = n.get("nodes") if n.get("dir") else None
+            if not sub:
+                yield EtcdKeysResult(None, n)
+                continue
+
+            if not leaves_only:
+                yield EtcdKeysResult(None, n)
+
+            if order == "dfs":
+                stack.extend(reversed(sub))
+            else:
+                stack.extend(sub)
+
+    def to_flat_map(self, dirs=False, key_filter=None):
+        """
+        Export the values in the subtree as a flat `dict` of key to value,
+        without creating a `etcd.EtcdKeysResult` for each node.
+        :param dirs: If `True`, the dirs below this node are included too, with
+        value `None`. Defaults to `False`.
+        :param key_filter: See `key_filter` in `etcd.EtcdKeysResult.walk`.
+        :return: A `dict`.
+        """
+        rst = {}
+        stack = [self._node]
+        while stack:
+            n = stack.pop()
+            key = n.get("key")
+            if not n.get("dir"):
+                rst[key] = n.get("value")
+                continue
+
+            if dirs and n is not self._node:
+                rst[key] = None
 
-        return
+            for c in n.get("nodes") or ():
+                if key_filter is None or key_filter(c.get("key")):
+                    stack.append(c)
+
+        return rst
+
+    def to_dict(self, key_filter=None):
+        """
+        Export the nodes in this dir as nested `dict`: each dir is a `dict`
+        of the last part of its keys to a value or to a `dict` for a sub dir.
+        :param key_filter: See `key_filter` in `etcd.EtcdKeysResult.walk`.
+        :return: A `dict`, for example `{"a": "1", "sub": {"b": "2"}}`.
+        """
+        rst = {}
+        stack = [(self._children, rst)]
+        while stack:
+            nodes, target = stack.pop()
+            for n in nodes:
+                key = n.get("key")
+                if key_filter is not None and not key_filter(key):
+                    continue
+
+                name = key.rstrip("/").rsplit("/", 1)[-1]
+                if n.get("dir"):
+                    target[name] = {}
+                    stack.append((n.get("nodes") or [], target[name]))
+                else:
+                    target[name] = n.get("value")
+
+        return rst
 
     @property
     def leaves(self):
@@ -443,19 +599,75 @@ class EtcdKeysResult(object):
         """
         Convert the object to a string and return it.
         """
-        return "%s(%r)" % (self.__class__, self.__dict__)
+        attrs = {"action": self.action}
+        for k in self._node_props:
+            attrs[k] = getattr(self, k)
+        for k in ("etcd_index", "raft_index", "raft_term"):
+            if hasattr(self, k):
+                attrs[k] = getattr(self, k)
+
+        return "%s(%r)" % (self.__class__, attrs)
+
+
+class EtcdBatchResult(object):
+    """
+    The report of `etcd.Client.write_many` or `etcd.Client.delete_many`.
+
+    ##  etcd.EtcdBatchResult.items
+
+    Type is `list`, the items of the batch, in the given order.
+
+    ##  etcd.EtcdBatchResult.results
+
+    Type is `list`, one element for each item, in the same order:
+    a `etcd.EtcdKeysResult` object if the item succeeded, or the exception
+    such as `etcd.EcodeTestFailed` raised by it.
+    """
+
+    def __init__(self, items, results):
+        self.items = items
+        self.results = results
+
+    @property
+    def ok(self):
+        """
+        `True` if all items succeeded.
+        """
+        return len(self.failed) == 0
+
+    @property
+    def succeeded(self):
+        """
+        A `list` of `(item, etcd.EtcdKeysResult)` of the succeeded items.
+        """
+        return [(i, r) for i, r in zip(self.items, self.results) if not isinstance(r, Exception)]
+
+    @property
+    def failed(self):
+        """
+        A `list` of `(item, exception)` of the failed items.
+        """
+        return [(i, r) for i, r in zip(self.items, self.results) if isinstance(r, Exception)]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return "%s(items=%d, failed=%d)" % (self.__class__.__name__, len(self.items), len(self.failed))
 
 
 class Response(object):
     REDIRECT_STATUSES = (301, 302, 303, 307, 308)
 
-    def __init__(self, conn=None, status=0, version=0, reason=None, headers=None, body=""):
+    def __init__(self, conn=None, status=0, version=0, reason=None, headers=None, body="", reused=False):
         self._conn = conn
         self.status = status
         self.version = version
         self.reason = reason
         self.headers = headers
         self._body = body
+        # received over a connection that served a previous request
+        self.reused = reused
 
     @property
     def data(self):
@@ -476,7 +688,56 @@ class Response(object):
 
     @classmethod
     def from_http(Cls, h, **argkv):
-        return Cls(h, status=h.status, headers=h.headers, body=h.read_body(None), **argkv)
+        return Cls(
+            h, status=h.status, headers=h.headers, body=h.read_body(None), reused=getattr(h, "reused", False), **argkv
+        )
+
+
+class _Cancel(object):
+    # cancel a request from another thread by shutting its socket down.
+
+    def __init__(self):
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def attach(self, h):
+        with self._lock:
+            self._conn = h
+        self.check()
+
+    def detach(self):
+        # the connection is not shut down once it is back in the pool
+        with self._lock:
+            self._conn = None
+
+    def check(self):
+        if self.cancelled:
+            raise socket.error("request cancelled")
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            h = self._conn
+            if h is None or h.sock is None:
+                return
+
+            try:
+                h.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _Flight(object):
+    # a read in flight, whose result is shared by the identical reads made
+    # before it finishes.
+
+    def __init__(self, deadline):
+        self.done = threading.Event()
+        # when the read in flight gives up, None if it does not
+        self.deadline = deadline
+        self.result = None
+        self.error = None
 
 
 class Client(object):
@@ -488,6 +749,12 @@ class Client(object):
     _write_conditions = {"prevValue", "prevIndex", "prevExist"}
     _read_options = {"recursive", "wait", "waitIndex", "sorted", "quorum"}
     _del_conditions = {"prevValue", "prevIndex"}
+    _idempotent_methods = {_MGET}
+
+    _read_policies = ("nearest", "round_robin_followers", "leader_only", "quorum")
+
+    # max threads sending hedged reads at the same time
+    _hedge_workers = 32
     """
     ##  etcd.Client.base_uri
     
@@ -517,11 +784,67 @@ class Client(object):
 
     Type is `bool`, allow the client to connect other nodes.
     Defaults to `True`.
+
+    ##  etcd.Client.json_codec
+
+    A `etcd.JsonCodec` object, the json library used for request and
+    response bodies.
+
+    ##  etcd.Client.leader_uri
+
+    Type is `str`, the client url of the leader learnt from `etcd.Client.leader`
+    or from a redirected write, or `None` if it is not known. Writes and quorum
+    reads are sent to it first.
+
+    ##  etcd.Client.read_policy
+
+    Type is `str`, the members reads are sent to:
+
+    -   `nearest`: the one chosen by `endpoint_selector`, by latency and health.
+    -   `round_robin_followers`: the followers in turn.
+    -   `leader_only`: the leader.
+    -   `quorum`: the leader, and reads are quorum reads unless `quorum=False`
+        is passed.
+
+    Writes and quorum reads are always sent to the leader.
+
+    ##  etcd.Client.endpoint_selector
+
+    A `etcd.EndpointSelector` object, it chooses the member each request is
+    sent to by the health of the members. It keeps a circuit breaker for each
+    member, whose states are in `etcd.EndpointSelector.stats`.
+
+    ##  etcd.Client.read_hedger
+
+    A `etcd.ReadHedger` object, it decides when a read made with `hedge=True`
+    is sent again to another member.
     
+    ##  etcd.Client.retry_policy
+
+    A `etcd.RetryPolicy` object, it decides whether and when a request that
+    failed on all members is sent again.
+
+    ##  etcd.Client.coalesce_reads
+
+    Type is `bool`, identical reads made at the same time share one request
+    if it is `True`.
+
+    ##  etcd.Client.membership
+
+    A `etcd.Membership` object that keeps the members to send requests to up
+    to date in background, or `None` if `allow_reconnect` is `False`.
+
+    ##  etcd.Client.metadata_ttl
+
+    Type is `int`, seconds `etcd.Client.members` and `etcd.Client.leader`,
+    and the properties built from them, are cached. `0` disables the cache.
+
     ##  etcd.Client.machines
     
     Members of the cluster.
     Type is `list`, like `['http://127.0.0.1:4001', 'http://127.0.0.1:4002']`.
+    It is fetched from the cluster unless `etcd.Client.membership` has been
+    refreshed in the last `etcd.Membership.ttl` seconds.
     
     ##  etcd.Client.members
     
@@ -619,41 +942,68 @@ class Client(object):
         protocol="http",
         allow_reconnect=True,
         basic_auth_account=None,
+        conn_pool=None,
+        json_codec=None,
+        endpoint_selector=None,
+        read_policy="nearest",
+        read_hedger=None,
+        coalesce_reads=True,
+        retry_policy=None,
+        membership=None,
+        membership_interval=30,
+        metadata_ttl=5,
     ):
         """
         Etcd client class.
+        A client can be shared by several threads.
         :param host: Mixed, if a `str`, it is the IP to connect to.
         If a `tuple` or `list`, like `((ip, port), (ip, port))`.
         Defaults to `127.0.0.1`.
         :param port: Type is `int`, the port used to connect to etcd server.
         Defaults to `2379`.
         :param version_prefix: Type is `str`, url or version prefix in etcd url. Defaults to `v2`.
-        :param read_timeout: Type is `int`, max seconds to wait for a request. Defaults to `10`.
+        :param read_timeout: Type is `int`, max seconds a request takes, including trying other members,
+        following redirects and retrying. Defaults to `10`.
         :param allow_redirect: Type is `bool`, allow the client to connect other nodes. Defaults to `True`.
         :param protocol: Type is `str`, right now only support http. Defaults to `http`.
         :param allow_reconnect: Type is `bool`, allow the client to reconnect to another etcd server
         in the cluster in the case the default one does not respond. Defaults to `True`.
         :param basic_auth_account: Type is `str`, the authorization information. Defaults to `None`.
-        """
-        self._protocol = protocol
-        if protocol == "https":
-            raise EtcdSSLError("not supported https right now")
-
-        self._machines_cache = []
-        if not list_type(host):
-            self._host = host
-            self._port = int(port)
-            self._base_uri = "%s://%s:%d" % (self._protocol, self._host, self._port)
-        else:
-            for h in host:
-                if list_type(h):
-                    _h, _p = (list(h) + [int(port)])[:2]
-                else:
-                    _h, _p = h, int(port)
-                self._machines_cache.append("%s://%s:%d" % (self._protocol, _h, _p))
+        :param conn_pool: A `etcd.ConnectionPool` object that keeps idle keep-alive connections
+        to the cluster, it can be shared by several clients.
+        If `None`, the client creates its own one. Defaults to `None`.
+        :param json_codec: the json library to decode responses and encode request
+        bodies with: `json`, `k3utfjson`, `orjson`, `ujson`, or a `etcd.JsonCodec` object.
+        If `None`, the fastest installed one is used. Defaults to `None`.
+        :param endpoint_selector: A `etcd.EndpointSelector` object that tracks the health
+        of the members and chooses the one to send each request to, it can be shared by
+        several clients. If `None`, the client creates its own one. Defaults to `None`.
+        :param read_policy: the members reads are sent to: `nearest`, `round_robin_followers`,
+        `leader_only` or `quorum`. See `etcd.Client.read_policy`. Defaults to `nearest`.
+        :param read_hedger: A `etcd.ReadHedger` object that decides when a read made with
+        `hedge=True` is sent again to another member, it can be shared by several clients.
+        If `None`, the client creates its own one. Defaults to `None`.
+        :param coalesce_reads: Type is `bool`. If `True`, a `etcd.Client.read` made while an
+        identical one, with the same key and options, is in flight does not send a request but
+        takes the result of the one in flight. Defaults to `True`.
+        :param retry_policy: A `etcd.RetryPolicy` object that decides whether and when a
+        request that failed on all members is sent again, it can be shared by several clients
+        to bound their retries together. If `None`, the client creates its own one.
+        Defaults to `None`.
+        :param membership: A `etcd.Membership` object that refreshes the members in background.
+        If `None`, the one shared by the clients created with the same `host`, `port` and
+        `version_prefix` is used. Defaults to `None`.
+        :param membership_interval: Type is `int`, seconds between two refreshes of the members,
+        used if the shared `etcd.Membership` is created. Defaults to `30`.
+        :param metadata_ttl: Type is `int`, seconds `etcd.Client.members` and `etcd.Client.leader`
+        are cached, `0` disables the cache. See `etcd.Client.invalidate_metadata`. Defaults to `5`.
+        """
+        if read_policy not in self._read_policies:
+            raise ValueError(
+                "unknown read_policy {p}, choose from {ps}".format(p=read_policy, ps=list(self._read_policies))
+            )
 
-            self._base_uri = self._machines_cache.pop(0)
-            _, self._host, self._port = self._extract_base_uri()
+        base_uri, machines = self._init_endpoints(host, port, protocol)
 
         self.version_prefix = version_prefix
         self._keys_path = self.version_prefix + "/keys"
@@ -665,14 +1015,114 @@ class Client(object):
         self._allow_redirect = allow_redirect
         self._allow_reconnect = allow_reconnect
         self.basic_auth_account = basic_auth_account
-
+        self.json_codec = get_codec(json_codec)
+        self.read_policy = read_policy
+        self._leader_uri = None
+        # do not look for the leader again until then if it is not found
+        self._leader_retry_at = 0
+        self._read_turn = itertools.count()
+
+        self.metadata_ttl = metadata_ttl
+        # name -> (value, monotonic time it expires at)
+        self._metadata = {}
+
+        if conn_pool is None:
+            conn_pool = ConnectionPool()
+        self._conn_pool = conn_pool
+
+        if endpoint_selector is None:
+            endpoint_selector = EndpointSelector()
+        self.endpoint_selector = endpoint_selector
+
+        if read_hedger is None:
+            read_hedger = ReadHedger()
+        self.read_hedger = read_hedger
+        # threads sending hedged reads, created by the first one
+        self._hedge_pool = None
+
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+
+        self.coalesce_reads = coalesce_reads
+        # (path, params) -> _Flight of the read in flight
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+        # the members are not fetched here but by membership in background,
+        # they are taken by the first request after it changes them.
+        self._membership_version = None
         if self._allow_reconnect:
-            if len(self._machines_cache) <= 0:
-                self._machines_cache = self.machines
-            if self._base_uri in self._machines_cache:
-                self._machines_cache.remove(self._base_uri)
+            if membership is None:
+                membership = Membership.shared(
+                    [base_uri] + machines,
+                    version_prefix=version_prefix,
+                    interval=membership_interval,
+                    conn_pool=self._conn_pool,
+                )
+            membership.start()
+        else:
+            membership = None
+            self._set_endpoints(base_uri, [])
+        self.membership = membership
+
+    def _init_endpoints(self, host, port, protocol):
+        if protocol == "https":
+            raise EtcdSSLError("not supported https right now")
+
+        # The current server and the other machines are shared by all threads
+        # using this client. They are kept in one tuple in _endpoint, which is
+        # only replaced as a whole, so a reader always sees a consistent
+        # (base_uri, protocol, host, port, machines). Compare-and-replace is
+        # done under _lock.
+        self._lock = threading.Lock()
+        machines = []
+        if not list_type(host):
+            base_uri = "%s://%s:%d" % (protocol, host, int(port))
         else:
-            self._machines_cache = []
+            for h in host:
+                if list_type(h):
+                    _h, _p = (list(h) + [int(port)])[:2]
+                else:
+                    _h, _p = h, int(port)
+                machines.append("%s://%s:%d" % (protocol, _h, _p))
+
+            base_uri = machines.pop(0)
+
+        self._set_endpoints(base_uri, machines)
+        return base_uri, machines
+
+    def close(self):
+        """
+        Close idle connections kept by the client.
+        :return: nothing
+        """
+        with self._lock:
+            pool, self._hedge_pool = self._hedge_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+        self._conn_pool.clear()
+
+    @property
+    def _base_uri(self):
+        return self._endpoint[0]
+
+    @property
+    def _protocol(self):
+        return self._endpoint[1]
+
+    @property
+    def _host(self):
+        return self._endpoint[2]
+
+    @property
+    def _port(self):
+        return self._endpoint[3]
+
+    @property
+    def _machines_cache(self):
+        return self._endpoint[4]
 
     @property
     def base_uri(self):
@@ -690,6 +1140,10 @@ class Client(object):
     def protocol(self):
         return self._protocol
 
+    @property
+    def leader_uri(self):
+        return self._leader_uri
+
     @property
     def read_timeout(self):
         return self._read_timeout
@@ -700,22 +1154,41 @@ class Client(object):
 
     @property
     def machines(self):
+        membership = self.membership
+        if membership is not None and membership.fresh():
+            return list(membership.members)
+
         res = self.api_execute(self.version_prefix + "/machines", self._MGET, need_refresh_machines=False)
+        machines = self._parse_machines(res)
+        if membership is not None:
+            membership.update(machines)
+        return machines
+
+    def _parse_machines(self, res):
+        data = res.data
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
 
-        nodes = res.data.split(",")
+        nodes = data.split(",")
 
         return [n.strip() for n in nodes]
 
     @property
     def members(self):
+        return self._cached("members", self._load_members)
+
+    def _load_members(self):
         res = self.api_execute(self._mem_path, self._MGET)
 
-        return k3utfjson.load(res.data)["members"]
+        return self.json_codec.loads(res.data)["members"]
 
     @property
     def leader(self):
+        return self._cached("leader", self._load_leader)
+
+    def _load_leader(self):
         res = self.api_execute(self._stats_path + "/self", self._MGET)
-        self_st = k3utfjson.load(res.data)
+        self_st = self.json_codec.loads(res.data)
 
         leader_id = self_st.get("leaderInfo", {}).get("leader")
         if leader_id is None:
@@ -726,13 +1199,44 @@ class Client(object):
             if mem["id"] != leader_id:
                 continue
 
+            if len(mem.get("clientURLs") or []) > 0:
+                self._set_leader(mem["clientURLs"][0])
+
             return mem.copy()
 
+    def _cached(self, name, load):
+        # the cached value of name, or load it if it has expired. A copy is
+        # returned so that callers can not change the cached one.
+        if self.metadata_ttl <= 0:
+            return load()
+
+        ent = self._metadata.get(name)
+        if ent is None or time.monotonic() >= ent[1]:
+            value = load()
+            ent = (value, time.monotonic() + self.metadata_ttl)
+            self._metadata[name] = ent
+
+        return copy.deepcopy(ent[0])
+
+    def invalidate_metadata(self, *names):
+        """
+        Drop the cached cluster metadata, so that it is fetched again by the
+        next access.
+        :param names: `members` or `leader`. If none is given, all are dropped.
+        :return: nothing
+        """
+        if len(names) == 0:
+            self._metadata = {}
+            return
+
+        for name in names:
+            self._metadata.pop(name, None)
+
     @property
     def version(self):
         res = self.api_execute("/version", self._MGET)
 
-        return k3utfjson.load(res.data)
+        return self.json_codec.loads(res.data)
 
     @property
     def st_leader(self):
@@ -740,18 +1244,32 @@ class Client(object):
         if leader is None:
             return None
 
-        leaderhosts = []
+        _, protocol, _, default_port, _ = self._endpoint
+
+        uris = []
         for url in leader["clientURLs"]:
-            if not url.startswith(self._protocol):
-                url = self._protocol + "://" + url
+            if not url.startswith(protocol):
+                url = protocol + "://" + url
             p = urllib.parse.urlparse(url)
-            if p.hostname == "127.0.0.1":
+            uris.append("{s}://{h}:{p}".format(s=protocol, h=p.hostname, p=p.port or default_port))
+
+        # the loopback url is reachable only on the leader host, try it last
+        uris.sort(key=lambda u: urllib.parse.urlparse(u).hostname == "127.0.0.1")
+
+        # only the leader has these stats, it is asked with the connections
+        # of this client instead of being failed over to another member.
+        path = self._stats_path + "/leader"
+        for uri in uris:
+            try:
+                res = self._request(uri + path, self._MGET, None, self.read_timeout or None, False)
+            except (socket.error, k3http.HttpError) as e:
+                logger.info("{err} while get leader stats from {uri}".format(err=repr(e), uri=uri))
                 continue
 
-            port = p.port or self.port
-            leaderhosts.append((p.hostname, port))
+            return self._to_dict(self._handle_server_response(res))
 
-        return Client(host=leaderhosts)._st("/leader")
+        self.invalidate_metadata("leader")
+        raise NoMoreMachineError("No leader to get stats from")
 
     @property
     def st_self(self):
@@ -777,6 +1295,67 @@ class Client(object):
     def peerurls(self):
         return sum([n["peerURLs"] for n in self.members], [])
 
+    def cluster_stats(self, timeout=None, concurrency=16):
+        """
+        Get `/stats/self`, `/stats/store` and `/version` of every member, with
+        all the requests sent at the same time.
+        :param timeout: max seconds to wait for the members. A member that does not respond
+        in time is reported with a `etcd.EtcdReadTimeoutError`, the others are not waited for.
+        If `None`, `etcd.Client.read_timeout` is used. Defaults to `None`.
+        :param concurrency: max number of requests sent at the same time. Defaults to `16`.
+        :return: A `dict` of the client url of each member, as in `etcd.Client.machines`, to a
+        `dict` of `self`, `store` and `version` to the `dict` the member responded, or to the
+        exception such as `etcd.EtcdReadTimeoutError` raised while getting it, like:
+
+        ```python
+        {
+            "http://127.0.0.1:2379": {
+                "self": {"name": "node_0", "state": "StateLeader", ...},
+                "store": {"getsSuccess": 10, ...},
+                "version": {"etcdserver": "2.3.8", "etcdcluster": "2.3.0"},
+            },
+            "http://127.0.0.1:2479": {
+                "self": EtcdReadTimeoutError(...),
+                ...
+            },
+        }
+        ```
+        """
+        uris = self.machines
+        # every member has the same time to respond
+        deadline = self._deadline(timeout)
+
+        stats = (
+            ("self", self._stats_path + "/self"),
+            ("store", self._stats_path + "/store"),
+            ("version", "/version"),
+        )
+
+        rst = {uri: {} for uri in uris}
+        tasks = [(uri, name, path) for uri in uris for name, path in stats]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(concurrency, len(tasks))) as pool:
+            futures = [(uri, name, pool.submit(self._member_stat, uri, path, deadline)) for uri, name, path in tasks]
+            for uri, name, fut in futures:
+                rst[uri][name] = fut.result()
+
+        return rst
+
+    def _member_stat(self, uri, path, deadline):
+        # the response of member `uri`, or the exception raised while getting it
+        try:
+            response = self._request(uri + path, self._MGET, None, None, False, deadline=deadline)
+            return self._to_dict(self._handle_server_response(response))
+        except socket.timeout as e:
+            err = EtcdReadTimeoutError(e)
+        except (socket.error, k3http.HttpError) as e:
+            err = EtcdException(e)
+        except EtcdException as e:
+            err = e
+
+        logger.info("{err} while get {path} from {uri}".format(err=repr(err), path=path, uri=uri))
+        return err
+
     def __contains__(self, key):
         try:
             self.get(key)
@@ -826,7 +1405,7 @@ class Client(object):
 
     def _to_keysresult(self, response):
         try:
-            res = k3utfjson.load(response.data)
+            res = self.json_codec.loads(response.data)
             r = EtcdKeysResult(**res)
             r.parse_response(response)
             return r
@@ -839,7 +1418,7 @@ class Client(object):
 
     def _to_dict(self, response):
         try:
-            return k3utfjson.load(response.data)
+            return self.json_codec.loads(response.data)
         except ValueError as e:
             logger.error(repr(e) + " while decode {data}".format(data=response.data))
             raise EtcdIncompleteRead("failed to decode %s" % response.data)
@@ -853,62 +1432,133 @@ class Client(object):
 
         logger.debug("invalid response status:{st} body:{body}".format(st=response.status, body=response.data))
 
-        EtcdError.handle(response)
+        EtcdError.handle(response, self.json_codec)
+
+    def _build_request(self, path, method, params, bodyinjson, basic_auth_account):
+        qs = {}
+        headers = {}
+        body = ""
+
+        if method in (self._MGET, self._MDELETE):
+            qs.update(params or {})
+            headers["Content-Length"] = 0
+
+        elif method in (self._MPUT, self._MPOST):
+            if bodyinjson:
+                if params is not None:
+                    body = self.json_codec.dumps(params)
+                headers.update({"Content-Type": "application/json", "Content-Length": len(body)})
+            else:
+                body = urllib.parse.urlencode(params or {})
+                headers.update({"Content-Type": "application/x-www-form-urlencoded", "Content-Length": len(body)})
+        else:
+            raise EtcdRequestError("HTTP method {method} not supported".format(method=method))
+
+        if len(qs) > 0:
+            if "?" in path:
+                path = path + "&" + urllib.parse.urlencode(qs)
+            else:
+                path = path + "?" + urllib.parse.urlencode(qs)
+
+        if basic_auth_account is None:
+            basic_auth_account = self.basic_auth_account
+
+        if basic_auth_account is not None:
+            auth = {
+                "Authorization": "Basic {ant}".format(
+                    ant=base64.b64encode(basic_auth_account.encode()).strip().decode()
+                ),
+            }
+            headers.update(auth)
+
+        return path, headers, body
 
-    def _request(self, url, method, params, timeout, bodyinjson):
+    def _to_leader(self, method, params):
+        # only the leader serves writes and quorum reads, the others redirect
+        # them to it or forward them.
+        return method != self._MGET or (params is not None and params.get("quorum") == "true")
+
+    def _set_leader(self, url):
+        p = urllib.parse.urlparse(url)
+        uri = "{s}://{h}:{p}".format(s=p.scheme, h=p.hostname, p=p.port or self.port)
+        if uri != self._leader_uri:
+            logger.info("leader is {uri}".format(uri=uri))
+            self._leader_uri = uri
+            self._metadata.pop("leader", None)
+
+    def _known_leader(self):
+        # the cached leader, or find it with etcd.Client.leader
+        if self._leader_uri is not None or time.time() < self._leader_retry_at:
+            return self._leader_uri
+
+        try:
+            self.leader
+        except EtcdException as e:
+            logger.info(repr(e) + " while find the leader")
+
+        if self._leader_uri is None:
+            self._leader_retry_at = time.time() + 1
+        return self._leader_uri
+
+    def _first_member(self, method, path, params, uris):
+        # the member a request is sent to first by the routing rules, or None
+        # to let endpoint_selector choose.
+        if len(uris) < 2:
+            return None
+
+        if self._to_leader(method, params):
+            return self._known_leader()
+
+        if not path.startswith(self._keys_path) or params is None or params.get("wait") == "true":
+            return None
+
+        if self.read_policy == "leader_only":
+            return self._known_leader()
+
+        if self.read_policy == "round_robin_followers":
+            leader = self._known_leader()
+            followers = [u for u in uris if u != leader] or uris
+            return followers[next(self._read_turn) % len(followers)]
+
+        return None
+
+    def _members_to_try(self, method, path, params):
+        self._sync_membership()
+        base_uri, machines = self._endpoints()
+        uris = [base_uri] + machines
+        first = self._first_member(method, path, params, uris)
+        return machines, self.endpoint_selector.order(uris, first=first)
+
+    def _read_argkv(self, argkv):
+        # the read policy tells whether a read is a quorum read unless asked
+        if self.read_policy == "quorum" and "quorum" not in argkv and not argkv.get("wait"):
+            argkv = dict(argkv, quorum=True)
+        return argkv
+
+    def _request(self, url, method, params, timeout, bodyinjson, basic_auth_account=None, cancel=None, deadline=None):
+        to_leader = self._to_leader(method, params)
+        waiting = params is not None and params.get("wait") == "true"
         while True:
             host, port, path = self._parse_url(url)
             if host is None or port is None or path is None:
                 raise EtcdException("url is invalid, {url}".format(url=url))
 
-            qs = {}
-            headers = {}
-            body = ""
+            if deadline is not None:
+                # a redirect does not get a new timeout
+                timeout = self._time_left(deadline, url)
 
+            path, headers, body = self._build_request(path, method, params, bodyinjson, basic_auth_account)
             if method in (self._MGET, self._MDELETE):
-                qs.update(params or {})
-
                 # use once, coz params is in location's query string
                 params = None
-                headers["Content-Length"] = 0
-
-            elif method in (self._MPUT, self._MPOST):
-                if bodyinjson:
-                    if params is not None:
-                        body = k3utfjson.dump(params)
-                    headers.update({"Content-Type": "application/json", "Content-Length": len(body)})
-                else:
-                    body = urllib.parse.urlencode(params or {})
-                    headers.update({"Content-Type": "application/x-www-form-urlencoded", "Content-Length": len(body)})
-            else:
-                raise EtcdRequestError("HTTP method {method} not supported".format(method=method))
-
-            if len(qs) > 0:
-                if "?" in path:
-                    path = path + "&" + urllib.parse.urlencode(qs)
-                else:
-                    path = path + "?" + urllib.parse.urlencode(qs)
-
-            if self.basic_auth_account is not None:
-                auth = {
-                    "Authorization": "Basic {ant}".format(
-                        ant=base64.b64encode(self.basic_auth_account.encode()).strip().decode()
-                    ),
-                }
-                headers.update(auth)
 
             logger.debug(
-                "connect -> {mtd} {url}{path} {timeout}".format(
-                    mtd=method, url=self._base_uri, path=path, timeout=timeout
+                "connect -> {mtd} {host}:{port}{path} {timeout}".format(
+                    mtd=method, host=host, port=port, path=path, timeout=timeout
                 )
             )
 
-            h = k3http.Client(host, port, timeout)
-            h.send_request(path, method, headers)
-            h.send_body(body)
-            h.read_response()
-
-            resp = Response.from_http(h)
+            resp = self._send_timed_request(host, port, path, method, headers, body, timeout, waiting, cancel)
 
             if not self.allow_redirect:
                 return resp
@@ -921,30 +1571,159 @@ class Client(object):
                 raise EtcdResponseError("location not found in {header}".format(header=resp.headers))
 
             logger.debug("redirect -> " + url)
+            if to_leader:
+                self._set_leader(url)
+
+    def _send_timed_request(self, host, port, path, method, headers, body, timeout, waiting, cancel=None):
+        # tell endpoint_selector how the member served it. A redirected
+        # request is counted for each member it is sent to.
+        uri = "http://{h}:{p}".format(h=host, p=port)
+        start = self.endpoint_selector.begin(uri)
+        if waiting:
+            # a watch takes as long as the next event, it is not a latency
+            start = None
+
+        ok = None
+        try:
+            resp = self._send_request(host, port, path, method, headers, body, timeout, cancel)
+            ok = resp.status < http.client.INTERNAL_SERVER_ERROR
+            if not resp.reused:
+                # the time taken to connect is not a latency of the member
+                start = None
+            return resp
+        except (socket.error, k3http.HttpError) as e:
+            # no event before timeout is not a failure of a watch, and a
+            # cancelled request is not a failure of the member.
+            if not (waiting and isinstance(e, socket.timeout)) and not (cancel is not None and cancel.cancelled):
+                ok = False
+            raise
+        finally:
+            self.endpoint_selector.done(uri, start, ok)
+
+    def _send_request(self, host, port, path, method, headers, body, timeout, cancel=None):
+        h = self._conn_pool.acquire(host, port, timeout)
+        try:
+            if cancel is not None:
+                cancel.attach(h)
+
+            sent = False
+            try:
+                h.send_request(path, method, headers)
+                h.send_body(body)
+                sent = True
+                if cancel is not None:
+                    # it may be cancelled before the socket is connected
+                    cancel.check()
+                h.read_response()
+            except (socket.error, k3http.HttpError) as e:
+                # An idle pooled socket may have been closed by the server.
+                # Send again with a new connection only if the server can not
+                # have handled it: it failed while sending, or it is idempotent.
+                if not h.reused or h.status is not None or isinstance(e, socket.timeout):
+                    raise
+
+                if cancel is not None and cancel.cancelled:
+                    raise
+
+                if sent and method not in self._idempotent_methods:
+                    raise
+
+                logger.debug("{err} on reused connection to {h}:{p}, reconnect".format(err=repr(e), h=host, p=port))
+                h.close()
+                h.send_request(path, method, headers)
+                h.send_body(body)
+                h.read_response()
+
+            resp = Response.from_http(h)
+        except BaseException:
+            if cancel is not None:
+                cancel.detach()
+            h.close()
+            raise
+
+        if cancel is not None:
+            cancel.detach()
+        self._conn_pool.release(h)
+        return resp
+
+    def _endpoints(self):
+        endpoint = self._endpoint
+        return endpoint[0], endpoint[4]
+
+    def _set_endpoints(self, base_uri, machines):
+        p = urllib.parse.urlparse(base_uri)
+        self._endpoint = (base_uri, p.scheme, p.hostname, p.port, machines)
+
+    def _sync_membership(self):
+        # take the members from membership if they changed since last time
+        membership = self.membership
+        if membership is None or membership.version == self._membership_version:
+            return
+
+        with self._lock:
+            version, members = membership.version, membership.members
+            if version == self._membership_version:
+                return
+            self._membership_version = version
+
+            base_uri, _machines = self._endpoints()
+            if base_uri not in members:
+                base_uri = members[0]
+            self._set_endpoints(base_uri, [m for m in members if m != base_uri])
+
+    def _rotate(self, failed_uri):
+        # move to the next machine unless another thread already did it.
+        with self._lock:
+            base_uri, machines = self._endpoints()
+            if base_uri != failed_uri or len(machines) == 0:
+                return base_uri
+
+            self._set_endpoints(machines[0], machines[1:] + [failed_uri])
+            return machines[0]
 
     def _api_execute_with_retry(
-        self, path, method, params=None, timeout=None, bodyinjson=False, raise_read_timeout=False, **request_kw
+        self,
+        path,
+        method,
+        params=None,
+        timeout=None,
+        bodyinjson=False,
+        raise_read_timeout=False,
+        basic_auth_account=None,
+        deadline=None,
+        **request_kw,
     ):
         # including _base_uri, there are len(_machines_cache) + 1 hosts to try
-        # to connect to.
-        for i in range(len(self._machines_cache) + 1):
-            url = self._base_uri + path
+        # to connect to, healthy ones first.
+        machines, uris = self._members_to_try(method, path, params)
+        for uri in uris:
+            url = uri + path
 
             try:
-                response = self._request(url, method, params, timeout, bodyinjson)
+                response = self._request(
+                    url, method, params, timeout, bodyinjson, basic_auth_account, deadline=deadline
+                )
                 break
+            except EtcdReadTimeoutError:
+                # it may have been given up before being sent
+                self.endpoint_selector.release(uri)
+                raise
             except (socket.error, k3http.HttpError) as e:
-                if raise_read_timeout and isinstance(e, socket.timeout):
+                # no time is left to try the others
+                if isinstance(e, socket.timeout) and (
+                    raise_read_timeout or (deadline is not None and time.monotonic() >= deadline)
+                ):
                     raise EtcdReadTimeoutError(e)
 
-                if len(self._machines_cache) > 0:
-                    self._machines_cache.append(self._base_uri)
-                    self._base_uri = self._machines_cache.pop(0)
-                    self._protocol, self._host, self._port = self._extract_base_uri()
+                if uri == self._leader_uri:
+                    # learn the new one from the next redirect
+                    self._leader_uri = None
+                    self._metadata.pop("leader", None)
+
+                if len(machines) > 0:
+                    nxt = self._rotate(uri)
 
-                    logger.info(
-                        "{err} while connect {cur}, try connect {nxt}".format(err=repr(e), cur=url, nxt=self._base_uri)
-                    )
+                    logger.info("{err} while connect {cur}, try connect {nxt}".format(err=repr(e), cur=url, nxt=nxt))
 
                 else:
                     logger.info("no more host to retry")
@@ -967,6 +1746,7 @@ class Client(object):
         bodyinjson=False,
         raise_read_timeout=False,
         need_refresh_machines=True,
+        basic_auth_account=None,
         **request_kw,
     ):
         if timeout is None:
@@ -977,7 +1757,17 @@ class Client(object):
         if not path.startswith("/"):
             raise ValueError("Path does not start with /")
 
-        for i in range(0, 2):
+        # shared by the members tried, the redirects and the retries
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        policy = self.retry_policy
+        policy.begin()
+
+        attempt = 0
+        while True:
+            attempt += 1
             try:
                 return self._api_execute_with_retry(
                     path,
@@ -986,24 +1776,47 @@ class Client(object):
                     timeout=timeout,
                     bodyinjson=bodyinjson,
                     raise_read_timeout=raise_read_timeout,
+                    basic_auth_account=basic_auth_account,
+                    deadline=deadline,
                     **request_kw,
                 )
 
             except NoMoreMachineError as e:
                 logger.info(repr(e) + " while send_request path:{path}, method:{mtd}".format(path=path, mtd=method))
 
-                if i == 1 or not need_refresh_machines or not self._allow_reconnect:
-                    raise
+                if need_refresh_machines and self.membership is not None:
+                    # the members may have changed, they are refreshed in
+                    # background and taken by the retry.
+                    self.membership.wake()
 
-                new_machines = self.machines
-                old_machines = self._machines_cache + [self._base_uri]
+                # a write may have been handled by a member that did not
+                # respond, it is not sent again.
+                if method not in self._idempotent_methods or not policy.allow(attempt, None):
+                    raise
 
-                if set(new_machines) == set(old_machines):
+            except EtcdInternalError as e:
+                info = e.args[0] if len(e.args) > 0 and isinstance(e.args[0], dict) else {}
+                if not policy.allow(attempt, info.get("errorCode")):
                     raise
 
-                self._machines_cache = new_machines
-                self._base_uri = self._machines_cache.pop(0)
-                self._protocol, self._host, self._port = self._extract_base_uri()
+                logger.info(repr(e) + " while send_request path:{path}, method:{mtd}".format(path=path, mtd=method))
+
+            delay = policy.backoff(attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise EtcdReadTimeoutError("no time left to retry {mtd} {path}".format(mtd=method, path=path))
+
+            logger.info("retry {mtd} {path} in {d:.3f} seconds".format(mtd=method, path=path, d=delay))
+            time.sleep(delay)
+
+    def _time_left(self, deadline, what):
+        # seconds left before deadline, or None if there is no deadline
+        if deadline is None:
+            return None
+
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise EtcdReadTimeoutError("timeout before {what}".format(what=what))
+        return left
 
     def read(self, key, **argkv):
         """
@@ -1025,20 +1838,303 @@ class Client(object):
 
         `quorum(bool)`:
         If `True`, get value through raft.
+        Defaults to `True` if `read_policy` is `quorum`.
 
         `timeout(int)`:
-        Max seconds to wait for the request.
+        Max seconds for the read, including trying other members, following
+        redirects and retrying. If it is used up, a `etcd.EtcdReadTimeoutError`
+        is raised. Defaults to `read_timeout`.
+
+        `hedge(bool)`:
+        If `True`, send the read again to another member if the first one
+        has not answered after the delay given by `read_hedger`, and take the
+        first response. Ignored by `wait`. Defaults to `False`.
         :return: A `etcd.EtcdKeysResult` object.
         """
         key = self._sanitize_key(key)
-        params = self._generate_params(self._read_options, argkv)
+        params = self._generate_params(self._read_options, self._read_argkv(argkv))
         timeout = argkv.get("timeout")
-        response = self.api_execute(self._keys_path + key, self._MGET, params=params, timeout=timeout)
+        path = self._keys_path + key
+        hedge = argkv.get("hedge")
+
+        if argkv.get("wait"):
+            response = self.api_execute(path, self._MGET, params=params, timeout=timeout)
+            return self._to_keysresult(response)
+
+        deadline = self._deadline(timeout)
+        if not self.coalesce_reads:
+            return self._read_path(path, params, deadline, hedge)
+
+        return self._coalesce(
+            (path, tuple(sorted(params.items()))), deadline, self._read_path, path, params, deadline, hedge
+        )
+
+    def _read_path(self, path, params, deadline, hedge):
+        if hedge:
+            response = self._hedged_get(path, params, deadline)
+        else:
+            timeout = self._time_left(deadline, path) or 0
+            response = self.api_execute(path, self._MGET, params=params, timeout=timeout)
 
         return self._to_keysresult(response)
 
+    def _coalesce(self, key, deadline, f, *args):
+        # run f(*args) unless an identical read is in flight, and share its
+        # result or its error with the identical reads made meanwhile. A read
+        # waits for the one in flight no longer than its own deadline.
+        while True:
+            with self._flights_lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _Flight(deadline)
+                    self._flights[key] = flight
+
+            if leader:
+                break
+
+            if not flight.done.wait(self._time_left(deadline, key[0])):
+                raise EtcdReadTimeoutError("timeout while waiting for the same read of {path}".format(path=key[0]))
+
+            if (
+                isinstance(flight.error, EtcdReadTimeoutError)
+                and flight.deadline is not None
+                and (deadline is None or deadline > flight.deadline)
+            ):
+                # the one in flight gave up earlier than this one has to
+                continue
+
+            if flight.error is not None:
+                raise flight.error
+            return copy.copy(flight.result)
+
+        try:
+            flight.result = f(*args)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
     get = read
 
+    def get_many(self, keys, concurrency=8, spread=False, coalesce=0, **argkv):
+        """
+        Get the values of many keys, with up to `concurrency` requests sent at
+        the same time over pooled connections.
+        :param keys: the keys to get.
+        :param concurrency: max number of requests sent at the same time.
+        Defaults to `8`.
+        :param spread: If `True`, send the requests to all members in turn
+        instead of the ones chosen by `endpoint_selector`. Ignored if `quorum` is `True`: only a
+        serializable read can be served by any member. Defaults to `False`.
+        :param coalesce: If at least this many keys are in the same dir, read
+        the dir once instead of each key. The whole dir is read, so it pays off
+        only if the keys are a large part of the dir. A hidden key, whose name
+        starts with `_`, is not listed in its dir and is always read alone.
+        `0` or `None` disables it. Defaults to `0`.
+        :param argkv: See other kv args in `etcd.Client.read`.
+        :return: A `dict` of each key in `keys` to a `etcd.EtcdKeysResult`
+        object, or to the exception such as `etcd.EcodeKeyNotFound` raised
+        while getting it.
+        """
+        argkv = self._read_argkv(argkv)
+
+        # sanitized key -> keys as given
+        names = {}
+        for k in keys:
+            names.setdefault(self._sanitize_key(k), []).append(k)
+
+        single = list(names)
+        groups = {}
+        if coalesce and not set(argkv) & {"recursive", "wait", "waitIndex"}:
+            by_dir = {}
+            hidden = []
+            for k in single:
+                d, name = k.rsplit("/", 1)
+                if name.startswith("_"):
+                    hidden.append(k)
+                else:
+                    by_dir.setdefault(d or "/", []).append(k)
+
+            single = hidden
+            for d, ks in by_dir.items():
+                if len(ks) >= coalesce:
+                    groups[d] = ks
+                else:
+                    single.extend(ks)
+
+        uris = [None]
+        if spread and not argkv.get("quorum"):
+            base_uri, machines = self._endpoints()
+            uris = [base_uri] + machines
+
+        params = self._generate_params(self._read_options, argkv)
+        # all the keys are read before it
+        deadline = self._deadline(argkv.get("timeout"))
+        hedge = bool(argkv.get("hedge")) and not argkv.get("wait")
+
+        rst = {}
+        tasks = [(self._read_dir_children, (d, ks)) for d, ks in groups.items()]
+        tasks.extend([(self._read_one, (k,)) for k in single])
+
+        if len(tasks) > 0:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(concurrency, len(tasks))) as pool:
+                futures = []
+                for i, (f, args) in enumerate(tasks):
+                    uri = uris[i % len(uris)]
+                    futures.append(pool.submit(f, uri, *args, params=params, deadline=deadline, hedge=hedge))
+
+                for fut in futures:
+                    rst.update(fut.result())
+
+        return {name: rst[k] for k, ns in names.items() for name in ns}
+
+    def _read_at(self, uri, key, params, deadline, hedge=False):
+        # send a read to member `uri`, or to any member if `uri` is None or
+        # does not respond.
+        path = self._keys_path + key
+        if hedge:
+            return self._hedged_get(path, params, deadline, first=uri)
+
+        if uri is not None:
+            try:
+                response = self._request(uri + path, self._MGET, params, None, False, deadline=deadline)
+                return self._handle_server_response(response)
+            except (socket.error, k3http.HttpError) as e:
+                logger.info("{err} while read {key} from {uri}".format(err=repr(e), key=key, uri=uri))
+
+        return self.api_execute(path, self._MGET, params=params, timeout=self._time_left(deadline, path) or 0)
+
+    def _deadline(self, timeout):
+        # when a call with `timeout` must be done, as api_execute takes it
+        if timeout is None:
+            timeout = self.read_timeout
+        if not timeout:
+            return None
+        return time.monotonic() + timeout
+
+    def _hedged_get(self, path, params, deadline, first=None):
+        # send a read to the member chosen, and a duplicate to the next one if
+        # it has not answered after read_hedger.delay(). The first response
+        # that is not a server error wins, the other one is cancelled.
+        hedger = self.read_hedger
+        hedger.begin()
+
+        _, uris = self._members_to_try(self._MGET, path, params)
+        if first is not None and first != uris[0]:
+            # not probed if it is an ejected member
+            self.endpoint_selector.release(uris[0])
+            uris = [first] + [u for u in uris if u != first]
+
+        pool = self._get_hedge_pool()
+        legs = []
+
+        def _send(uri):
+            cancel = _Cancel()
+            fut = pool.submit(
+                self._request, uri + path, self._MGET, params, None, False, cancel=cancel, deadline=deadline
+            )
+            legs.append((fut, cancel))
+
+        start = time.monotonic()
+        _send(uris[0])
+        done, _ = concurrent.futures.wait([legs[0][0]], timeout=hedger.delay())
+        if len(done) == 0 and len(uris) > 1 and hedger.allow():
+            logger.debug("hedge read {path} to {uri}".format(path=path, uri=uris[1]))
+            _send(uris[1])
+
+        winner = None
+        pending = [fut for fut, _ in legs]
+        while winner is None and len(pending) > 0:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None and fut.result().status < http.client.INTERNAL_SERVER_ERROR:
+                    winner = fut
+                    break
+
+        if winner is not None:
+            # the latency of the first member, or how long it had taken when
+            # the duplicate won.
+            hedger.record(time.monotonic() - start)
+
+        for fut, cancel in legs:
+            if fut is not winner:
+                cancel.cancel()
+
+        if winner is not None:
+            return self._handle_server_response(winner.result())
+
+        for fut, _ in legs:
+            if fut.exception() is None:
+                return self._handle_server_response(fut.result())
+
+        # all failed to connect, try the others
+        return self.api_execute(path, self._MGET, params=params, timeout=self._time_left(deadline, path) or 0)
+
+    def _get_hedge_pool(self):
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._hedge_workers, thread_name_prefix="k3etcd-hedge"
+                )
+            return self._hedge_pool
+
+    def _read_one(self, uri, key, params, deadline, hedge=False):
+        try:
+            return {key: self._to_keysresult(self._read_at(uri, key, params, deadline, hedge))}
+        except EtcdException as e:
+            return {key: e}
+
+    def _read_dir_children(self, uri, dir_key, keys, params, deadline, hedge=False):
+        # read the dir once and take the requested keys from its children.
+        try:
+            response = self._read_at(uri, dir_key, params, deadline, hedge)
+            res = self._to_keysresult(response)
+        except EcodeKeyNotFound as e:
+            err = e.args[0]
+            return {k: EcodeKeyNotFound(dict(err, message="Key not found : " + k)) for k in keys}
+        except EtcdException:
+            # such as the dir is a file, get the keys one by one.
+            return self._read_each(uri, keys, params, deadline, hedge)
+
+        children = {}
+        if res.dir:
+            children = {n["key"]: n for n in res._children}
+
+        rst = {}
+        subdirs = []
+        for k in keys:
+            node = children.get(k)
+            if node is None:
+                rst[k] = EcodeKeyNotFound(
+                    {
+                        "status": http.client.NOT_FOUND,
+                        "headers": response.headers,
+                        "response": None,
+                        "message": "Key not found : " + k,
+                    }
+                )
+            elif node.get("dir"):
+                # the children of a sub dir are not in the response
+                subdirs.append(k)
+            else:
+                r = EtcdKeysResult(res.action, node)
+                r.parse_response(response)
+                rst[k] = r
+
+        rst.update(self._read_each(uri, subdirs, params, deadline, hedge))
+        return rst
+
+    def _read_each(self, uri, keys, params, deadline, hedge=False):
+        rst = {}
+        for k in keys:
+            rst.update(self._read_one(uri, k, params, deadline, hedge))
+        return rst
+
     def write(self, key, value=None, ttl=None, dir=False, append=False, refresh=False, **argkv):
         """
         Writes the value for a key, possibly doing atomic Compare-and-Swap.
@@ -1160,6 +2256,133 @@ class Client(object):
 
         return self._to_keysresult(response)
 
+    def read_stream(self, key, leaves_only=True, chunk_size=64 * 1024, **argkv):
+        """
+        Read a dir recursively, decoding the response while it is received.
+        Nodes are returned one by one and the whole response is never kept
+        in memory, so a tree larger than the memory can be exported.
+        Decoding is slower than with `etcd.Client.read`.
+        :param key: The dir to read.
+        :param leaves_only: If `False`, dirs are returned too, after the nodes
+        in them. Defaults to `True`.
+        :param chunk_size: bytes read from the socket at a time.
+        Defaults to `65536`.
+        :param argkv: Other kv args.
+        `sorted(bool)`, `quorum(bool)`: See `etcd.Client.read`.
+        `timeout(int)`: Max seconds to wait for each read from the socket.
+        :return: It is an iterator. Each element is a `etcd.EtcdKeysResult`
+        object without children. `etcd_index` of each one is the index of the
+        read.
+        """
+        key = self._sanitize_key(key)
+
+        argkv["recursive"] = True
+        params = self._generate_params(self._read_options, self._read_argkv(argkv))
+        timeout = argkv.get("timeout")
+        if timeout is None:
+            timeout = self.read_timeout
+
+        h = self._open_stream(self._keys_path + key, params, timeout or None)
+        try:
+            response = Response(status=h.status, headers=h.headers)
+            for node, is_leaf in nodestream.iter_nodes(self._iter_body(h, chunk_size)):
+                if leaves_only and not is_leaf:
+                    continue
+
+                r = EtcdKeysResult(None, node)
+                r.parse_response(response)
+                yield r
+
+        except ValueError as e:
+            logger.error(repr(e) + " while decode stream of {key}".format(key=key))
+            raise EtcdResponseError("failed to decode stream of {key}: {e}".format(key=key, e=repr(e)))
+        finally:
+            h.close()
+
+    def _iter_body(self, h, size):
+        while True:
+            try:
+                buf = h.read_body(size)
+            except (socket.error, k3http.HttpError) as e:
+                raise EtcdIncompleteRead("{err} while read response".format(err=repr(e)))
+
+            if buf == b"":
+                return
+
+            yield buf
+
+    def write_many(self, items, concurrency=8):
+        """
+        Write many keys, with up to `concurrency` requests sent at the same
+        time over pooled connections.
+        A failed item, such as a Compare-and-Swap that does not match, does
+        not stop the others.
+        To keep a connection for each request, `concurrency` should not be
+        greater than `max_idle` of the connection pool.
+        :param items: an iterable of items. Each item is a `(key, value)`
+        tuple, or a `dict` of the args of `etcd.Client.write`, for example
+        `{"key": "a", "value": "1", "ttl": 10, "prevExist": False}`.
+        Items are read as earlier ones are sent, it can be a generator.
+        :param concurrency: max number of requests sent at the same time.
+        Defaults to `8`.
+        :return: A `etcd.EtcdBatchResult` object.
+        """
+
+        def _write(item):
+            if isinstance(item, dict):
+                return self.write(**item)
+            return self.write(*item)
+
+        return self._run_batch(_write, items, concurrency)
+
+    def delete_many(self, items, concurrency=8):
+        """
+        Delete many keys, with up to `concurrency` requests sent at the same
+        time over pooled connections.
+        A failed item does not stop the others.
+        :param items: an iterable of items. Each item is a key, or a `dict`
+        of the args of `etcd.Client.delete`, for example
+        `{"key": "a", "prevIndex": 10}`.
+        :param concurrency: max number of requests sent at the same time.
+        Defaults to `8`.
+        :return: A `etcd.EtcdBatchResult` object.
+        """
+
+        def _delete(item):
+            if isinstance(item, dict):
+                return self.delete(**item)
+            return self.delete(item)
+
+        return self._run_batch(_delete, items, concurrency)
+
+    def _run_batch(self, f, items, concurrency):
+        # at most `concurrency` items are queued besides the running ones, so
+        # that a long iterator of items is not loaded at once.
+        def _call(item):
+            try:
+                return f(item)
+            except EtcdException as e:
+                return e
+
+        all_items = []
+        results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending = {}
+            for item in items:
+                if len(pending) >= concurrency * 2:
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for fut in done:
+                        results[pending.pop(fut)] = fut.result()
+
+                pending[pool.submit(_call, item)] = len(all_items)
+                all_items.append(item)
+                results.append(None)
+
+            for fut, i in pending.items():
+                results[i] = fut.result()
+
+        return EtcdBatchResult(all_items, results)
+
     def test_and_delete(self, key, **argkv):
         """
         Remove a key from etcd.
@@ -1229,16 +2452,94 @@ class Client(object):
                 if timeout <= 0:
                     raise EtcdReadTimeoutError("Watch Timeout: " + key)
 
-    def eternal_watch(self, key, waitindex=None, until=None, **argkv):
+    def _open_stream(self, path, params, timeout=None):
+        # a stream is never put back to the pool: it ends only when the
+        # connection is closed, or the consumer may stop before its end.
+        machines, uris = self._members_to_try(self._MGET, path, params)
+        for uri in uris:
+            host, port, p = self._parse_url(uri + path)
+            p, headers, body = self._build_request(p, self._MGET, params, False, None)
+
+            h = HttpConnection(host, port, timeout)
+            self.endpoint_selector.begin(uri)
+            try:
+                h.send_request(p, self._MGET, headers)
+                h.send_body(body)
+                h.read_response()
+            except (socket.error, k3http.HttpError) as e:
+                self.endpoint_selector.done(uri, None, False)
+                h.close()
+                if len(machines) > 0:
+                    nxt = self._rotate(uri)
+                    logger.info("{err} while connect {cur}, try connect {nxt}".format(err=repr(e), cur=uri, nxt=nxt))
+                continue
+
+            self.endpoint_selector.done(uri, None, h.status < http.client.INTERNAL_SERVER_ERROR)
+            if h.status != http.client.OK:
+                try:
+                    response = Response.from_http(h)
+                finally:
+                    h.close()
+                self._handle_server_response(response)
+
+            return h
+
+        raise NoMoreMachineError("No more machines in the cluster")
+
+    def _watch_stream(self, key, waitindex=None, **argkv):
+        key = self._sanitize_key(key)
+
+        params = self._generate_params(self._read_options, argkv)
+        params["wait"] = "true"
+        params["stream"] = "true"
+
+        if waitindex is not None:
+            params["waitIndex"] = waitindex
+
+        h = self._open_stream(self._keys_path + key, params)
+        try:
+            buf = b""
+            while True:
+                try:
+                    data = h.read_chunk()
+                except (socket.error, k3http.HttpError) as e:
+                    logger.info("{err} while read watch stream of {key}".format(err=repr(e), key=key))
+                    return
+
+                if data == b"":
+                    return
+
+                # an event may be split into several chunks, or several
+                # events sent in one chunk.
+                lines = (buf + data).split(b"\n")
+                buf = lines.pop()
+                for line in lines:
+                    if line.strip() == b"":
+                        continue
+                    yield self._to_keysresult(Response(status=h.status, headers=h.headers, body=line))
+        finally:
+            h.close()
+
+    def eternal_watch(self, key, waitindex=None, until=None, stream=False, **argkv):
         """
         Blocks until the modify index of the key is ge than `until`.
+        Successive watch requests share one pooled keep-alive connection.
         :param key: See `key` in `etcd.Client.watch`.
         :param waitindex: See `waitindex` in `etcd.Client.watch`.
         :param until: Break the loop when the modify index of the key is ge than it.
         If `None`, the loop will not be break. Defaults to `None`
+        :param stream: If `True`, receive events through one etcd `stream=true`
+        watch request, without a round trip between two events.
+        If the stream is closed, it is opened again from the index after the
+        last event. Defaults to `False`.
         :param argkv: See other kv args in `etcd.Client.watch`.
         :return: It is an iterator. Each element is a `etcd.EtcdKeysResult` object.
         """
+        if stream:
+            for res in self._eternal_watch_stream(key, waitindex, until, **argkv):
+                yield res
+            return
+
         local_index = waitindex
         while True:
             res = self._watch(key, waitindex=local_index, timeout=0, **argkv)
@@ -1252,6 +2553,25 @@ class Client(object):
 
             yield res
 
+    def _eternal_watch_stream(self, key, waitindex, until, **argkv):
+        local_index = waitindex
+        while True:
+            received = False
+            for res in self._watch_stream(key, waitindex=local_index, **argkv):
+                received = True
+                if res.modifiedIndex is not None:
+                    local_index = res.modifiedIndex + 1
+
+                yield res
+
+                if until is not None and res.modifiedIndex is not None and res.modifiedIndex >= until:
+                    return
+
+            logger.info("watch stream of {key} closed, reopen from {i}".format(key=key, i=local_index))
+            if not received:
+                # do not spin on a server that closes streams at once
+                time.sleep(0.1)
+
     def mkdir(self, key, ttl=None, **argkv):
         """
         Create a dir in the cluster.
@@ -1328,6 +2648,7 @@ class Client(object):
 
         data = {"peerURLs": peerurls}
         response = self.api_execute(self._mem_path, self._MPOST, params=data, bodyinjson=True)
+        self.invalidate_metadata()
 
         return self._to_dict(response)
 
@@ -1337,12 +2658,14 @@ class Client(object):
         :param mid: The id of the node in the cluster.
         :return: nothing
         """
+        self.invalidate_metadata()
         if mid not in self.ids:
             logger.info("{mid} not in the cluster when delete member".format(mid=mid))
             return
 
         mid = self._sanitize_key(mid)
         self.api_execute(self._mem_path + mid, self._MDELETE)
+        self.invalidate_metadata()
 
     def change_peerurls(self, mid, *peerurls):
         """
@@ -1352,6 +2675,7 @@ class Client(object):
         Type is `list`, like`['http://127.0.0.1:2380',]`
         :return: nothing
         """
+        self.invalidate_metadata()
         if mid not in self.ids:
             logger.info("{mid} not in the cluster when change peerurls".format(mid=mid))
             return
@@ -1363,6 +2687,7 @@ class Client(object):
         data = {"peerURLs": peerurls}
 
         self.api_execute(self._mem_path + mid, self._MPUT, params=data, bodyinjson=True)
+        self.invalidate_metadata()
 
     def _root_auth(self, password):
         return "root:%s" % (password)
@@ -1382,58 +2707,65 @@ class Client(object):
     def enable_auth(self, root_password):
         """
         Enable authorization.
-        :param root_password: The password of the root user.
+        Older versions kept the root account in `basic_auth_account` after
+        this call. Now it is left unchanged, set it to an account that is
+        allowed to access the keys for the requests that follow.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :return: nothing
         """
-        self.basic_auth_account = self._root_auth(root_password)
-        self.api_execute("/v2/auth/enable", self._MPUT)
+        auth = self._root_auth(root_password)
+        self.api_execute("/v2/auth/enable", self._MPUT, basic_auth_account=auth)
 
     def disable_auth(self, root_password):
         """
         Disable authorization.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :return: nothing
         """
-        self.basic_auth_account = self._root_auth(root_password)
-        self.api_execute("/v2/auth/enable", self._MDELETE)
+        auth = self._root_auth(root_password)
+        self.api_execute("/v2/auth/enable", self._MDELETE, basic_auth_account=auth)
 
     def create_user(self, name, password, root_password, roles=None):
         """
         Create a user in the cluster.
         :param name: The name of the user.
         :param password: The password of user.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :param roles: The roles that will be granted to the user.
         A `list`, like`['r1', 'r2']`. Defaults to `None`.
         :return: A `dict`, like`{"user":"u1","roles":['r1']}`
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._user_path + self._sanitize_key(name)
         if roles is not None:
             params = {"user": name, "password": password, "roles": roles}
         else:
             params = {"user": name, "password": password}
 
-        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True)
+        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True, basic_auth_account=auth)
         return self._to_dict(res)
 
     def create_role(self, name, root_password, permissions=None):
         """
         Create a role in the cluster.
         :param name: The name of the role.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :param permissions: A `dict`, like`{'read': ['/*'], 'write': ['/*']}`.
         Defaults to `None`.
         :return: A `dict`, like`{"role":"w_role","permissions":{"kv":{"read":["/*"],"write":["/*"]}}}`
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._role_path + self._sanitize_key(name)
         if permissions is not None:
             params = {"role": name, "permissions": {"kv": permissions}}
         else:
             params = {"role": name}
 
-        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True)
+        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True, basic_auth_account=auth)
         return self._to_dict(res)
 
     def get_user(self, name, root_password):
@@ -1442,7 +2774,8 @@ class Client(object):
         :param name: The name of the user.
         if `None`, return all users information.
 
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :return: A `dict`
         """
         # {
@@ -1463,13 +2796,13 @@ class Client(object):
         #         }
         #     ]
         # }
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         if name is not None:
             path = self._user_path + self._sanitize_key(name)
         else:
             path = self._user_path
 
-        res = self.api_execute(path, self._MGET)
+        res = self.api_execute(path, self._MGET, basic_auth_account=auth)
         return self._to_dict(res)
 
     def get_role(self, name, root_password):
@@ -1477,100 +2810,107 @@ class Client(object):
         Get the role information of the cluster.
         :param name: The name of the role.
         if `None`, return all roles information.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :return: a dict
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         if name is not None:
             path = self._role_path + self._sanitize_key(name)
         else:
             path = self._role_path
 
-        res = self.api_execute(path, self._MGET)
+        res = self.api_execute(path, self._MGET, basic_auth_account=auth)
         return self._to_dict(res)
 
     def grant_user_roles(self, name, root_password, roles):
         """
         Grant roles to user.
         :param name: The name of the user.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :param roles: The roles that will be granted to the user.
         A `list`, like`['r1', 'r2']`.
         :return: A `dict`, like`{u'user': u'u_test', u'roles': [u'r_test']}`
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._user_path + self._sanitize_key(name)
         params = {"user": name, "grant": roles}
 
-        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True)
+        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True, basic_auth_account=auth)
         return self._to_dict(res)
 
     def revoke_user_roles(self, name, root_password, roles):
         """
         Grant roles to user.
         :param name: The name of the user.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :param roles: The roles that will be revoked from the user.
         A `list`, like`['r1', 'r2']`.
         :return: A `dict`, like`{u'user': u'u_test', u'roles': []}`
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._user_path + self._sanitize_key(name)
         params = {"user": name, "revoke": roles}
 
-        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True)
+        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True, basic_auth_account=auth)
         return self._to_dict(res)
 
     def grant_role_permissions(self, name, root_password, permissions):
         """
         Grant permissions to the role.
         :param name: The name of the role.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :param permissions: The permissions that will be granted to the role.
         A `dict`, like`{'read': ['/*'], 'write': ['/*']}`.
         :return: A `dict`, like`{u'role': u'r_test', u'permissions': {u'kv': {u'read': [u'/*'], u'write': []}}}`
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._role_path + self._sanitize_key(name)
         params = {"role": name, "grant": {"kv": permissions}}
 
-        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True)
+        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True, basic_auth_account=auth)
         return self._to_dict(res)
 
     def revoke_role_permissions(self, name, root_password, permissions):
         """
         Revoke permissions from the role.
         :param name: The name of the role.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :param permissions: The permissions that will be granted to the role.
         A `dict`, like`{'read': ['/*'], 'write': ['/*']}`.
         :return: A `dict`, like`{u'role': u'r_test', u'permissions': {u'kv': {u'read': [], u'write': []}}}`
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._role_path + self._sanitize_key(name)
         params = {"role": name, "revoke": {"kv": permissions}}
 
-        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True)
+        res = self.api_execute(path, self._MPUT, params=params, bodyinjson=True, basic_auth_account=auth)
         return self._to_dict(res)
 
     def delete_user(self, user_name, root_password):
         """
         Delete the user of the cluster.
         :param user_name: The name of the user.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :return: nothing
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._user_path + self._sanitize_key(user_name)
-        self.api_execute(path, self._MDELETE)
+        self.api_execute(path, self._MDELETE, basic_auth_account=auth)
 
     def delete_role(self, role_name, root_password):
         """
         Delete the role of the cluster.
         :param role_name: The name of the role.
-        :param root_password: The password of the root user.
+        :param root_password: The password of the root user. It is only used for this
+        request, `basic_auth_account` is not changed.
         :return: nothing
         """
-        self.basic_auth_account = self._root_auth(root_password)
+        auth = self._root_auth(root_password)
         path = self._role_path + self._sanitize_key(role_name)
-        self.api_execute(path, self._MDELETE)
+        self.api_execute(path, self._MDELETE, basic_auth_account=auth)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+
+import k3utfjson
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _default(o):
+    # bytes in a request body are utf-8 text, as with k3utfjson.dump()
+    if isinstance(o, bytes):
+        return o.decode("utf-8")
+
+    raise TypeError("Object of type {t} is not JSON serializable".format(t=type(o).__name__))
+
+
+class JsonCodec(object):
+    """
+    Decodes response bodies and encodes request bodies of a `etcd.Client`.
+    Subclass it and override `loads` and `dumps` to use another json library.
+
+    ##  etcd.JsonCodec.name
+
+    Type is `str`, the name of the codec.
+    """
+
+    name = "json"
+
+    def loads(self, data):
+        """
+        :param data: a json document as `bytes` or `str`.
+        :return: the decoded object. Raise a `ValueError` if it is not valid json.
+        """
+        return json.loads(data)
+
+    def dumps(self, obj):
+        """
+        :param obj: the object to encode. `bytes` in it are utf-8 text.
+        :return: the json document as `bytes`, with non-ascii chars not escaped.
+        """
+        return json.dumps(obj, ensure_ascii=False, default=_default).encode("utf-8")
+
+    def __repr__(self):
+        return "{c}({n!r})".format(c=self.__class__.__name__, n=self.name)
+
+
+class K3utfjsonCodec(JsonCodec):
+    name = "k3utfjson"
+
+    def loads(self, data):
+        return k3utfjson.load(data)
+
+    def dumps(self, obj):
+        return k3utfjson.dump(obj).encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=_default)
+
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+codecs = {
+    "json": JsonCodec,
+    "k3utfjson": K3utfjsonCodec,
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+}
+
+_modules = {
+    "orjson": orjson,
+    "ujson": ujson,
+}
+
+
+def available_codecs():
+    """
+    :return: the names of the codecs whose library is installed, fastest first.
+    """
+    return [n for n in ("orjson", "ujson", "json", "k3utfjson") if _modules.get(n, json) is not None]
+
+
+def get_codec(codec=None):
+    """
+    Get a json codec.
+    :param codec: a `etcd.JsonCodec` object is returned as is.
+    A name, one of `json`, `k3utfjson`, `orjson` or `ujson`, selects a codec.
+    If `None` or `auto`, the fastest installed one is used: `orjson`, then
+    `ujson`, then `json`. Defaults to `None`.
+    :return: a `etcd.JsonCodec` object.
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    if codec is None or codec == "auto":
+        codec = available_codecs()[0]
+
+    if codec not in codecs:
+        raise ValueError("unknown json codec {c}, choose from {n}".format(c=codec, n=list(codecs)))
+
+    if _modules.get(codec, json) is None:
+        raise ValueError("json codec {c} is not installed".format(c=codec))
+
+    return codecs[codec]()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections
+import threading
+
+
+class ReadHedger(object):
+    """
+    Decides when a read is sent again to another member, for the reads
+    made with `hedge=True`.
+
+    The duplicate is sent if the first member has not answered after the
+    `percentile` latency of the recent reads. At most `budget` duplicates
+    are sent per read on average, with bursts of `burst`, so that a slow
+    cluster does not get more load from hedging.
+
+    It is thread safe and can be shared by several clients.
+
+    ##  etcd.ReadHedger.percentile
+
+    Type is `float`, the percentile of the recent read latencies to wait for
+    before sending a duplicate.
+
+    ##  etcd.ReadHedger.budget
+
+    Type is `float`, max duplicates per read on average.
+
+    ##  etcd.ReadHedger.reads
+
+    Type is `int`, the number of hedged reads made.
+
+    ##  etcd.ReadHedger.hedges
+
+    Type is `int`, the number of duplicates sent.
+    """
+
+    # samples before the delay is computed from them
+    min_samples = 20
+
+    # recompute the delay after this many new samples
+    refresh_every = 50
+
+    def __init__(self, percentile=0.95, min_delay=0.002, max_delay=1, budget=0.1, burst=10, window=1000):
+        """
+        :param percentile: the percentile of recent read latencies to wait for
+        before sending a duplicate. Defaults to `0.95`.
+        :param min_delay: min seconds to wait before sending a duplicate. Defaults to `0.002`.
+        :param max_delay: max seconds to wait before sending a duplicate, it is
+        also the delay before there are 20 samples. Defaults to `1`.
+        :param budget: max duplicates per read on average. Defaults to `0.1`.
+        :param burst: max duplicates sent in a row. Defaults to `10`.
+        :param window: number of recent latencies kept. Defaults to `1000`.
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+
+        self._latencies = collections.deque(maxlen=window)
+        self._delay = max_delay
+        self._new_samples = 0
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+        self.reads = 0
+        self.hedges = 0
+
+    def delay(self):
+        """
+        :return: seconds to wait for the first member before sending a duplicate.
+        """
+        with self._lock:
+            n = len(self._latencies)
+            if n < self.min_samples:
+                return self.max_delay
+
+            if self._new_samples >= self.refresh_every or (self._new_samples > 0 and n < 100):
+                lat = sorted(self._latencies)
+                d = lat[min(int(len(lat) * self.percentile), len(lat) - 1)]
+                self._delay = min(max(d, self.min_delay), self.max_delay)
+                self._new_samples = 0
+
+            return self._delay
+
+    def record(self, latency):
+        """
+        Add the latency of a read.
+        :param latency: seconds the first member took to answer. If it has
+        been cancelled, the seconds it had taken.
+        :return: nothing
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            self._new_samples += 1
+
+    def begin(self):
+        """
+        Tell a read starts, it adds `budget` to the duplicates that may be sent.
+        :return: nothing
+        """
+        with self._lock:
+            self.reads += 1
+            self._tokens = min(self._tokens + self.budget, self.burst)
+
+    def allow(self):
+        """
+        Take one duplicate from the budget.
+        :return: `True` if a duplicate may be sent.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+
+            self._tokens -= 1
+            self.hedges += 1
+            return True
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import logging
+import socket
+import threading
+import time
+import urllib.parse
+import weakref
+
+import k3http
+
+from .pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class Membership(object):
+    """
+    The client urls of the members of a cluster, kept up to date by a
+    background thread and shared by the clients of the cluster.
+
+    It starts with the urls a client is created with. The background thread
+    asks the members for `/machines` every `interval` seconds, at once if
+    only one member is known, and when a client fails to reach any member.
+    The thread ends when the object is no longer used.
+
+    ##  etcd.Membership.members
+
+    Type is `list`, the client urls of the members, like
+    `['http://127.0.0.1:4001', 'http://127.0.0.1:4002']`.
+
+    ##  etcd.Membership.version
+
+    Type is `int`, it is increased each time `members` changes.
+
+    ##  etcd.Membership.interval
+
+    Type is `int` or `float`, seconds between two refreshes in background.
+
+    ##  etcd.Membership.ttl
+
+    Type is `int` or `float`, seconds `members` is fresh after it is
+    refreshed, see `etcd.Membership.fresh`.
+    """
+
+    # Membership objects shared by the clients of each cluster
+    _shared = weakref.WeakValueDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, uris, version_prefix="/v2", interval=30, ttl=60, timeout=2, conn_pool=None):
+        """
+        :param uris: client urls of the members known, such as `http://127.0.0.1:2379`.
+        :param version_prefix: url or version prefix in etcd url. Defaults to `/v2`.
+        :param interval: seconds between two refreshes in background. Defaults to `30`.
+        :param ttl: seconds the members are fresh after a refresh. Defaults to `60`.
+        :param timeout: max seconds to wait for a member when refreshing. Defaults to `2`.
+        :param conn_pool: A `etcd.ConnectionPool` object to connect to the members with,
+        such as the one of a client. If `None`, it creates its own one. Defaults to `None`.
+        """
+        self.members = list(uris)
+        self.version = 0
+        self.version_prefix = version_prefix
+        self.interval = interval
+        self.ttl = ttl
+        self.timeout = timeout
+
+        if conn_pool is None:
+            conn_pool = ConnectionPool()
+        self._conn_pool = conn_pool
+
+        # when members is refreshed, 0 if it has never been
+        self.updated = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def shared(cls, uris, version_prefix="/v2", **argkv):
+        """
+        Get the `etcd.Membership` used by the clients created with the same
+        `uris` and `version_prefix`, or create it.
+        :param uris: client urls of the members known.
+        :param version_prefix: url or version prefix in etcd url. Defaults to `/v2`.
+        :param argkv: other args of `etcd.Membership`, used if it is created.
+        :return: a `etcd.Membership` object.
+        """
+        key = (tuple(sorted(uris)), version_prefix)
+        with cls._shared_lock:
+            m = cls._shared.get(key)
+            if m is None:
+                m = cls(uris, version_prefix=version_prefix, **argkv)
+                cls._shared[key] = m
+            return m
+
+    def start(self):
+        """
+        Start the background thread unless it is running.
+        :return: nothing
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            if len(self.members) < 2 and self.updated == 0:
+                # look for the other members at once
+                self._wakeup.set()
+
+            # the thread does not keep the object alive
+            self._thread = threading.Thread(target=_refresh_loop, args=(weakref.ref(self),), name="etcd-membership")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def wake(self):
+        """
+        Ask the background thread to refresh now, without waiting for it.
+        :return: nothing
+        """
+        self._wakeup.set()
+
+    def fresh(self):
+        """
+        :return: `True` if `members` has been refreshed in the last `ttl` seconds.
+        """
+        return self.updated != 0 and time.monotonic() - self.updated < self.ttl
+
+    def update(self, members):
+        """
+        Replace the members, such as with a response of `/machines`.
+        :param members: client urls of the members.
+        :return: nothing
+        """
+        if len(members) == 0:
+            return
+
+        with self._lock:
+            self.updated = time.monotonic()
+            if members != self.members:
+                logger.info("members changed from {old} to {new}".format(old=self.members, new=members))
+                self.members = list(members)
+                self.version += 1
+
+    def refresh(self):
+        """
+        Ask the known members for `/machines` in turn, until one answers.
+        :return: `True` if a member answered.
+        """
+        for uri in list(self.members):
+            try:
+                members = self._fetch(uri)
+            except (socket.error, k3http.HttpError, ValueError) as e:
+                logger.info("{err} while get machines from {uri}".format(err=repr(e), uri=uri))
+                continue
+
+            self.update(members)
+            return True
+
+        return False
+
+    def _fetch(self, uri):
+        p = urllib.parse.urlparse(uri)
+        h = self._conn_pool.acquire(p.hostname, p.port, self.timeout)
+        try:
+            h.send_request(self.version_prefix + "/machines", "GET", {"Host": p.netloc})
+            h.read_response()
+            body = h.read_body(None)
+        except BaseException:
+            h.close()
+            raise
+
+        self._conn_pool.release(h)
+
+        if h.status != 200:
+            raise ValueError("status {st} of machines from {uri}".format(st=h.status, uri=uri))
+
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+
+        return [n.strip() for n in body.split(",") if n.strip() != ""]
+
+
+def _refresh_loop(ref):
+    while True:
+        m = ref()
+        if m is None:
+            return
+        wakeup, interval = m._wakeup, m.interval
+        del m
+
+        wakeup.wait(interval)
+
+        m = ref()
+        if m is None:
+            return
+        wakeup.clear()
+        m.refresh()
+        del m
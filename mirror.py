@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import copy
+import logging
+import threading
+
+from .client import (
+    EcodeKeyNotFound,
+    EtcdException,
+    EtcdKeysResult,
+    EtcdWatchError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TreeMirror(object):
+    """
+    A local copy of an etcd dir that is kept current by a watch.
+
+    The dir is loaded once with `etcd.Client.rlsdir`. Then a background
+    thread applies the events of a recursive `etcd.Client.eternal_watch`,
+    resuming from the last applied `modifiedIndex` after a connection
+    error. If the watch reports that the index has been cleared
+    (`etcd.EtcdWatchError`), the dir is loaded again.
+
+    Lookups, listings and existence checks are answered from memory:
+
+    ```python
+    m = etcd.TreeMirror(c, '/services')
+    m.get('/services/web/1').value
+    [n.key for n in m.ls('/services/web')]
+    '/services/web/1' in m
+    ```
+
+    ##  etcd.TreeMirror.prefix
+
+    Type is `str`, the mirrored dir.
+
+    ##  etcd.TreeMirror.index
+
+    Type is `int`, the etcd index the mirror is current to.
+    """
+
+    def __init__(self, client, prefix, retry_interval=1):
+        """
+        Load `prefix` and start following its changes.
+        :param client: a `etcd.Client` object.
+        :param prefix: the dir to mirror.
+        :param retry_interval: seconds to wait before watching again after an error.
+        Defaults to `1`.
+        """
+        self.client = client
+        self.prefix = client._sanitize_key(prefix).rstrip("/") or "/"
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        # key -> EtcdKeysResult of every node in the dir, children are not
+        # kept in the dir node.
+        self._nodes = {}
+        # dir key -> set of child keys
+        self._children = {}
+        self.index = 0
+
+        self._snapshot()
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._watch_loop, name="etcd-tree-mirror")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _snapshot(self):
+        try:
+            res = self.client.rlsdir(self.prefix)
+            index = res.etcd_index
+            subtree = res.get_subtree()
+        except EcodeKeyNotFound as e:
+            index = int(e.args[0]["headers"].get("x-etcd-index", 0))
+            subtree = []
+
+        nodes = {}
+        children = {}
+        for n in subtree:
+            if n.key is None:
+                # the root dir has no key
+                continue
+            _add(nodes, children, self.prefix, EtcdKeysResult(None, _node_dict(n)))
+
+        with self._lock:
+            self._nodes = nodes
+            self._children = children
+            self.index = index
+
+        logger.info("load {p} at index {i}, {n} nodes".format(p=self.prefix, i=index, n=len(nodes)))
+
+    def _apply(self, ev):
+        with self._lock:
+            if ev.modifiedIndex is not None and ev.modifiedIndex <= self.index:
+                return
+
+            if ev.action in ("delete", "compareAndDelete", "expire"):
+                _remove(self._nodes, self._children, self.prefix, ev.key)
+            else:
+                node = EtcdKeysResult(None, _node_dict(ev))
+                if ev.dir and ev.key in self._nodes:
+                    # a dir is updated, for example its ttl, keep its children
+                    self._nodes[ev.key] = node
+                else:
+                    _remove(self._nodes, self._children, self.prefix, ev.key)
+                    _add(self._nodes, self._children, self.prefix, node)
+
+            if ev.modifiedIndex is not None:
+                self.index = ev.modifiedIndex
+
+    def _watch_loop(self):
+        while not self._stopped.is_set():
+            try:
+                for ev in self.client.eternal_watch(self.prefix, waitindex=self.index + 1, recursive=True):
+                    if self._stopped.is_set():
+                        return
+                    self._apply(ev)
+
+            except EtcdWatchError as e:
+                logger.info("{err} while watch {p}, reload".format(err=repr(e), p=self.prefix))
+                try:
+                    self._snapshot()
+                except EtcdException as e:
+                    logger.info("{err} while reload {p}".format(err=repr(e), p=self.prefix))
+                    self._stopped.wait(self.retry_interval)
+
+            except EtcdException as e:
+                logger.info("{err} while watch {p}, retry".format(err=repr(e), p=self.prefix))
+                self._stopped.wait(self.retry_interval)
+
+    def get(self, key):
+        """
+        Get a node in the mirrored dir.
+        Raise a `etcd.EcodeKeyNotFound` if `key` does not exist.
+        :param key: the key to get.
+        :return: A `etcd.EtcdKeysResult` object. The children of a dir are
+        not included, use `ls` to list them.
+        """
+        key = self.client._sanitize_key(key)
+        with self._lock:
+            node = self._nodes.get(key)
+
+        if node is None:
+            raise EcodeKeyNotFound({"message": "Key not found : " + key})
+
+        return copy.copy(node)
+
+    def ls(self, key=None):
+        """
+        List the children of a dir.
+        Raise a `etcd.EcodeKeyNotFound` if `key` does not exist.
+        :param key: the dir to list. If `None`, list the mirrored dir.
+        :return: A `list` of `etcd.EtcdKeysResult`, sorted by key.
+        """
+        if key is None:
+            key = self.prefix
+        key = self.client._sanitize_key(key)
+
+        with self._lock:
+            if key not in self._nodes and key != self.prefix:
+                raise EcodeKeyNotFound({"message": "Key not found : " + key})
+
+            return [copy.copy(self._nodes[k]) for k in sorted(self._children.get(key, ()))]
+
+    def keys(self, prefix=None):
+        """
+        Get the keys of all leaves under `prefix`.
+        :param prefix: a dir in the mirror. If `None`, the mirrored dir.
+        :return: A sorted `list` of keys.
+        """
+        if prefix is None:
+            prefix = self.prefix
+        prefix = self.client._sanitize_key(prefix).rstrip("/") + "/"
+
+        with self._lock:
+            return sorted(k for k, n in self._nodes.items() if k.startswith(prefix) and not n.dir)
+
+    def __contains__(self, key):
+        key = self.client._sanitize_key(key)
+        with self._lock:
+            return key in self._nodes
+
+    def close(self):
+        """
+        Stop following changes.
+        The background watch stops when its current request returns.
+        :return: nothing
+        """
+        self._stopped.set()
+
+
+def _node_dict(res):
+    node = {}
+    for k in EtcdKeysResult._node_props:
+        node[k] = getattr(res, k)
+
+    return node
+
+
+def _parent(key):
+    return key.rsplit("/", 1)[0] or "/"
+
+
+def _add(nodes, children, prefix, node):
+    nodes[node.key] = node
+
+    # create missing parents, etcd does it too.
+    key = node.key
+    while key != prefix and key != "/":
+        parent = _parent(key)
+        children.setdefault(parent, set()).add(key)
+        if parent in nodes:
+            break
+
+        nodes[parent] = EtcdKeysResult(None, {"key": parent, "dir": True})
+        key = parent
+
+
+def _remove(nodes, children, prefix, key):
+    if key == prefix:
+        nodes.clear()
+        children.clear()
+        return
+
+    stack = [key]
+    while len(stack) > 0:
+        k = stack.pop()
+        nodes.pop(k, None)
+        stack.extend(children.pop(k, ()))
+
+    sibling = children.get(_parent(key))
+    if sibling is not None:
+        sibling.discard(key)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Incremental decoding of the json body of a recursive etcd read.
+
+Only the nodes being decoded are kept in memory: a node is handed out as
+soon as its object is closed, and the `nodes` arrays are never built.
+"""
+
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_whitespace = " \t\n\r"
+
+# drop consumed text from the buffer when it is larger than this
+_compact_size = 64 * 1024
+
+
+class _Reader(object):
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self):
+        # return False at the end of the body
+        if self.pos > _compact_size:
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+
+        for chunk in self.chunks:
+            text = self.utf8.decode(chunk)
+            if text != "":
+                self.buf += text
+                return True
+
+        return False
+
+    def peek(self):
+        if self.pos < len(self.buf):
+            c = self.buf[self.pos]
+            if c not in _whitespace:
+                return c
+
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _whitespace:
+                self.pos += 1
+
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+            if not self.fill():
+                raise ValueError("unexpected end of json")
+
+    def expect(self, c):
+        if self.peek() != c:
+            raise ValueError("expect {c!r} at {p} but {got!r}".format(c=c, p=self.pos, got=self.buf[self.pos]))
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                v, end = _decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                v, end = None, None
+
+            # a value must be followed by something: a number at the end of
+            # the buffer may go on in the next chunk.
+            if end is not None and end < len(self.buf):
+                self.pos = end
+                return v
+
+            if not self.fill():
+                raise ValueError("unexpected end of json")
+
+    def flat_object(self):
+        # decode the object at pos at once if there is no object or array in
+        # it, such as a leaf. Return None otherwise.
+        while True:
+            end = self.buf.find("}", self.pos)
+            if end >= 0:
+                break
+            if not self.fill():
+                raise ValueError("unexpected end of json")
+
+        if self.buf.find("{", self.pos + 1, end) >= 0 or self.buf.find("[", self.pos, end) >= 0:
+            return None
+
+        # a "}" in a string may end the scan too early, then the object is
+        # not flat but is still decoded correctly.
+        return self.value()
+
+
+def iter_nodes(chunks):
+    """
+    Decode the body of a `recursive=true` read of the etcd keys api.
+    :param chunks: an iterable of `bytes`, the body in pieces of any size.
+    :return: It is an iterator. Each element is a `(node, is_leaf)` tuple:
+    `node` is a `dict` of the node without its children, `is_leaf` is `True`
+    if the node has no children. A node is returned after the nodes in it.
+    """
+    r = _Reader(chunks)
+
+    r.expect("{")
+    while True:
+        c = r.peek()
+        if c == "}":
+            return
+
+        if c == ",":
+            r.pos += 1
+            continue
+
+        name = r.value()
+        r.expect(":")
+        if name != "node":
+            # such as "action"
+            r.value()
+            continue
+
+        for n in _iter_tree(r):
+            yield n
+
+
+def _iter_tree(r):
+    # each frame is [node, number of children, whether in the "nodes" array]
+    r.expect("{")
+    stack = [[{}, 0, False]]
+
+    while stack:
+        frame = stack[-1]
+        c = r.peek()
+
+        if c == ",":
+            r.pos += 1
+            continue
+
+        if frame[2]:
+            if c == "]":
+                r.pos += 1
+                frame[2] = False
+                continue
+
+            frame[1] += 1
+            node = r.flat_object()
+            if node is not None:
+                if "nodes" not in node:
+                    yield node, True
+                else:
+                    for n in _flatten(node):
+                        yield n
+                continue
+
+            r.expect("{")
+            stack.append([{}, 0, False])
+            continue
+
+        if c == "}":
+            r.pos += 1
+            stack.pop()
+            yield frame[0], frame[1] == 0
+            continue
+
+        name = r.value()
+        r.expect(":")
+        if name == "nodes" and r.peek() == "[":
+            r.pos += 1
+            frame[2] = True
+            continue
+
+        frame[0][name] = r.value()
+
+
+def _flatten(node):
+    # the nodes of a decoded tree, children before their parent
+    stack = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        children = n.get("nodes") or []
+        if expanded or len(children) == 0:
+            yield {k: v for k, v in n.items() if k != "nodes"}, len(children) == 0
+            continue
+
+        stack.append((n, True))
+        stack.extend((c, False) for c in reversed(children))
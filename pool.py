@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import logging
+import socket
+import threading
+import time
+
+import k3http
+
+logger = logging.getLogger(__name__)
+
+
+class HttpConnection(k3http.Client):
+    """
+    A `k3http.Client` that keeps its socket open between requests,
+    so that successive requests to the same endpoint share one HTTP/1.1
+    keep-alive connection.
+
+    A new socket is connected only when there is no open one.
+    """
+
+    def __init__(self, host, port, timeout=60):
+        super(HttpConnection, self).__init__(host, port, timeout)
+        # whether the current request is sent over a socket that has been
+        # used by a previous request.
+        self.reused = False
+        self.last_used = time.time()
+
+    def send_request(self, uri, method="GET", headers=None):
+        if self.sock is None:
+            self.reused = False
+            super(HttpConnection, self).send_request(uri, method=method, headers=headers)
+            # headers and body are sent with separate writes, do not let them
+            # wait for delayed ACKs on a long-lived connection.
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return
+
+        self.reused = True
+        self._reset_response()
+        self.method = method
+
+        self.sock.sendall(self._request_head(uri, method, headers))
+
+    def _reset_response(self):
+        # k3http.Client._reset_request() resets the per request state but
+        # closes the socket first. Detach the socket and its receive buffer so
+        # that only the state is reset.
+        sock, recv_iter = self.sock, self.recv_iter
+        self.sock, self.recv_iter = None, None
+        try:
+            self._reset_request()
+        finally:
+            self.sock, self.recv_iter = sock, recv_iter
+
+    def _request_head(self, uri, method, headers):
+        # k3http builds the request head inline in send_request() right after
+        # connecting, the rules are the same here.
+        default_port = 80
+        if self.https_context is not None:
+            default_port = 443
+
+        host = self.host
+        if self.port != default_port:
+            host = "{h}:{p}".format(h=self.host, p=self.port)
+
+        headers = k3http.headers_add_host(dict(headers or {}), host)
+
+        lower_headers = {k.lower(): v for k, v in headers.items()}
+        if k3http.client._is_chunked(lower_headers.get("transfer-encoding", "")):
+            self.request_chunked_encoded = True
+
+        bufs = ["{m} {u} HTTP/1.1".format(m=method, u=uri)]
+        for k, v in headers.items():
+            bufs.append("{k}: {v}".format(k=k, v=v))
+        bufs.extend(["", ""])
+
+        return "\r\n".join(bufs).encode("utf-8")
+
+    def read_chunk(self):
+        """
+        Read the next chunk of a chunked response body, without waiting for
+        the chunks after it.
+        A body that is not chunked is read at once.
+        :return: the chunk as `bytes`, `b""` at the end of the body.
+        """
+        if not self.chunked:
+            return self.read_body(None)
+
+        if self.chunk_left is None:
+            self.chunk_left = self._get_chunk_size()
+
+        if self.chunk_left == 0:
+            return b""
+
+        return self.read_body(self.chunk_left)
+
+    def is_reusable(self):
+        """
+        Whether the response has been read completely and the server
+        allows another request over the same socket.
+        """
+        if self.sock is None or self.status is None:
+            return False
+
+        if self.headers.get("connection", "").lower() == "close":
+            return False
+
+        if self.chunked:
+            return self.chunk_left == 0
+
+        if self.content_length is None:
+            # body is delimited by closing the connection
+            return False
+
+        return self.has_read >= self.content_length
+
+    def is_alive(self):
+        """
+        Check an idle connection: the server must not have closed it or
+        sent anything on it.
+        """
+        if self.sock is None:
+            return False
+
+        # peek without blocking. select.select() can not be used since it
+        # fails on descriptors greater than FD_SETSIZE.
+        try:
+            self.sock.setblocking(False)
+            try:
+                self.sock.recv(1, socket.MSG_PEEK)
+            finally:
+                self.sock.settimeout(self.timeout)
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+
+        # b"" means closed by the server, any data is unexpected.
+        return False
+
+
+class ConnectionPool(object):
+    """
+    A thread safe pool of idle keep-alive connections, keyed by `(host, port)`.
+
+    ##  etcd.ConnectionPool.max_idle
+
+    Type is `int`, the max number of idle connections kept for each endpoint.
+    `0` disables connection reuse.
+
+    ##  etcd.ConnectionPool.idle_timeout
+
+    Type is `int` or `float`, seconds an idle connection is kept.
+    Older connections are closed instead of being reused.
+    """
+
+    def __init__(self, max_idle=8, idle_timeout=30):
+        """
+        :param max_idle: max idle connections kept for each endpoint. Defaults to `8`.
+        :param idle_timeout: seconds an idle connection is kept. Defaults to `30`.
+        """
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host, port, timeout):
+        """
+        Get a healthy idle connection to `host:port`, or a new one if there
+        is none.
+        :param host: ip or domain of the endpoint.
+        :param port: port of the endpoint.
+        :param timeout: socket timeout for the request sent with it.
+        :return: a `etcd.HttpConnection` object.
+        """
+        now = time.time()
+        while True:
+            with self._lock:
+                conns = self._idle.get((host, port))
+                if not conns:
+                    break
+                h = conns.pop()
+
+            if now - h.last_used < self.idle_timeout and h.is_alive():
+                h.set_timeout(timeout)
+                return h
+
+            logger.debug("close stale connection to {h}:{p}".format(h=host, p=port))
+            h.close()
+
+        return HttpConnection(host, port, timeout)
+
+    def release(self, h):
+        """
+        Put a connection back to the pool after its response is read.
+        It is closed if it can not be reused or the pool is full.
+        :param h: a `etcd.HttpConnection` object returned by `acquire`.
+        :return: nothing
+        """
+        if not h.is_reusable():
+            h.close()
+            return
+
+        h.last_used = time.time()
+        with self._lock:
+            conns = self._idle.setdefault((h.host, h.port), [])
+            if len(conns) < self.max_idle:
+                conns.append(h)
+                return
+
+        h.close()
+
+    def clear(self):
+        """
+        Close all idle connections.
+        :return: nothing
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+
+        for conns in idle.values():
+            for h in conns:
+                h.close()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import random
+import threading
+
+
+class RetryPolicy(object):
+    """
+    Decides whether and when `etcd.Client.api_execute` sends a request
+    again after it failed on all members.
+
+    A request is sent again if the cluster answered "Raft Internal
+    Error"(300) or "During Leader Election"(301), or if it is a read and no
+    member responded. Between two passes over the members it waits a random
+    time between 0 and `base_delay * 2 ** n`, up to `max_delay` (exponential
+    backoff with full jitter), so that the clients do not all come back at
+    the same time.
+
+    Retries take tokens from a bucket that gets `budget` tokens per call,
+    up to `burst`, so that they stay a bounded share of the requests. It is
+    thread safe and can be shared by several clients, to bound the retries
+    of all of them.
+
+    ##  etcd.RetryPolicy.max_attempts
+
+    Type is `int`, max passes over the members for a call, the first one
+    included.
+
+    ##  etcd.RetryPolicy.budget
+
+    Type is `float`, max retries per call on average.
+
+    ##  etcd.RetryPolicy.calls
+
+    Type is `int`, the number of calls made.
+
+    ##  etcd.RetryPolicy.retries
+
+    Type is `int`, the number of retries made.
+
+    ##  etcd.RetryPolicy.exhausted
+
+    Type is `int`, the number of retries not made because the budget was
+    used up.
+    """
+
+    # errorCode of the errors worth retrying
+    retry_ecodes = (300, 301)
+
+    def __init__(self, max_attempts=3, base_delay=0.05, max_delay=2, budget=0.2, burst=10):
+        """
+        :param max_attempts: max passes over the members for a call, the first one
+        included. `1` disables retries. Defaults to `3`.
+        :param base_delay: seconds to wait at most before the first retry. Defaults to `0.05`.
+        :param max_delay: max seconds to wait before a retry. Defaults to `2`.
+        :param budget: max retries per call on average. Defaults to `0.2`.
+        :param burst: max retries made in a row. Defaults to `10`.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def begin(self):
+        """
+        Tell a call starts, it adds `budget` to the retries that may be made.
+        :return: nothing
+        """
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self._tokens + self.budget, self.burst)
+
+    def retryable(self, ecode):
+        """
+        :param ecode: the `errorCode` the cluster answered, or `None` if no
+        member could be connected to.
+        :return: `True` if it is worth sending the request again.
+        """
+        return ecode is None or ecode in self.retry_ecodes
+
+    def allow(self, attempt, ecode):
+        """
+        Decide whether to send a request again, and take one retry from the
+        budget if so.
+        :param attempt: the number of passes over the members made.
+        :param ecode: the `errorCode` the cluster answered, or `None` if no
+        member could be connected to.
+        :return: `True` if the request should be sent again.
+        """
+        if attempt >= self.max_attempts or not self.retryable(ecode):
+            return False
+
+        with self._lock:
+            if self._tokens < 1:
+                self.exhausted += 1
+                return False
+
+            self._tokens -= 1
+            self.retries += 1
+            return True
+
+    def backoff(self, attempt):
+        """
+        :param attempt: the number of passes over the members made.
+        :return: seconds to wait before the next one.
+        """
+        return random.uniform(0, min(self.base_delay * 2 ** (attempt - 1), self.max_delay))
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _EndpointHealth(object):
+    __slots__ = (
+        "latency",
+        "error_rate",
+        "failures",
+        "samples",
+        "inflight",
+        "ejected_until",
+        "ejections",
+        "probing",
+        "reserved_until",
+        "updated",
+    )
+
+    def __init__(self):
+        # ewma of seconds a request takes, None before the first sample
+        self.latency = None
+        self.error_rate = 0.0
+        # consecutive failures
+        self.failures = 0
+        self.samples = 0
+        self.inflight = 0
+        # 0 if not ejected, or when it can be probed again
+        self.ejected_until = 0
+        # consecutive ejections, a flapping member is kept out longer
+        self.ejections = 0
+        # a half-open probe request is in flight
+        self.probing = False
+        # 0, or until when it is reserved as a probe by order() and no other
+        # request is chosen to probe it. begin() turns it into probing.
+        self.reserved_until = 0
+        # when the last sample is taken
+        self.updated = 0
+
+
+class EndpointSelector(object):
+    """
+    A thread safe chooser of the member a request is sent to, by the health
+    of each member seen by the requests sent to it.
+
+    For each member it keeps an EWMA of the latency and of the error rate,
+    and the number of consecutive failures. A request goes to the better of
+    two members chosen at random (power of two choices). A member that fails
+    `max_failures` times in a row, or whose error rate or latency is much
+    worse than the others, is ejected for `cooldown` seconds: it is tried
+    only after the healthy ones. Then one request at a time is sent to it as
+    a probe, which lets it back in if it succeeds, or ejects it again for
+    twice as long.
+
+    Each member is a circuit breaker: `closed` while it is healthy, `open`
+    while it is ejected, and `half_open` while a probe is in flight or about
+    to be sent. An open
+    member is short-circuited: a request goes to it only if all the others
+    have failed. `on_state_change` is called on each change of state, for
+    monitoring.
+
+    It can be shared by several clients of the same cluster.
+
+    ##  etcd.EndpointSelector.alpha
+
+    Type is `float`, the weight of the latest sample in the EWMAs.
+
+    ##  etcd.EndpointSelector.max_failures
+
+    Type is `int`, the consecutive failures to eject a member.
+
+    ##  etcd.EndpointSelector.max_error_rate
+
+    Type is `float`, the error rate to eject a member.
+
+    ##  etcd.EndpointSelector.outlier_ratio
+
+    Type is `float`, a member is ejected if its latency is more than this
+    times the latency of the fastest other member.
+
+    ##  etcd.EndpointSelector.cooldown
+
+    Type is `int` or `float`, seconds a member is ejected for the first
+    time. It doubles with each ejection in a row, up to `max_cooldown`.
+
+    ##  etcd.EndpointSelector.on_state_change
+
+    A callable called as `on_state_change(uri, old_state, new_state)` when the
+    circuit breaker of a member changes state, or `None`. States are
+    `closed`, `open` and `half_open`. It is called without any lock held,
+    and an exception it raises is logged and ignored.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # samples before the error rate or the latency of a member is trusted
+    min_samples = 10
+
+    # a latency below this is never an outlier
+    min_outlier_latency = 0.01
+
+    # seconds added to the score of a member for an error rate of 1
+    error_penalty = 1.0
+
+    # scores within this ratio, or within this many seconds, are equally
+    # good. A member that has once been a bit slower is not starved.
+    similar_ratio = 1.5
+    similar_latency = 0.005
+
+    # the score of a member not used for this many seconds is halved, so that
+    # a member that has been slow or failed is tried again after a while.
+    half_life = 10
+
+    # seconds a member put first as a probe by order() waits for the request
+    # to it. If none is sent, such as when the caller chooses another member,
+    # another request can probe it after that.
+    probe_reserve = 1
+
+    def __init__(
+        self,
+        alpha=0.2,
+        max_failures=3,
+        max_error_rate=0.5,
+        outlier_ratio=5,
+        cooldown=5,
+        max_cooldown=60,
+        on_state_change=None,
+    ):
+        """
+        :param alpha: weight of the latest sample in the EWMAs. Defaults to `0.2`.
+        :param max_failures: consecutive failures to eject a member. Defaults to `3`.
+        :param max_error_rate: error rate to eject a member. Defaults to `0.5`.
+        :param outlier_ratio: a member is ejected if its latency is more than this
+        times the latency of the fastest other member. Defaults to `5`.
+        :param cooldown: seconds a member is ejected for the first time. Defaults to `5`.
+        :param max_cooldown: max seconds a member is ejected. Defaults to `60`.
+        :param on_state_change: called as `on_state_change(uri, old_state, new_state)` when
+        the circuit breaker of a member changes state. Defaults to `None`.
+        """
+        self.alpha = alpha
+        self.max_failures = max_failures
+        self.max_error_rate = max_error_rate
+        self.outlier_ratio = outlier_ratio
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.on_state_change = on_state_change
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def _get(self, uri):
+        h = self._health.get(uri)
+        if h is None:
+            h = _EndpointHealth()
+            self._health[uri] = h
+        return h
+
+    def _state(self, h):
+        if h.ejected_until == 0:
+            return self.CLOSED
+        if h.probing or h.reserved_until > time.monotonic():
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def _notify(self, changes):
+        # called without self._lock held
+        for uri, old, new in changes:
+            if old == new:
+                continue
+
+            logger.info("endpoint {u} is {new}, it was {old}".format(u=uri, old=old, new=new))
+            if self.on_state_change is None:
+                continue
+
+            try:
+                self.on_state_change(uri, old, new)
+            except Exception as e:
+                logger.exception(repr(e) + " while call on_state_change of {u}".format(u=uri))
+
+    def _score(self, h, now):
+        # expected seconds to serve one more request
+        latency = h.latency or 0.0
+        score = latency * (h.inflight + 1) + h.error_rate * self.error_penalty
+        return score * 0.5 ** ((now - h.updated) / self.half_life)
+
+    def _choose(self, a, b, now):
+        sa = self._score(self._health[a], now)
+        sb = self._score(self._health[b], now)
+        similar = abs(sa - sb) < self.similar_latency or max(sa, sb) <= min(sa, sb) * self.similar_ratio
+        if similar:
+            # spread the load among members that are equally good
+            return a
+        return a if sa < sb else b
+
+    def order(self, uris, first=None):
+        """
+        Decide the order to try members in for a request.
+        :param uris: client urls of the members, such as `http://127.0.0.1:2379`.
+        :param first: the member to send the request to unless it is ejected,
+        such as the leader for a write. Defaults to `None`.
+        :return: a `list` of `uris` reordered. The first is the one to send the
+        request to, the others are the ones to fail over to. Ejected members
+        are the last.
+        """
+        now = time.monotonic()
+        changes = []
+        with self._lock:
+            healthy, ejected = [], []
+            probe = None
+            for uri in uris:
+                h = self._get(uri)
+                if h.reserved_until != 0 and h.reserved_until <= now:
+                    # no request has been sent to probe it
+                    h.reserved_until = 0
+                    changes.append((uri, self.HALF_OPEN, self.OPEN))
+
+                if h.ejected_until == 0:
+                    healthy.append(uri)
+                elif probe is None and not h.probing and h.reserved_until == 0 and h.ejected_until <= now:
+                    probe = uri
+                else:
+                    ejected.append(uri)
+
+            ejected.sort(key=lambda u: self._health[u].ejected_until)
+
+            if first in healthy:
+                healthy.remove(first)
+                healthy.sort(key=lambda u: self._score(self._health[u], now))
+                if probe is not None:
+                    ejected.insert(0, probe)
+                rst = [first] + healthy + ejected
+
+            else:
+                if len(healthy) >= 2:
+                    # a and b are in random order
+                    a, b = random.sample(healthy, 2)
+                    first = self._choose(a, b, now)
+                    healthy.remove(first)
+                    healthy.sort(key=lambda u: self._score(self._health[u], now))
+                    healthy.insert(0, first)
+
+                if probe is not None:
+                    # half open: one request tells whether it has recovered.
+                    # It is reserved until begin() or release() is called.
+                    self._health[probe].reserved_until = now + self.probe_reserve
+                    changes.append((probe, self.OPEN, self.HALF_OPEN))
+                    healthy.insert(0, probe)
+
+                rst = healthy + ejected
+
+        self._notify(changes)
+        return rst
+
+    def release(self, uri):
+        """
+        Tell no request is sent to the member put first by
+        `etcd.EndpointSelector.order`, so that another request can probe it if
+        it is ejected.
+        :param uri: client url of the member.
+        :return: nothing
+        """
+        with self._lock:
+            h = self._health.get(uri)
+            if h is None or h.reserved_until == 0:
+                return
+            h.reserved_until = 0
+
+        self._notify([(uri, self.HALF_OPEN, self.OPEN)])
+
+    def begin(self, uri):
+        """
+        Tell a request is sent to a member.
+        :param uri: client url of the member.
+        :return: the start time to pass to `etcd.EndpointSelector.done`.
+        """
+        with self._lock:
+            h = self._get(uri)
+            h.inflight += 1
+            if h.reserved_until != 0:
+                # the probe reserved by order() is sent
+                h.reserved_until = 0
+                h.probing = True
+        return time.monotonic()
+
+    def done(self, uri, start, ok):
+        """
+        Tell a request sent to a member has finished.
+        :param uri: client url of the member.
+        :param start: the value returned by `etcd.EndpointSelector.begin`, or
+        `None` if the time taken is not a latency, such as for a watch.
+        :param ok: `True` if the member served it, `False` if it failed such as
+        not connected or timed out, `None` if it tells nothing about the member.
+        :return: nothing
+        """
+        now = time.monotonic()
+        with self._lock:
+            h = self._get(uri)
+            old = self._state(h)
+            self._done(uri, h, start, ok, now)
+            new = self._state(h)
+
+        self._notify([(uri, old, new)])
+
+    def _done(self, uri, h, start, ok, now):
+        # called with self._lock held
+        h.inflight = max(0, h.inflight - 1)
+        probing, h.probing = h.probing, False
+
+        if ok is None:
+            return
+
+        a = self.alpha
+        h.updated = now
+        h.samples += 1
+        h.error_rate = h.error_rate * (1 - a) + (0.0 if ok else 1.0) * a
+
+        if not ok:
+            h.failures += 1
+            if probing or h.failures >= self.max_failures or self._is_error_outlier(h):
+                self._eject(uri, h, now)
+            return
+
+        h.failures = 0
+        if start is not None:
+            latency = now - start
+            h.latency = latency if h.latency is None else h.latency * (1 - a) + latency * a
+
+        if h.ejected_until != 0:
+            # a probe, or the last resort when all failed, succeeded
+            h.ejected_until = 0
+            h.ejections = 0
+            h.error_rate = 0.0
+            h.samples = 0
+            return
+
+        if self._is_latency_outlier(uri, h):
+            self._eject(uri, h, now)
+
+    def _is_error_outlier(self, h):
+        return h.samples >= self.min_samples and h.error_rate > self.max_error_rate
+
+    def _is_latency_outlier(self, uri, h):
+        if h.samples < self.min_samples or h.latency < self.min_outlier_latency:
+            return False
+
+        others = [
+            o.latency
+            for u, o in self._health.items()
+            if u != uri and o.ejected_until == 0 and o.samples >= self.min_samples and o.latency is not None
+        ]
+        return len(others) > 0 and h.latency > min(others) * self.outlier_ratio
+
+    def _eject(self, uri, h, now):
+        cooldown = min(self.cooldown * 2**h.ejections, self.max_cooldown)
+        h.ejections += 1
+        h.ejected_until = now + cooldown
+        logger.info(
+            "eject endpoint {u} for {c} seconds, latency: {l}, error rate: {e:.2f}, failures: {f}".format(
+                u=uri, c=cooldown, l=h.latency, e=h.error_rate, f=h.failures
+            )
+        )
+
+    def stats(self):
+        """
+        :return: a `dict` of the client url of each member seen to a `dict` of
+        `latency`(EWMA in seconds, or `None`), `error_rate`, `failures`,
+        `inflight`, `ejected`(`bool`) and `state`(`closed`, `open` or `half_open`).
+        """
+        with self._lock:
+            return {
+                uri: {
+                    "latency": h.latency,
+                    "error_rate": h.error_rate,
+                    "failures": h.failures,
+                    "inflight": h.inflight,
+                    "ejected": h.ejected_until != 0,
+                    "state": self._state(h),
+                }
+                for uri, h in self._health.items()
+            }
@@ -102,5 +102,12 @@ try:
 
     peerurls = ["http://192.168.0.102:4380"]
     c.change_peerurls("fca771384ed46928", *peerurls)
+
+    c.create_root("123")
+    c.enable_auth("123")
+    c.create_user("u1", "p1", "123", roles=["root"])
+    # root_password is only used by the call it is passed to,
+    # the client keeps sending c.basic_auth_account.
+    c.basic_auth_account = "u1:p1"
 except k3etcd.EtcdException as e:
     print(repr(e))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import asyncio
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    async def asyncSetUp(self):
+        self.c = k3etcd.AsyncClient(host=self.cluster.hosts)
+
+    async def asyncTearDown(self):
+        await self.c.close()
+
+    async def test_set_get(self):
+        res = await self.c.set("key", "val")
+        self.assertTrue(res.newKey)
+        self.assertEqual("val", res.value)
+
+        res = await self.c.get("key")
+        self.assertEqual("/key", res.key)
+        self.assertEqual("val", res.value)
+        self.assertEqual(res.modifiedIndex, res.etcd_index)
+
+        self.assertTrue(await self.c.contains("key"))
+        self.assertFalse(await self.c.contains("not_exist"))
+        self.assertRaises(TypeError, lambda: "key" in self.c)
+
+        self.assertEqual(1, self.cluster.members[0].connections)
+
+    async def test_error(self):
+        with self.assertRaises(k3etcd.EcodeKeyNotFound):
+            await self.c.get("not_exist")
+
+        await self.c.set("key", "val")
+        with self.assertRaises(k3etcd.EcodeNotDir):
+            await self.c.set("key/sub", "val")
+
+    async def test_dir(self):
+        await self.c.mkdir("dir")
+        await self.c.set("dir/a", "1")
+        await self.c.set("dir/sub/b", "2")
+
+        res = await self.c.lsdir("dir")
+        self.assertTrue(res.dir)
+        self.assertEqual(["/dir/a", "/dir/sub"], sorted(n.key for n in res.leaves))
+
+        res = await self.c.rlsdir("dir")
+        self.assertEqual(["/dir/a", "/dir/sub/b"], sorted(n.key for n in res.leaves))
+
+        with self.assertRaises(k3etcd.EcodeDirNotEmpty):
+            await self.c.deldir("dir")
+
+        await self.c.rdeldir("dir")
+        self.assertFalse(await self.c.contains("dir"))
+
+    async def test_delete(self):
+        await self.c.set("key", "val")
+        res = await self.c.delete("key")
+        self.assertEqual("delete", res.action)
+
+        with self.assertRaises(k3etcd.EcodeKeyNotFound):
+            await self.c.delete("key")
+
+    async def test_watch(self):
+        res = await self.c.set("key", "val")
+
+        w = asyncio.ensure_future(self.c.watch("key", timeout=5))
+        await asyncio.sleep(0.1)
+        self.assertFalse(w.done())
+
+        await self.c.set("key", "val2")
+        res = await w
+        self.assertEqual("val2", res.value)
+
+        with self.assertRaises(k3etcd.EtcdReadTimeoutError):
+            await self.c.watch("key", timeout=0.2)
+
+    async def test_many_watches(self):
+        await self.c.set("key", "val")
+        c = k3etcd.AsyncClient(host=self.cluster.hosts, conn_pool=k3etcd.AsyncConnectionPool(max_idle=200))
+        ws = [asyncio.ensure_future(c.watch("key", timeout=5)) for _ in range(100)]
+        for _ in range(300):
+            if self.cluster.store.stats["watchers"] == 100:
+                break
+            await asyncio.sleep(0.01)
+
+        await self.c.set("key", "val2")
+        rsts = await asyncio.gather(*ws)
+        self.assertEqual(["val2"] * 100, [r.value for r in rsts])
+        await c.close()
+
+    async def test_eternal_watch(self):
+        res = await self.c.set("key", "v0")
+
+        async def _write():
+            for i in range(1, 4):
+                await asyncio.sleep(0.05)
+                await self.c.set("key", "v%d" % i)
+
+        w = asyncio.ensure_future(_write())
+
+        vals = []
+        async for r in self.c.eternal_watch("key", waitindex=res.modifiedIndex + 1, until=res.modifiedIndex + 3):
+            vals.append(r.value)
+
+        await w
+        self.assertEqual(["v1", "v2", "v3"], vals)
+
+    async def test_failover(self):
+        c = k3etcd.AsyncClient(host=self.cluster.hosts, read_timeout=2)
+        self.cluster.members[0].stop()
+
+        await c.set("key", "val")
+        self.assertEqual("val", (await c.get("key")).value)
+        self.assertNotEqual(self.cluster.members[0].url, c.base_uri)
+        await c.close()
+
+    async def test_load_machines(self):
+        m = self.cluster.members[0]
+        c = k3etcd.AsyncClient(host=m.host, port=m.port)
+        self.assertEqual([], c._machines_cache)
+
+        await c.set("key", "val")
+        self.assertEqual(sorted(x.url for x in self.cluster.members[1:]), sorted(c._machines_cache))
+        await c.close()
+
+    async def test_members(self):
+        members = await self.c.members
+        self.assertEqual([m.id for m in self.cluster.members], [m["id"] for m in members])
+        self.assertEqual([m.name for m in self.cluster.members], await self.c.names)
+        self.assertEqual([m.url for m in self.cluster.members], await self.c.clienturls)
+
+        leader = await self.c.leader
+        self.assertEqual(self.cluster.leader.id, leader["id"])
+
+        self.assertEqual("2.3.8", (await self.c.version)["etcdserver"])
+
+    async def test_stats(self):
+        await self.c.set("key", "val")
+
+        st = await self.c.st_self
+        self.assertEqual(self.cluster.leader.id, st["leaderInfo"]["leader"])
+
+        st = await self.c.st_store
+        self.assertGreaterEqual(st["setsSuccess"], 1)
+
+        st = await self.c.st_leader
+        self.assertEqual(2, len(st["followers"]))
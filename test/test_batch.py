@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestGetMany(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _requests(self):
+        return [m.requests for m in self.members]
+
+    def _sent(self, before):
+        return sum(self._requests()) - sum(before)
+
+    def test_get_many(self):
+        for i in range(20):
+            self.c.set("k%d/v" % i, str(i))
+        keys = ["k%d/v" % i for i in range(20)]
+
+        before = self._requests()
+        rst = self.c.get_many(keys + ["k0/nx"], concurrency=4)
+
+        self.assertEqual(21, self._sent(before))
+        self.assertEqual([str(i) for i in range(20)], [rst[k].value for k in keys])
+        self.assertEqual("/k3/v", rst["k3/v"].key)
+        self.assertIsInstance(rst["k0/nx"], k3etcd.EcodeKeyNotFound)
+
+    def test_same_key(self):
+        self.c.set("a", "1")
+        rst = self.c.get_many(["a", "/a"])
+        self.assertEqual({"a", "/a"}, set(rst))
+        self.assertEqual("1", rst["/a"].value)
+
+    def test_coalesce(self):
+        for i in range(10):
+            self.c.set("d/%d" % i, str(i))
+        self.c.set("d/sub/x", "x")
+        self.c.set("e", "e")
+
+        keys = ["d/%d" % i for i in range(10)]
+        before = self._requests()
+        rst = self.c.get_many(keys + ["d/nx", "d/sub", "e"], coalesce=8)
+
+        # one for dir d, one for d/sub and one for e
+        self.assertEqual(3, self._sent(before))
+        for i in range(10):
+            res = rst["d/%d" % i]
+            self.assertEqual(str(i), res.value)
+            self.assertEqual("/d/%d" % i, res.key)
+            self.assertGreater(res.etcd_index, 0)
+
+        self.assertIsInstance(rst["d/nx"], k3etcd.EcodeKeyNotFound)
+        self.assertIn("x-etcd-index", rst["d/nx"].args[0]["headers"])
+        self.assertEqual(["/d/sub/x"], [n.key for n in rst["d/sub"].leaves])
+        self.assertEqual("e", rst["e"].value)
+
+    def test_coalesce_hidden(self):
+        for i in range(3):
+            self.c.set("d/%d" % i, str(i))
+        self.c.set("d/_x", "x")
+
+        keys = ["d/%d" % i for i in range(3)]
+        before = self._requests()
+        rst = self.c.get_many(keys + ["d/_x"], coalesce=2)
+
+        # a hidden key is not listed in its dir and is read alone
+        self.assertEqual(2, self._sent(before))
+        self.assertEqual("x", rst["d/_x"].value)
+        self.assertEqual(["0", "1", "2"], [rst[k].value for k in keys])
+
+    def test_coalesce_dir_not_found(self):
+        rst = self.c.get_many(["nx/%d" % i for i in range(3)], coalesce=2)
+        self.assertEqual(3, len(rst))
+        for v in rst.values():
+            self.assertIsInstance(v, k3etcd.EcodeKeyNotFound)
+
+    def test_spread(self):
+        for i in range(9):
+            self.c.set("k%d" % i, str(i))
+        keys = ["k%d" % i for i in range(9)]
+
+        before = self._requests()
+        rst = self.c.get_many(keys, spread=True, coalesce=0)
+        self.assertEqual([str(i) for i in range(9)], [rst[k].value for k in keys])
+        self.assertEqual([3, 3, 3], [a - b for a, b in zip(self._requests(), before)])
+
+        before = self._requests()
+        self.c.get_many(keys, spread=True, coalesce=0, quorum=True)
+        self.assertEqual(9, self._sent(before))
+
+    def test_spread_failover(self):
+        self.c.set("k", "v")
+        self.members[1].stop()
+
+        rst = self.c.get_many(["k%d" % i for i in range(6)] + ["k"], spread=True, coalesce=0)
+        self.assertEqual("v", rst["k"].value)
+        self.assertIsInstance(rst["k1"], k3etcd.EcodeKeyNotFound)
+
+
+class TestWriteMany(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+        self.member = self.cluster.members[0]
+        # only talk to self.member, not to discover the members in background
+        self.c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def test_write_many(self):
+        items = (("d/k%d" % i, str(i)) for i in range(200))
+        rst = self.c.write_many(items, concurrency=4)
+
+        self.assertTrue(rst.ok)
+        self.assertEqual(200, len(rst))
+        self.assertEqual(("d/k7", "7"), rst.items[7])
+        self.assertEqual("/d/k7", rst.results[7].key)
+        self.assertEqual(200, len(list(self.c.get("d").leaves)))
+        self.assertLessEqual(self.member.connections, 4)
+
+    def test_write_options(self):
+        self.c.set("a", "1")
+        self.c.set("b", "1")
+        rst = self.c.write_many(
+            [
+                {"key": "a", "value": "2", "prevValue": "1"},
+                {"key": "b", "value": "2", "prevValue": "x"},
+                {"key": "b", "value": "2", "prevExist": False},
+                {"key": "c", "value": "1", "ttl": 100},
+                {"key": "dir", "dir": True},
+                {"key": "nx", "value": "1", "prevIndex": 1},
+            ]
+        )
+
+        self.assertFalse(rst.ok)
+        self.assertEqual("compareAndSwap", rst.results[0].action)
+        self.assertIsInstance(rst.results[1], k3etcd.EcodeTestFailed)
+        self.assertIsInstance(rst.results[2], k3etcd.EcodeNodeExist)
+        self.assertEqual(100, rst.results[3].ttl)
+        self.assertTrue(rst.results[4].dir)
+        self.assertIsInstance(rst.results[5], k3etcd.EcodeKeyNotFound)
+
+        self.assertEqual(["a", "c", "dir"], [i["key"] for i, _ in rst.succeeded])
+        self.assertEqual(["b", "b", "nx"], [i["key"] for i, _ in rst.failed])
+        self.assertEqual("1", self.c.get("b").value)
+
+    def test_delete_many(self):
+        for i in range(20):
+            self.c.set("k%d" % i, str(i))
+        res = self.c.set("x", "1")
+
+        items = ["k%d" % i for i in range(20)] + ["nx", {"key": "x", "prevIndex": res.modifiedIndex + 1}]
+        rst = self.c.delete_many(items, concurrency=3)
+
+        self.assertEqual(22, len(rst))
+        self.assertEqual(20, len(rst.succeeded))
+        self.assertEqual("delete", rst.results[0].action)
+        self.assertIsInstance(rst.results[20], k3etcd.EcodeKeyNotFound)
+        self.assertIsInstance(rst.results[21], k3etcd.EcodeTestFailed)
+
+        self.assertFalse("k0" in self.c)
+        self.assertTrue("x" in self.c)
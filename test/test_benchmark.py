@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+import os
+import tempfile
+import unittest
+
+from k3etcd import benchmark
+from k3etcd.benchmark.__main__ import main
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run(self):
+        rst = benchmark.run(ops=20, threads=2, tree_sizes=[250], events=5, repeat=2)
+        json.dumps(rst)
+
+        sc = rst["scenarios"]
+        self.assertEqual(
+            [
+                "get_set",
+                "recursive_read",
+                "json_codec",
+                "watch_latency",
+                "failover",
+                "partial_outage",
+                "leader_writes",
+                "hedged_read",
+            ],
+            list(sc),
+        )
+        self.assertEqual(20, sc["get_set"]["set"]["count"])
+        self.assertEqual(20, sc["get_set"]["get"]["count"])
+        self.assertEqual(250, sc["recursive_read"][0]["nodes"])
+        self.assertIn("loads_tree_250_us", sc["json_codec"]["json"])
+        self.assertEqual(5, sc["watch_latency"]["long_poll"]["count"])
+        self.assertEqual(5, sc["watch_latency"]["stream"]["count"])
+        self.assertEqual(2, sc["failover"]["count"])
+        self.assertEqual(20, sum(sc["partial_outage"]["requests"]))
+        self.assertLessEqual(sc["leader_writes"]["redirects"], 1)
+        self.assertEqual(20, sc["hedged_read"]["hedged"]["count"])
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, benchmark.run, names=["foo"])
+
+    def test_summary(self):
+        st = benchmark.summary([0.001 * i for i in range(1, 101)])
+        self.assertEqual(100, st["count"])
+        self.assertEqual(51.0, st["p50_ms"])
+        self.assertEqual(100.0, st["p99_ms"])
+        self.assertEqual(100.0, st["max_ms"])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as d:
+            fn = os.path.join(d, "rst.json")
+            main(["get_set", "--ops", "10", "--output", fn])
+            with open(fn) as f:
+                rst = json.load(f)
+
+        self.assertEqual(["get_set"], list(rst["scenarios"]))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+def _wait_for(cond, timeout=3):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+
+    return False
+
+
+class TestReadCache(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+        self.member = self.cluster.members[0]
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        self.c.close()
+        self.cluster.stop()
+
+    def _cache(self, **argkv):
+        cache = k3etcd.ReadCache(self.c, **argkv)
+        self.caches.append(cache)
+        self.assertTrue(_wait_for(lambda: cache._applied_index is not None))
+        return cache
+
+    def test_hit(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf")
+
+        self.assertEqual("1", cache.get("conf/a").value)
+        requests = self.member.requests
+        for _ in range(10):
+            self.assertEqual("1", cache.get("/conf/a").value)
+
+        self.assertEqual(requests, self.member.requests)
+        self.assertEqual(10, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_returns_copy(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf")
+
+        res = cache.get("conf/a")
+        res.value = "2"
+        self.assertEqual("1", cache.get("conf/a").value)
+
+    def test_invalidate_on_change(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf")
+        self.assertEqual("1", cache.get("conf/a").value)
+
+        self.c.set("conf/a", "2")
+        self.assertTrue(_wait_for(lambda: cache.get("conf/a").value == "2"))
+
+        self.c.delete("conf/a")
+        self.assertTrue(_wait_for(lambda: "/conf/a" not in cache._entries))
+        self.assertRaises(k3etcd.EcodeKeyNotFound, cache.get, "conf/a")
+
+    def test_invalidate_dir(self):
+        self.c.set("conf/d/a", "1")
+        cache = self._cache(prefix="conf")
+
+        self.assertEqual(["/conf/d/a"], [n.key for n in cache.get("conf/d").leaves])
+        cache.get("conf/d/a")
+
+        self.c.set("conf/d/b", "2")
+        self.assertTrue(_wait_for(lambda: "/conf/d" not in cache._entries))
+        self.assertIn("/conf/d/a", cache._entries)
+
+        self.c.delete("conf/d", recursive=True)
+        self.assertTrue(_wait_for(lambda: "/conf/d/a" not in cache._entries))
+
+    def test_ignore_old_read(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf")
+
+        res = self.c.get("conf/a")
+        self.c.set("conf/b", "2")
+        self.assertTrue(_wait_for(lambda: cache._applied_index > res.etcd_index))
+
+        # read before the last applied event
+        cache._put("/conf/a", res)
+        self.assertNotIn("/conf/a", cache._entries)
+
+    def test_bypass(self):
+        self.c.set("conf/a", "1")
+        self.c.set("other", "1")
+        cache = self._cache(prefix="conf")
+
+        cache.get("other")
+        cache.get("conf", recursive=True)
+        self.assertEqual({}, dict(cache._entries))
+        self.assertEqual(0, cache.misses)
+
+    def test_lru(self):
+        for k in "abc":
+            self.c.set("conf/" + k, k)
+        cache = self._cache(prefix="conf", max_size=2)
+
+        cache.get("conf/a")
+        cache.get("conf/b")
+        cache.get("conf/a")
+        cache.get("conf/c")
+
+        self.assertEqual(["/conf/a", "/conf/c"], list(cache._entries))
+
+    def test_ttl(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf", ttl=0.1)
+
+        cache.get("conf/a")
+        cache.get("conf/a")
+        self.assertEqual(1, cache.misses)
+
+        time.sleep(0.15)
+        cache.get("conf/a")
+        self.assertEqual(2, cache.misses)
+
+    def test_stale_while_revalidate(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf", ttl=0.1, stale_while_revalidate=True)
+
+        cache.get("conf/a")
+        cached_at = cache._entries["/conf/a"][1]
+        time.sleep(0.15)
+
+        self.assertEqual("1", cache.get("conf/a").value)
+        self.assertEqual(1, cache.misses)
+        self.assertTrue(_wait_for(lambda: cache._entries["/conf/a"][1] > cached_at))
+
+    def test_invalidate(self):
+        self.c.set("conf/a", "1")
+        cache = self._cache(prefix="conf")
+
+        cache.get("conf/a")
+        cache.invalidate("conf/a")
+        self.assertEqual({}, dict(cache._entries))
+
+        cache.get("conf/a")
+        cache.invalidate()
+        self.assertEqual({}, dict(cache._entries))
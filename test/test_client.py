@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import threading
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestClientThreads(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def _run_threads(self, n, target):
+        errors = []
+
+        def _work(i):
+            try:
+                target(i)
+            except Exception as e:
+                errors.append(e)
+
+        ths = [threading.Thread(target=_work, args=(i,)) for i in range(n)]
+        for th in ths:
+            th.start()
+        for th in ths:
+            th.join()
+
+        return errors
+
+    def test_shared_client(self):
+        c = k3etcd.Client(host=self.cluster.hosts)
+
+        def _work(i):
+            for j in range(20):
+                c.set("k%d" % i, "v%d" % j)
+                self.assertEqual("v%d" % j, c.get("k%d" % i).value)
+
+        self.assertEqual([], self._run_threads(8, _work))
+
+    def test_failover_with_threads(self):
+        c = k3etcd.Client(host=self.cluster.hosts, read_timeout=2)
+
+        def _work(i):
+            for j in range(20):
+                c.set("k%d" % i, "v%d" % j)
+
+        self.cluster.members[0].stop()
+        errors = self._run_threads(8, _work)
+        self.assertEqual([], errors)
+
+        base_uri, machines = c._endpoints()
+        self.assertNotEqual(self.cluster.members[0].url, base_uri)
+        self.assertEqual(2, len(machines))
+        self.assertEqual(3, len(set([base_uri] + machines)))
+
+    def test_per_call_auth(self):
+        member = self.cluster.members[0]
+        c = k3etcd.Client(host=self.cluster.hosts, basic_auth_account="u:p", allow_reconnect=False)
+
+        self.assertRaises(k3etcd.EtcdException, c.get_user, "u", "123")
+        self.assertEqual("Basic cm9vdDoxMjM=", member.last_authorization)
+        self.assertEqual("u:p", c.basic_auth_account)
+
+        c.set("key", "val")
+        self.assertEqual("Basic dTpw", member.last_authorization)
+
+
+class TestClusterStats(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def test_stats(self):
+        rst = self.c.cluster_stats()
+        self.assertEqual([m.url for m in self.members], list(rst))
+        for m in self.members:
+            st = rst[m.url]
+            self.assertEqual(m.name, st["self"]["name"])
+            self.assertIn("getsSuccess", st["store"])
+            self.assertEqual("2.3.8", st["version"]["etcdserver"])
+
+        self.assertEqual("StateLeader", rst[self.members[0].url]["self"]["state"])
+
+    def test_concurrent(self):
+        self.c.machines
+        for m in self.members:
+            m.delay = 0.2
+
+        t0 = time.monotonic()
+        rst = self.c.cluster_stats()
+        self.assertLess(time.monotonic() - t0, 0.4)
+        for st in rst.values():
+            self.assertEqual(["self", "store", "version"], sorted(st))
+            for v in st.values():
+                self.assertIsInstance(v, dict)
+
+    def test_partial(self):
+        self.c.machines
+        slow, down = self.members[1], self.members[2]
+        slow.delay = 1
+        down.stop()
+
+        t0 = time.monotonic()
+        rst = self.c.cluster_stats(timeout=0.3)
+        self.assertLess(time.monotonic() - t0, 0.6)
+
+        self.assertEqual(self.members[0].name, rst[self.members[0].url]["self"]["name"])
+        for v in rst[slow.url].values():
+            self.assertIsInstance(v, k3etcd.EtcdReadTimeoutError)
+        for v in rst[down.url].values():
+            self.assertIsInstance(v, k3etcd.EtcdException)
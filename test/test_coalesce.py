@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import threading
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestCoalesceReads(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.c.set("k", "v")
+
+        for m in self.members:
+            m.delay = 0.2
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _requests(self):
+        return sum(m.requests for m in self.members)
+
+    def _concurrent(self, calls, c=None):
+        if c is None:
+            c = self.c
+
+        rst = [None] * len(calls)
+
+        def _call(i):
+            key, argkv = calls[i]
+            try:
+                rst[i] = c.get(key, **argkv)
+            except k3etcd.EtcdException as e:
+                rst[i] = e
+
+        ths = [threading.Thread(target=_call, args=(i,)) for i in range(len(calls))]
+        for th in ths:
+            th.start()
+        for th in ths:
+            th.join()
+        return rst
+
+    def test_identical(self):
+        before = self._requests()
+        rst = self._concurrent([("k", {})] * 20 + [("/k", {})] * 5)
+        self.assertEqual(1, self._requests() - before)
+
+        for r in rst:
+            self.assertEqual("v", r.value)
+        self.assertEqual(25, len(set(id(r) for r in rst)))
+
+        # not in flight any more
+        before = self._requests()
+        self.c.get("k")
+        self.assertEqual(1, self._requests() - before)
+
+    def test_options(self):
+        before = self._requests()
+        calls = [("k", {}), ("k", {"quorum": True}), ("k", {"quorum": False}), ("k", {"sorted": True})]
+        rst = self._concurrent(calls * 5)
+        self.assertEqual(4, self._requests() - before)
+        for r in rst:
+            self.assertEqual("v", r.value)
+
+    def test_error(self):
+        before = self._requests()
+        rst = self._concurrent([("nonexistent", {})] * 10)
+        self.assertEqual(1, self._requests() - before)
+        for r in rst:
+            self.assertIsInstance(r, k3etcd.EcodeKeyNotFound)
+
+    def test_wait(self):
+        res = self.c.get("k")
+        before = self._requests()
+
+        th = threading.Timer(0.5, self.c.set, args=("k", "v2"))
+        th.start()
+        rst = self._concurrent([("k", {"wait": True, "waitIndex": res.modifiedIndex + 1})] * 3)
+        th.join()
+
+        for r in rst:
+            self.assertEqual("v2", r.value)
+        self.assertEqual(4, self._requests() - before)
+
+    def test_disabled(self):
+        c = k3etcd.Client(host=self.cluster.hosts, coalesce_reads=False)
+        try:
+            before = self._requests()
+            self._concurrent([("k", {})] * 5, c=c)
+            self.assertEqual(5, self._requests() - before)
+        finally:
+            c.close()
+
+    def _start(self, argkv, rst):
+        def _call():
+            t0 = time.monotonic()
+            try:
+                rst.append(self.c.get("k", **argkv))
+            except k3etcd.EtcdException as e:
+                rst.append(e)
+            rst.append(time.monotonic() - t0)
+
+        th = threading.Thread(target=_call)
+        th.start()
+        return th
+
+    def test_follower_timeout(self):
+        for m in self.members:
+            m.delay = 1
+
+        first, second = [], []
+        th = self._start({"timeout": 3}, first)
+        time.sleep(0.05)
+        self._start({"timeout": 0.3}, second).join()
+
+        # it does not wait for the one in flight longer than its timeout
+        self.assertIsInstance(second[0], k3etcd.EtcdReadTimeoutError)
+        self.assertLess(second[1], 0.5)
+
+        th.join()
+        self.assertEqual("v", first[0].value)
+
+    def test_leader_timeout(self):
+        for m in self.members:
+            m.delay = 0.5
+
+        first, second = [], []
+        th = self._start({"timeout": 0.3}, first)
+        time.sleep(0.05)
+        self._start({"timeout": 3}, second).join()
+        th.join()
+
+        self.assertIsInstance(first[0], k3etcd.EtcdReadTimeoutError)
+        # it reads again with the time it has left
+        self.assertEqual("v", second[0].value)
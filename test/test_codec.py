@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+
+import k3etcd
+from k3etcd import codec
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class CountingCodec(k3etcd.JsonCodec):
+    name = "counting"
+
+    def __init__(self):
+        self.loaded = 0
+        self.dumped = 0
+
+    def loads(self, data):
+        self.loaded += 1
+        return super(CountingCodec, self).loads(data)
+
+    def dumps(self, obj):
+        self.dumped += 1
+        return super(CountingCodec, self).dumps(obj)
+
+
+class TestGetCodec(unittest.TestCase):
+    def test_auto(self):
+        names = codec.available_codecs()
+        self.assertIn("json", names)
+        self.assertIn("k3utfjson", names)
+
+        self.assertEqual(names[0], k3etcd.get_codec().name)
+        self.assertEqual(names[0], k3etcd.get_codec("auto").name)
+        if codec.orjson is not None:
+            self.assertEqual("orjson", names[0])
+
+    def test_name(self):
+        for name in codec.available_codecs():
+            c = k3etcd.get_codec(name)
+            self.assertIsInstance(c, k3etcd.JsonCodec)
+            self.assertEqual(name, c.name)
+
+    def test_instance(self):
+        c = CountingCodec()
+        self.assertIs(c, k3etcd.get_codec(c))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, k3etcd.get_codec, "simplejson")
+        for name, mod in codec._modules.items():
+            if mod is None:
+                self.assertRaises(ValueError, k3etcd.get_codec, name)
+
+    def test_loads_dumps(self):
+        obj = {"key": "/é", "value": "1", "nodes": [{"ttl": 3, "dir": True}], "x": None}
+        for name in codec.available_codecs():
+            c = k3etcd.get_codec(name)
+
+            body = c.dumps(obj)
+            self.assertIsInstance(body, bytes, name)
+            self.assertIn("é".encode("utf-8"), body, name)
+            self.assertEqual(obj, c.loads(body), name)
+            self.assertEqual(obj, c.loads(body.decode("utf-8")), name)
+
+            self.assertEqual({"v": "é"}, c.loads(c.dumps({"v": "é".encode("utf-8")})), name)
+            self.assertRaises(ValueError, c.loads, b'{"a":')
+
+
+class TestClientCodec(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def test_client(self):
+        for name in codec.available_codecs():
+            c = k3etcd.Client(host=self.cluster.hosts, json_codec=name)
+            try:
+                self.assertEqual(name, c.json_codec.name)
+                c.set("d/" + name, "é")
+                self.assertEqual("é", c.get("d/" + name).value)
+                self.assertRaises(k3etcd.EcodeKeyNotFound, c.get, "nx")
+                self.assertIn("etcdserver", c.version)
+            finally:
+                c.close()
+
+    def test_custom(self):
+        cc = CountingCodec()
+        c = k3etcd.Client(host=self.cluster.hosts, json_codec=cc)
+        try:
+            c.set("k", "v")
+            self.assertEqual("v", c.get("k").value)
+            self.assertRaises(k3etcd.EcodeKeyNotFound, c.get, "nx")
+        finally:
+            c.close()
+
+        self.assertEqual(3, cc.loaded)
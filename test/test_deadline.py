@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestDeadline(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.c.set("k", "v")
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _slow(self, delay):
+        for m in self.members:
+            m.delay = delay
+
+    def test_failover(self):
+        self._slow(1)
+
+        t0 = time.monotonic()
+        self.assertRaises(k3etcd.EtcdReadTimeoutError, self.c.get, "k", timeout=0.3)
+        self.assertLess(time.monotonic() - t0, 0.6)
+
+        # the default deadline is read_timeout
+        c = k3etcd.Client(host=self.cluster.hosts, read_timeout=0.3)
+        try:
+            t0 = time.monotonic()
+            self.assertRaises(k3etcd.EtcdReadTimeoutError, c.get, "k")
+            self.assertLess(time.monotonic() - t0, 0.6)
+        finally:
+            c.close()
+
+    def test_in_time(self):
+        self._slow(0.1)
+        self.assertEqual("v", self.c.get("k", timeout=0.5).value)
+
+    def test_redirect(self):
+        self.cluster.redirect_to_leader = True
+        self._slow(0.2)
+
+        follower = self.members[1]
+        c = k3etcd.Client(host=follower.host, port=follower.port, allow_reconnect=False)
+        try:
+            t0 = time.monotonic()
+            self.assertRaises(
+                k3etcd.EtcdReadTimeoutError,
+                c.api_execute,
+                "/v2/keys/k",
+                "PUT",
+                params={"value": "v2"},
+                timeout=0.3,
+            )
+            self.assertLess(time.monotonic() - t0, 0.5)
+            self.assertEqual(1, follower.redirects)
+        finally:
+            c.close()
+
+    def test_retry(self):
+        policy = k3etcd.RetryPolicy(max_attempts=100, base_delay=0.05, max_delay=0.05, budget=1, burst=100)
+        c = k3etcd.Client(host=self.cluster.hosts, retry_policy=policy)
+        try:
+            self.cluster.elections = 1000
+            t0 = time.monotonic()
+            self.assertRaises(k3etcd.EtcdReadTimeoutError, c.get, "k", timeout=0.3)
+            self.assertLess(time.monotonic() - t0, 0.5)
+            self.assertGreater(policy.retries, 2)
+        finally:
+            c.close()
+
+    def test_get_many(self):
+        self._slow(1)
+
+        t0 = time.monotonic()
+        rst = self.c.get_many(["k", "a/k1", "b/k2"], timeout=0.3)
+        self.assertLess(time.monotonic() - t0, 0.6)
+        for r in rst.values():
+            self.assertIsInstance(r, k3etcd.EtcdReadTimeoutError)
+
+    def test_hedge(self):
+        self._slow(1)
+
+        t0 = time.monotonic()
+        self.assertRaises(k3etcd.EtcdReadTimeoutError, self.c.get, "k", timeout=0.3, hedge=True)
+        self.assertLess(time.monotonic() - t0, 0.6)
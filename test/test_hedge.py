@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestReadHedger(unittest.TestCase):
+    def test_delay(self):
+        h = k3etcd.ReadHedger(percentile=0.9, min_delay=0.002, max_delay=1)
+        for _ in range(19):
+            h.record(0.01)
+        self.assertEqual(1, h.delay())
+
+        h.record(0.01)
+        self.assertEqual(0.01, h.delay())
+
+        for i in range(80):
+            h.record(0.01 if i < 70 else 0.05)
+        self.assertEqual(0.05, h.delay())
+
+        h = k3etcd.ReadHedger(min_delay=0.002, max_delay=0.1)
+        for _ in range(20):
+            h.record(0.0001)
+        self.assertEqual(0.002, h.delay())
+        for _ in range(100):
+            h.record(5)
+        self.assertEqual(0.1, h.delay())
+
+    def test_budget(self):
+        h = k3etcd.ReadHedger(budget=0.5, burst=2)
+        self.assertTrue(h.allow())
+        self.assertTrue(h.allow())
+        self.assertFalse(h.allow())
+
+        h.begin()
+        self.assertFalse(h.allow())
+        h.begin()
+        self.assertTrue(h.allow())
+
+        for _ in range(100):
+            h.begin()
+        self.assertTrue(h.allow())
+        self.assertTrue(h.allow())
+        self.assertFalse(h.allow())
+
+        self.assertEqual(102, h.reads)
+        self.assertEqual(5, h.hedges)
+
+
+class TestClientHedge(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+
+        c = k3etcd.Client(host=self.cluster.hosts)
+        c.set("k", "v")
+        for i in range(10):
+            c.set("d/k%d" % i, str(i))
+        c.close()
+
+        # reads go to the leader first, which is slow
+        self.slow = self.members[0]
+        self.slow.delay = 0.3
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def _client(self, **argkv):
+        hedger = k3etcd.ReadHedger(**argkv)
+        for _ in range(20):
+            hedger.record(0.005)
+
+        c = k3etcd.Client(host=self.cluster.hosts, read_policy="leader_only", read_hedger=hedger)
+        c.leader
+        return c
+
+    def test_read(self):
+        c = self._client()
+        try:
+            for _ in range(5):
+                t0 = time.monotonic()
+                self.assertEqual("v", c.get("k", hedge=True).value)
+                self.assertLess(time.monotonic() - t0, 0.2)
+
+            self.assertEqual(5, c.read_hedger.reads)
+            self.assertEqual(5, c.read_hedger.hedges)
+
+            # the cancelled reads are not failures of the slow member
+            st = c.endpoint_selector.stats()[self.slow.url]
+            self.assertEqual(0, st["failures"])
+            self.assertEqual(0, st["error_rate"])
+
+            self.assertRaises(k3etcd.EcodeKeyNotFound, c.get, "nonexistent", hedge=True)
+        finally:
+            c.close()
+
+    def test_not_hedged(self):
+        c = self._client()
+        try:
+            t0 = time.monotonic()
+            self.assertEqual("v", c.get("k").value)
+            self.assertGreaterEqual(time.monotonic() - t0, 0.3)
+            self.assertEqual(0, c.read_hedger.reads)
+        finally:
+            c.close()
+
+    def test_fast_member(self):
+        c = self._client()
+        self.slow.delay = 0
+        try:
+            # connect first, it may take longer than the hedge delay
+            c.get("k")
+            for _ in range(5):
+                self.assertEqual("v", c.get("k", hedge=True).value)
+            self.assertEqual(0, c.read_hedger.hedges)
+        finally:
+            c.close()
+
+    def test_budget(self):
+        c = self._client(budget=0, burst=1)
+        try:
+            t0 = time.monotonic()
+            self.assertEqual("v", c.get("k", hedge=True).value)
+            self.assertLess(time.monotonic() - t0, 0.2)
+
+            t0 = time.monotonic()
+            self.assertEqual("v", c.get("k", hedge=True).value)
+            self.assertGreaterEqual(time.monotonic() - t0, 0.3)
+
+            self.assertEqual(1, c.read_hedger.hedges)
+        finally:
+            c.close()
+
+    def test_get_many(self):
+        c = self._client(burst=20)
+        try:
+            keys = ["k"] + ["d/k%d" % i for i in range(10)]
+            t0 = time.monotonic()
+            rst = c.get_many(keys, coalesce=0, hedge=True)
+            self.assertLess(time.monotonic() - t0, 0.5)
+
+            self.assertEqual("v", rst["k"].value)
+            self.assertEqual(["%d" % i for i in range(10)], [rst["d/k%d" % i].value for i in range(10)])
+            self.assertEqual(11, c.read_hedger.hedges)
+        finally:
+            c.close()
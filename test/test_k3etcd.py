@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import copy
 import time
 import unittest
 import k3etcd
@@ -185,6 +186,98 @@ class TestEtcdKeysResult(unittest.TestCase):
             res2 = k3etcd.EtcdKeysResult(**node2)
             self.assertEqual(res1 == res2, expected_res)
 
+    def test_lazy_node(self):
+        node = {"key": "/a", "value": "1", "modifiedIndex": 3}
+        res = k3etcd.EtcdKeysResult("get", node)
+        self.assertEqual("1", res.value)
+        self.assertIsNone(res.ttl)
+        self.assertFalse(res.dir)
+        self.assertEqual([], res._children)
+        self.assertRaises(AttributeError, setattr, res, "foo", 1)
+        self.assertRaises(AttributeError, getattr, res, "_prev_node")
+
+        # changing a copy changes neither the original nor the decoded node
+        res2 = copy.copy(res)
+        res2.value = "2"
+        self.assertEqual("2", res2.value)
+        self.assertEqual("1", res.value)
+        self.assertEqual("1", node["value"])
+        self.assertNotEqual(res, res2)
+
+        self.assertIn("'value': '1'", repr(res))
+        self.assertIn("'action': 'get'", repr(res))
+
+    def test_prev_node(self):
+        res = k3etcd.EtcdKeysResult("update", {"key": "/d", "ttl": 120}, prevNode={"key": "/d", "dir": True, "ttl": 50})
+        self.assertTrue(res.dir)
+        self.assertEqual(50, res._prev_node.ttl)
+
+    def _tree(self):
+        return k3etcd.EtcdKeysResult(
+            "get",
+            {
+                "key": "/t",
+                "dir": True,
+                "nodes": [
+                    {
+                        "key": "/t/a",
+                        "dir": True,
+                        "nodes": [
+                            {"key": "/t/a/x", "value": "1"},
+                            {"key": "/t/a/y", "value": "2"},
+                        ],
+                    },
+                    {"key": "/t/b", "value": "3"},
+                    {"key": "/t/e", "dir": True},
+                ],
+            },
+        )
+
+    def test_walk(self):
+        res = self._tree()
+
+        keys = [n.key for n in res.walk()]
+        self.assertEqual(["/t", "/t/a", "/t/a/x", "/t/a/y", "/t/b", "/t/e"], keys)
+        self.assertEqual(keys, [n.key for n in res.get_subtree()])
+
+        keys = [n.key for n in res.walk(order="bfs")]
+        self.assertEqual(["/t", "/t/a", "/t/b", "/t/e", "/t/a/x", "/t/a/y"], keys)
+
+        keys = [n.key for n in res.walk(leaves_only=True, order="bfs")]
+        self.assertEqual(["/t/b", "/t/e", "/t/a/x", "/t/a/y"], keys)
+
+        keys = [n.key for n in res.walk(key_filter=lambda k: k != "/t/a")]
+        self.assertEqual(["/t", "/t/b", "/t/e"], keys)
+
+        self.assertRaises(ValueError, list, res.walk(order="foo"))
+
+    def test_walk_deep(self):
+        node = {"key": "/leaf", "value": "v"}
+        for i in range(5000):
+            node = {"key": "/d%d" % i, "dir": True, "nodes": [node]}
+
+        res = k3etcd.EtcdKeysResult("get", node)
+        self.assertEqual(["/leaf"], [n.key for n in res.leaves])
+        self.assertEqual(5001, len(list(res.walk())))
+        self.assertEqual({"/leaf": "v"}, res.to_flat_map())
+
+    def test_export(self):
+        res = self._tree()
+
+        self.assertEqual({"/t/a/x": "1", "/t/a/y": "2", "/t/b": "3"}, res.to_flat_map())
+        self.assertEqual(
+            {"/t/a": None, "/t/a/x": "1", "/t/a/y": "2", "/t/b": "3", "/t/e": None},
+            res.to_flat_map(dirs=True),
+        )
+        self.assertEqual({"/t/b": "3"}, res.to_flat_map(key_filter=lambda k: k != "/t/a"))
+
+        self.assertEqual({"a": {"x": "1", "y": "2"}, "b": "3", "e": {}}, res.to_dict())
+        self.assertEqual({"b": "3", "e": {}}, res.to_dict(key_filter=lambda k: k != "/t/a"))
+
+        leaf = k3etcd.EtcdKeysResult("get", {"key": "/k", "value": "v"})
+        self.assertEqual({"/k": "v"}, leaf.to_flat_map())
+        self.assertEqual({}, leaf.to_dict())
+
 
 class TestException(unittest.TestCase):
     def test_errorcode_exception(self):
@@ -258,6 +351,10 @@ class TestClient(unittest.TestCase):
 
         for host, port, allow_reconnect, expected_machines in cases:
             c = k3etcd.Client(host=host, port=port, allow_reconnect=allow_reconnect)
+            if allow_reconnect:
+                # the members are refreshed in background
+                c.membership.refresh()
+                c._sync_membership()
             self.assertEqual("http://192.168.52.30:3379", c._base_uri)
             self.assertListEqual(expected_machines, c._machines_cache)
 
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestLeaderAffinity(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.cluster.redirect_to_leader = True
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _counts(self):
+        return [(m.requests, m.redirects) for m in self.members]
+
+    def _sent(self, before):
+        return [(a[0] - b[0], a[1] - b[1]) for a, b in zip(self._counts(), before)]
+
+    def test_write(self):
+        self.assertIsNone(self.c.leader_uri)
+
+        # learnt from the first redirect
+        for i in range(5):
+            self.c.set("k", str(i))
+        self.assertEqual(self.members[0].url, self.c.leader_uri)
+
+        before = self._counts()
+        for i in range(20):
+            self.c.set("k%d" % i, str(i))
+        self.c.delete("k0")
+        self.c.write_many([("w%d" % i, str(i)) for i in range(10)])
+
+        self.assertEqual([(31, 0), (0, 0), (0, 0)], self._sent(before))
+        self.assertEqual("19", self.c.get("k19").value)
+
+    def test_reads(self):
+        self.c.set("k", "v")
+
+        before = self._counts()
+        for _ in range(60):
+            self.assertEqual("v", self.c.get("k").value)
+        sent = self._sent(before)
+        for n, redirects in sent:
+            self.assertGreater(n, 5)
+            self.assertEqual(0, redirects)
+
+        for _ in range(10):
+            self.assertEqual("v", self.c.get("k", quorum=True).value)
+
+        before = self._counts()
+        for _ in range(10):
+            self.assertEqual("v", self.c.get("k", quorum=True).value)
+        self.assertEqual([(10, 0), (0, 0), (0, 0)], self._sent(before))
+
+    def test_leader_property(self):
+        self.assertEqual(self.members[0].id, self.c.leader["id"])
+        self.assertEqual(self.members[0].url, self.c.leader_uri)
+
+        before = self._counts()
+        self.c.set("k", "v")
+        self.assertEqual([(1, 0), (0, 0), (0, 0)], self._sent(before))
+
+    def test_leader_change(self):
+        self.c.leader
+        self.cluster.leader = self.members[1]
+
+        before = self._counts()
+        self.c.set("k", "1")
+        self.assertEqual([(1, 1), (1, 0), (0, 0)], self._sent(before))
+        self.assertEqual(self.members[1].url, self.c.leader_uri)
+
+        before = self._counts()
+        self.c.set("k", "2")
+        self.assertEqual([(0, 0), (1, 0), (0, 0)], self._sent(before))
+
+    def test_leader_down(self):
+        self.c.leader
+        self.members[0].stop()
+        self.cluster.leader = self.members[2]
+
+        # the stopped one is forgotten and the new one is learnt
+        for i in range(20):
+            self.c.set("k", str(i))
+        self.assertEqual(self.members[2].url, self.c.leader_uri)
+
+        before = self._counts()
+        self.c.set("k", "2")
+        self.assertEqual([(0, 0), (0, 0), (1, 0)], self._sent(before))
+        self.assertEqual("2", self.c.get("k").value)
+
+
+class TestReadPolicy(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.cluster.redirect_to_leader = True
+        self.members = self.cluster.members
+
+        self.cluster.leader = self.members[1]
+        c = k3etcd.Client(host=self.cluster.hosts)
+        c.set("k", "v")
+        c.close()
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def _reads(self, policy, n=30, **argkv):
+        c = k3etcd.Client(host=self.cluster.hosts, read_policy=policy)
+        try:
+            # finds the leader
+            c.get("k", **argkv)
+
+            before = [m.requests for m in self.members]
+            for _ in range(n):
+                self.assertEqual("v", c.get("k", **argkv).value)
+            return [m.requests - b for m, b in zip(self.members, before)]
+        finally:
+            c.close()
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, k3etcd.Client, host=self.cluster.hosts, read_policy="random")
+
+    def test_nearest(self):
+        for n in self._reads("nearest"):
+            self.assertGreater(n, 3)
+
+    def test_round_robin_followers(self):
+        self.assertEqual([15, 0, 15], self._reads("round_robin_followers"))
+
+    def test_leader_only(self):
+        self.assertEqual([0, 30, 0], self._reads("leader_only"))
+
+    def test_quorum(self):
+        self.assertEqual([0, 30, 0], self._reads("quorum"))
+
+        # not redirected, it is not a quorum read
+        sent = self._reads("quorum", quorum=False)
+        self.assertEqual(30, sum(sent))
+        self.assertEqual(0, sum(m.redirects for m in self.members))
+
+    def test_get_many(self):
+        c = k3etcd.Client(host=self.cluster.hosts, read_policy="round_robin_followers")
+        try:
+            c.leader
+
+            before = [m.requests for m in self.members]
+            rst = c.get_many(["k"] + ["k%d" % i for i in range(9)], coalesce=0)
+            self.assertEqual("v", rst["k"].value)
+            self.assertEqual([5, 0, 5], [m.requests - b for m, b in zip(self.members, before)])
+        finally:
+            c.close()
+
+    def test_read_stream(self):
+        c = k3etcd.Client(host=self.cluster.hosts, read_policy="quorum")
+        try:
+            self.assertEqual(["/k"], [n.key for n in c.read_stream("/")])
+            self.assertEqual(self.members[1].url, c.leader_uri)
+        finally:
+            c.close()
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _requests(self):
+        return sum(m.requests for m in self.members)
+
+    def test_cached(self):
+        ids = [m.id for m in self.members]
+        self.assertEqual(self.members[0].id, self.c.leader["id"])
+
+        before = self._requests()
+        for _ in range(3):
+            self.assertEqual(ids, self.c.ids)
+            self.assertEqual([m.name for m in self.members], self.c.names)
+            self.assertEqual([m.url for m in self.members], self.c.clienturls)
+            self.assertEqual(3, len(self.c.peerurls))
+            self.assertEqual(self.members[0].id, self.c.leader["id"])
+        self.assertEqual(before, self._requests())
+
+        # a copy is returned
+        self.c.members[0]["id"] = "x"
+        self.c.leader["clientURLs"].append("x")
+        self.assertEqual(ids, self.c.ids)
+        self.assertEqual([self.members[0].url], self.c.leader["clientURLs"])
+
+    def test_ttl(self):
+        c = k3etcd.Client(host=self.cluster.hosts, metadata_ttl=0)
+        try:
+            before = self._requests()
+            c.ids
+            c.names
+            c.leader
+            self.assertEqual(before + 4, self._requests())
+        finally:
+            c.close()
+
+    def test_invalidate(self):
+        self.c.leader
+        self.cluster.leader = self.members[1]
+        self.assertEqual(self.members[0].id, self.c.leader["id"])
+
+        self.c.invalidate_metadata("leader")
+        before = self._requests()
+        self.assertEqual(self.members[1].id, self.c.leader["id"])
+        # members are still cached
+        self.assertEqual(before + 1, self._requests())
+
+        self.c.invalidate_metadata()
+        before = self._requests()
+        self.c.ids
+        self.assertEqual(before + 1, self._requests())
+
+    def test_leader_learnt(self):
+        self.cluster.redirect_to_leader = True
+        self.c.leader
+        self.cluster.leader = self.members[1]
+
+        # a redirect tells the new leader
+        self.c.set("k", "v")
+        self.assertEqual(self.members[1].id, self.c.leader["id"])
+
+    def test_st_leader(self):
+        st = self.c.st_leader
+        self.assertEqual(self.members[0].id, st["leader"])
+
+        # no new client, no discovery
+        before = [m.requests for m in self.members]
+        st = self.c.st_leader
+        self.assertEqual(self.members[0].id, st["leader"])
+        self.assertEqual([1, 0, 0], [m.requests - b for m, b in zip(self.members, before)])
+        self.assertEqual(1, self.members[0].connections)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestMembership(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.urls = [m.url for m in self.members]
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def _requests(self):
+        return sum(m.requests for m in self.members)
+
+    def _wait(self, cond, timeout=2):
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < timeout:
+            if cond():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_refresh(self):
+        m = k3etcd.Membership([self.urls[0]])
+        self.assertFalse(m.fresh())
+
+        self.assertTrue(m.refresh())
+        self.assertEqual(self.urls, m.members)
+        self.assertEqual(1, m.version)
+        self.assertTrue(m.fresh())
+
+        # unchanged
+        self.assertTrue(m.refresh())
+        self.assertEqual(1, m.version)
+
+        m.ttl = 0
+        self.assertFalse(m.fresh())
+
+    def test_refresh_failover(self):
+        self.members[0].stop()
+        m = k3etcd.Membership(self.urls)
+        self.assertTrue(m.refresh())
+        self.assertEqual(1, self.members[1].requests)
+
+        for member in self.members:
+            member.stop()
+        self.assertFalse(m.refresh())
+        self.assertEqual(self.urls, m.members)
+
+    def test_shared(self):
+        a = k3etcd.Membership.shared(self.urls)
+        b = k3etcd.Membership.shared(list(reversed(self.urls)))
+        self.assertIs(a, b)
+        self.assertIsNot(a, k3etcd.Membership.shared(self.urls, version_prefix="/v3"))
+        self.assertIsNot(a, k3etcd.Membership.shared(self.urls[:1]))
+
+
+class TestClientMembership(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.urls = [m.url for m in self.members]
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def _requests(self):
+        return sum(m.requests for m in self.members)
+
+    def _wait(self, cond, timeout=2):
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < timeout:
+            if cond():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_lazy(self):
+        c = k3etcd.Client(host=self.cluster.hosts)
+        self.assertEqual(0, self._requests())
+        c.close()
+
+    def test_discover(self):
+        first = self.members[0]
+        c = k3etcd.Client(host=first.host, port=first.port)
+        try:
+            # found in background
+            self.assertTrue(self._wait(lambda: c.membership.version > 0))
+            c.set("k", "v")
+            base_uri, machines = c._endpoints()
+            self.assertEqual(first.url, base_uri)
+            self.assertEqual(self.urls[1:], machines)
+        finally:
+            c.close()
+
+    def test_shared(self):
+        a = k3etcd.Client(host=self.cluster.hosts)
+        b = k3etcd.Client(host=self.cluster.hosts)
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+        try:
+            self.assertIs(a.membership, b.membership)
+            self.assertIsNone(c.membership)
+        finally:
+            a.close()
+            b.close()
+            c.close()
+
+    def test_machines(self):
+        c = k3etcd.Client(host=self.cluster.hosts)
+        try:
+            self.assertEqual(self.urls, c.machines)
+            self.assertTrue(c.membership.fresh())
+
+            # cached
+            before = self._requests()
+            self.assertEqual(self.urls, c.machines)
+            self.assertEqual(before, self._requests())
+
+            c.membership.ttl = 0
+            self.assertEqual(self.urls, c.machines)
+            self.assertEqual(before + 1, self._requests())
+        finally:
+            c.close()
+
+    def test_changed(self):
+        m = k3etcd.Membership(self.urls[:2], interval=100)
+        c = k3etcd.Client(host=self.cluster.hosts[:2], membership=m)
+        try:
+            c.set("k", "v")
+            self.assertEqual(self.urls[:2], [c.base_uri] + c._machines_cache)
+
+            self.assertTrue(m.refresh())
+            self.members[0].stop()
+            self.members[1].stop()
+            self.assertEqual("v", c.get("k").value)
+            self.assertEqual(self.urls, sorted([c.base_uri] + c._machines_cache, key=self.urls.index))
+        finally:
+            c.close()
+
+    def test_wake_on_error(self):
+        woken = []
+
+        class _Membership(k3etcd.Membership):
+            def wake(self):
+                woken.append(True)
+                super(_Membership, self).wake()
+
+        c = k3etcd.Client(host=self.cluster.hosts, membership=_Membership(self.urls, interval=100))
+        try:
+            c.set("k", "v")
+            self.assertEqual([], woken)
+
+            for m in self.members:
+                m.stop()
+            self.assertRaises(k3etcd.NoMoreMachineError, c.get, "k")
+            # by each pass over the members
+            self.assertEqual(3, len(woken))
+        finally:
+            c.close()
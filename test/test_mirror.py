@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+def _wait_for(cond, timeout=3):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+
+    return False
+
+
+class TestTreeMirror(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+        self.member = self.cluster.members[0]
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.mirrors = []
+
+    def tearDown(self):
+        for m in self.mirrors:
+            m.close()
+        self.c.close()
+        self.cluster.stop()
+
+    def _mirror(self, prefix):
+        m = k3etcd.TreeMirror(self.c, prefix, retry_interval=0.1)
+        self.mirrors.append(m)
+        return m
+
+    def test_snapshot(self):
+        self.c.set("svc/web/1", "a")
+        self.c.set("svc/web/2", "b")
+        self.c.set("svc/db/1", "c")
+        self.c.set("other", "d")
+
+        m = self._mirror("svc")
+        self.assertEqual(self.c.get("svc").etcd_index, m.index)
+
+        self.assertEqual("a", m.get("svc/web/1").value)
+        self.assertTrue(m.get("/svc/web").dir)
+        self.assertIn("/svc/db/1", m)
+        self.assertNotIn("/other", m)
+        self.assertRaises(k3etcd.EcodeKeyNotFound, m.get, "svc/web/3")
+
+        self.assertEqual(["/svc/db", "/svc/web"], [n.key for n in m.ls()])
+        self.assertEqual(["/svc/web/1", "/svc/web/2"], [n.key for n in m.ls("svc/web")])
+        self.assertRaises(k3etcd.EcodeKeyNotFound, m.ls, "svc/cache")
+
+        self.assertEqual(["/svc/db/1", "/svc/web/1", "/svc/web/2"], m.keys())
+        self.assertEqual(["/svc/web/1", "/svc/web/2"], m.keys("svc/web"))
+
+    def test_follow_changes(self):
+        self.c.set("svc/web/1", "a")
+        m = self._mirror("svc")
+
+        requests = self.member.requests
+        self.c.set("svc/web/1", "a2")
+        self.c.set("svc/web/2", "b")
+        self.c.set("svc/cache/x/1", "c")
+        self.c.delete("svc/web/1")
+
+        self.assertTrue(_wait_for(lambda: m.index == self.c.get("svc").etcd_index))
+        self.assertNotIn("/svc/web/1", m)
+        self.assertEqual("b", m.get("svc/web/2").value)
+        self.assertEqual(["/svc/cache/x/1", "/svc/web/2"], m.keys())
+        self.assertEqual(["/svc/cache/x"], [n.key for n in m.ls("svc/cache")])
+
+        self.c.delete("svc/cache", recursive=True)
+        self.assertTrue(_wait_for(lambda: "/svc/cache" not in m))
+        self.assertEqual(["/svc/web/2"], m.keys())
+
+        # lookups do not send requests
+        requests = self.member.requests
+        for _ in range(10):
+            m.get("svc/web/2")
+            m.ls("svc")
+        self.assertEqual(requests, self.member.requests)
+
+    def test_missing_prefix(self):
+        self.c.set("other", "d")
+        m = self._mirror("svc")
+        self.assertEqual([], m.ls())
+        self.assertEqual(self.c.get("other").etcd_index, m.index)
+
+        self.c.set("svc/web/1", "a")
+        self.assertTrue(_wait_for(lambda: "/svc/web/1" in m))
+        self.assertIn("/svc", m)
+
+    def test_resume_after_restart(self):
+        self.c.set("svc/web/1", "a")
+        m = self._mirror("svc")
+
+        self.member.stop()
+        self.member.start()
+        self.c.set("svc/web/2", "b")
+
+        self.assertTrue(_wait_for(lambda: "/svc/web/2" in m))
+
+    def test_resnapshot_on_cleared_index(self):
+        self.c.set("svc/web/1", "a")
+        m = self._mirror("svc")
+
+        snapshots = []
+        _snapshot = m._snapshot
+
+        def _count():
+            snapshots.append(1)
+            _snapshot()
+
+        m._snapshot = _count
+
+        # the events the watch waits for are cleared from the history
+        store = self.cluster.store
+        with store.cond:
+            history, store.history = store.history, [(10**6, "/x", None)] * 1000
+
+        self.assertTrue(_wait_for(lambda: len(snapshots) > 0))
+        with store.cond:
+            store.history = history
+
+        self.c.set("svc/web/2", "b")
+        self.assertTrue(_wait_for(lambda: "/svc/web/2" in m))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+import tracemalloc
+import unittest
+
+import k3etcd
+from k3etcd import nodestream
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+from k3etcd.benchmark.scenarios import make_tree
+
+
+def _split(body, size):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+class TestIterNodes(unittest.TestCase):
+    body = {
+        "action": "get",
+        "node": {
+            "key": "/a",
+            "dir": True,
+            "nodes": [
+                {"key": "/a/é}", "value": '1.5e3 "x" {[', "modifiedIndex": 12345},
+                {"key": "/a/x}", "dir": True, "nodes": [{"key": "/a/x}/1", "value": "1"}]},
+                {"key": "/a/sub", "dir": True, "nodes": [{"key": "/a/sub/2", "value": "2"}], "modifiedIndex": 4},
+                {"key": "/a/empty", "dir": True, "nodes": []},
+                {"key": "/a/e2", "dir": True},
+            ],
+            "modifiedIndex": 3,
+        },
+    }
+
+    def test_iter_nodes(self):
+        body = json.dumps(self.body, ensure_ascii=False, indent=1).encode("utf-8")
+        expected = [
+            ({"key": "/a/é}", "value": '1.5e3 "x" {[', "modifiedIndex": 12345}, True),
+            ({"key": "/a/x}/1", "value": "1"}, True),
+            ({"key": "/a/x}", "dir": True}, False),
+            ({"key": "/a/sub/2", "value": "2"}, True),
+            ({"key": "/a/sub", "dir": True, "modifiedIndex": 4}, False),
+            ({"key": "/a/empty", "dir": True}, True),
+            ({"key": "/a/e2", "dir": True}, True),
+            ({"key": "/a", "dir": True, "modifiedIndex": 3}, False),
+        ]
+
+        for size in (1, 2, 3, 7, 100, len(body)):
+            self.assertEqual(expected, list(nodestream.iter_nodes(_split(body, size))), size)
+
+    def test_file(self):
+        body = b'{"action":"get","node":{"key":"/k","value":"v","modifiedIndex":10}}'
+        self.assertEqual(
+            [({"key": "/k", "value": "v", "modifiedIndex": 10}, True)], list(nodestream.iter_nodes([body]))
+        )
+
+    def test_invalid(self):
+        body = json.dumps(self.body).encode("utf-8")
+        self.assertRaises(ValueError, list, nodestream.iter_nodes(_split(body[:-10], 10)))
+        self.assertRaises(ValueError, list, nodestream.iter_nodes([b"[]"]))
+
+    def test_bounded_memory(self):
+        body = make_tree(20000)
+        chunks = _split(body, 16 * 1024)
+
+        tracemalloc.start()
+        try:
+            n = sum(1 for _, is_leaf in nodestream.iter_nodes(iter(chunks)) if is_leaf)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(20000, n)
+        self.assertLess(peak, len(body) / 4)
+
+
+class TestReadStream(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def test_read_stream(self):
+        for i in range(300):
+            self.c.set("d/s%d/k%d" % (i % 7, i), "v%d" % i)
+        self.c.mkdir("d/empty")
+
+        res = self.c.rlsdir("d")
+        expected = sorted((n.key, n.value) for n in res.leaves)
+
+        got = list(self.c.read_stream("d", chunk_size=512))
+        self.assertEqual(expected, sorted((n.key, n.value) for n in got))
+        self.assertEqual(res.etcd_index, got[0].etcd_index)
+
+        keys = [n.key for n in self.c.read_stream("d", leaves_only=False)]
+        self.assertEqual(301 + 7 + 1, len(keys))
+        self.assertEqual("/d", keys[-1])
+
+    def test_not_found(self):
+        self.assertRaises(k3etcd.EcodeKeyNotFound, list, self.c.read_stream("nx"))
+
+    def test_file(self):
+        self.c.set("k", "v")
+        self.assertEqual([("/k", "v")], [(n.key, n.value) for n in self.c.read_stream("k")])
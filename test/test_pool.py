@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+        self.member = self.cluster.members[0]
+
+    def tearDown(self):
+        self.cluster.stop()
+
+    def _pretend_alive(self, pool):
+        # pretend the health check missed the closed socket
+        for conns in pool._idle.values():
+            for h in conns:
+                h.is_alive = lambda: True
+
+    def test_reuse_connection(self):
+        # only talk to self.member, not to discover the members in background
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+        for i in range(20):
+            c.set("key", "val%d" % i)
+            self.assertEqual("val%d" % i, c.get("key").value)
+
+        self.assertEqual(1, self.member.connections)
+        c.close()
+
+    def test_shared_pool(self):
+        pool = k3etcd.ConnectionPool()
+        c1 = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False, conn_pool=pool)
+        c2 = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False, conn_pool=pool)
+
+        c1.set("key", "val")
+        self.assertEqual("val", c2.get("key").value)
+        self.assertEqual(1, self.member.connections)
+        c1.close()
+        c2.close()
+
+    def test_max_idle(self):
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False, conn_pool=k3etcd.ConnectionPool(max_idle=0))
+        c.set("key", "val")
+        c.get("key")
+        self.assertEqual(2, self.member.connections)
+        c.close()
+
+    def test_idle_timeout(self):
+        c = k3etcd.Client(
+            host=self.cluster.hosts, allow_reconnect=False, conn_pool=k3etcd.ConnectionPool(idle_timeout=0.1)
+        )
+        c.set("key", "val")
+        time.sleep(0.2)
+        c.get("key")
+        self.assertEqual(2, self.member.connections)
+        c.close()
+
+    def test_release_unconnected(self):
+        h = k3etcd.HttpConnection(self.member.host, self.member.port)
+        pool = k3etcd.ConnectionPool()
+        pool.release(h)
+        self.assertIsNone(h.sock)
+        self.assertEqual({}, pool._idle)
+
+    def test_is_alive(self):
+        pool = k3etcd.ConnectionPool()
+        c = k3etcd.Client(host=self.cluster.hosts, conn_pool=pool)
+        c.set("key", "val")
+
+        h = pool._idle[(self.member.host, self.member.port)][0]
+        self.assertTrue(h.is_alive())
+
+        self.member.stop()
+        self.assertFalse(h.is_alive())
+        c.close()
+
+    def test_reconnect_dead_connection(self):
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+        c.set("key", "val")
+
+        # server restart closes the pooled socket
+        self.member.stop()
+        self.member.start()
+
+        self.assertEqual("val", c.get("key").value)
+        self.assertEqual(2, self.member.connections)
+        c.close()
+
+    def test_error_response_keeps_connection(self):
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+        for _ in range(3):
+            self.assertRaises(k3etcd.EcodeKeyNotFound, c.get, "not_exist")
+
+        self.assertEqual(1, self.member.connections)
+        c.close()
+
+    def test_json_body_length(self):
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+        c.set("我", "我")
+        self.assertEqual("我", c.get("我").value)
+        self.assertEqual(1, self.member.connections)
+        c.close()
+
+    def test_retry_on_reused_connection(self):
+        pool = k3etcd.ConnectionPool()
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False, conn_pool=pool)
+        c.set("key", "val")
+
+        self.member.stop()
+        self.member.start()
+        self._pretend_alive(pool)
+
+        self.assertEqual("val", c.get("key").value)
+        self.assertEqual(2, self.member.connections)
+        c.close()
+
+    def test_no_replay_for_write(self):
+        pool = k3etcd.ConnectionPool()
+        c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False, conn_pool=pool)
+        c.set("key", "val")
+
+        def _reset():
+            raise ConnectionResetError("closed after the request is sent")
+
+        for conns in pool._idle.values():
+            for h in conns:
+                h.read_response = _reset
+
+        # the server handles the write, it must not be sent again
+        requests = self.member.requests
+        self.assertRaises(k3etcd.NoMoreMachineError, c.set, "key", "val2")
+
+        for _ in range(100):
+            if self.member.requests > requests:
+                break
+            time.sleep(0.01)
+        time.sleep(0.1)
+
+        self.assertEqual(requests + 1, self.member.requests)
+        self.assertEqual("val2", c.get("key").value)
+        c.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_retryable(self):
+        p = k3etcd.RetryPolicy()
+        self.assertTrue(p.retryable(None))
+        self.assertTrue(p.retryable(300))
+        self.assertTrue(p.retryable(301))
+        self.assertFalse(p.retryable(100))
+        self.assertFalse(p.retryable(500))
+
+    def test_backoff(self):
+        p = k3etcd.RetryPolicy(base_delay=0.1, max_delay=0.3)
+        for attempt, cap in ((1, 0.1), (2, 0.2), (3, 0.3), (10, 0.3)):
+            delays = [p.backoff(attempt) for _ in range(200)]
+            self.assertLessEqual(max(delays), cap)
+            self.assertGreaterEqual(min(delays), 0)
+            # jittered
+            self.assertGreater(len(set(delays)), 100)
+
+    def test_allow(self):
+        p = k3etcd.RetryPolicy(max_attempts=3)
+        self.assertTrue(p.allow(1, None))
+        self.assertTrue(p.allow(2, 301))
+        self.assertFalse(p.allow(3, None))
+        self.assertFalse(p.allow(1, 100))
+        self.assertEqual(2, p.retries)
+
+    def test_budget(self):
+        p = k3etcd.RetryPolicy(max_attempts=10, budget=0.5, burst=2)
+        self.assertTrue(p.allow(1, None))
+        self.assertTrue(p.allow(1, None))
+        self.assertFalse(p.allow(1, None))
+        self.assertEqual(1, p.exhausted)
+
+        p.begin()
+        p.begin()
+        self.assertTrue(p.allow(1, None))
+        self.assertFalse(p.allow(1, None))
+
+        self.assertEqual(2, p.calls)
+        self.assertEqual(3, p.retries)
+        self.assertEqual(2, p.exhausted)
+
+
+class TestClientRetry(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.policy = k3etcd.RetryPolicy(base_delay=0.01)
+        self.c = k3etcd.Client(host=self.cluster.hosts, retry_policy=self.policy)
+        self.c.set("k", "v")
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _requests(self):
+        return sum(m.requests for m in self.members)
+
+    def test_election(self):
+        self.cluster.elections = 2
+        self.assertEqual("v", self.c.get("k").value)
+        self.assertEqual(2, self.policy.retries)
+
+        self.cluster.elections = 1
+        self.c.set("k", "v2")
+        self.assertEqual("v2", self.c.get("k").value)
+        self.assertEqual(3, self.policy.retries)
+
+    def test_max_attempts(self):
+        self.cluster.elections = 100
+        before = self._requests()
+        try:
+            self.c.get("k")
+            self.fail("EtcdInternalError expected")
+        except k3etcd.EtcdInternalError as e:
+            self.assertEqual(301, e.args[0]["errorCode"])
+
+        self.assertEqual(3, self._requests() - before)
+        self.assertEqual(2, self.policy.retries)
+
+    def test_not_retried(self):
+        before = self._requests()
+        self.assertRaises(k3etcd.EcodeKeyNotFound, self.c.get, "nonexistent")
+        self.assertRaises(k3etcd.EcodeNodeExist, self.c.write, "k", "v", prevExist=False)
+        self.assertEqual(2, self._requests() - before)
+        self.assertEqual(0, self.policy.retries)
+
+    def test_budget(self):
+        policy = k3etcd.RetryPolicy(base_delay=0.01, budget=0, burst=1)
+        c = k3etcd.Client(host=self.cluster.hosts, retry_policy=policy)
+        try:
+            self.cluster.elections = 100
+            self.assertRaises(k3etcd.EtcdInternalError, c.get, "k")
+            self.assertEqual(1, policy.retries)
+
+            # no more retry
+            before = self._requests()
+            self.assertRaises(k3etcd.EtcdInternalError, c.get, "k")
+            self.assertEqual(1, self._requests() - before)
+            self.assertEqual(1, policy.retries)
+            self.assertEqual(2, policy.exhausted)
+        finally:
+            c.close()
+
+    def test_all_down(self):
+        for m in self.members:
+            m.stop()
+
+        t0 = time.monotonic()
+        self.assertRaises(k3etcd.NoMoreMachineError, self.c.get, "k")
+        self.assertLess(time.monotonic() - t0, 1)
+        self.assertEqual(2, self.policy.retries)
+
+        # works again once a member is back
+        self.members[1].start()
+        self.c.set("k", "v3")
+        self.assertEqual("v3", self.c.get("k").value)
+
+    def test_write_not_replayed(self):
+        for m in self.members:
+            m.stop()
+
+        self.assertRaises(k3etcd.NoMoreMachineError, self.c.set, "k", "v2")
+        self.assertEqual(0, self.policy.retries)
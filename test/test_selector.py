@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+uris = ["http://a:1", "http://b:1", "http://c:1"]
+
+
+class TestEndpointSelector(unittest.TestCase):
+    def _serve(self, s, uri, latency, ok=True, n=1):
+        for _ in range(n):
+            s.begin(uri)
+            s.done(uri, time.monotonic() - latency, ok)
+
+    def test_order(self):
+        s = k3etcd.EndpointSelector()
+        for _ in range(20):
+            self.assertEqual(sorted(uris), sorted(s.order(uris)))
+
+        self._serve(s, uris[0], 0.5)
+        self._serve(s, uris[1], 0.001)
+        for _ in range(20):
+            self.assertEqual(uris[1], s.order(uris[:2])[0])
+
+        # the slowest is never the first of two chosen at random
+        self._serve(s, uris[2], 0.01)
+        for _ in range(50):
+            order = s.order(uris)
+            self.assertNotEqual(uris[0], order[0])
+            self.assertEqual(uris[0], order[-1])
+
+    def test_inflight(self):
+        s = k3etcd.EndpointSelector()
+        self._serve(s, uris[0], 0.01)
+        self._serve(s, uris[1], 0.01)
+
+        for _ in range(3):
+            s.begin(uris[0])
+        self.assertEqual(3, s.stats()[uris[0]]["inflight"])
+        for _ in range(20):
+            self.assertEqual(uris[1], s.order(uris[:2])[0])
+
+    def test_eject(self):
+        s = k3etcd.EndpointSelector(max_failures=3, cooldown=0.1)
+        self._serve(s, uris[0], 0.001, ok=False, n=2)
+        self.assertFalse(s.stats()[uris[0]]["ejected"])
+
+        self._serve(s, uris[0], 0.001, ok=False)
+        st = s.stats()[uris[0]]
+        self.assertTrue(st["ejected"])
+        self.assertEqual(3, st["failures"])
+        for _ in range(20):
+            self.assertEqual(uris[0], s.order(uris)[-1])
+
+        # half open: one probe at a time after the cooldown
+        time.sleep(0.1)
+        self.assertEqual(uris[0], s.order(uris)[0])
+        self.assertEqual(uris[0], s.order(uris)[-1])
+
+        # failed probe, ejected for twice as long
+        self._serve(s, uris[0], 0.001, ok=False)
+        time.sleep(0.1)
+        self.assertEqual(uris[0], s.order(uris)[-1])
+        time.sleep(0.1)
+        self.assertEqual(uris[0], s.order(uris)[0])
+
+        self._serve(s, uris[0], 0.001)
+        st = s.stats()[uris[0]]
+        self.assertFalse(st["ejected"])
+        self.assertEqual(0, st["failures"])
+        self.assertEqual(0, st["error_rate"])
+
+    def test_state_change(self):
+        changes = []
+        s = k3etcd.EndpointSelector(max_failures=2, cooldown=0.1, on_state_change=lambda *a: changes.append(a))
+
+        self._serve(s, uris[0], 0.001, ok=False)
+        self.assertEqual([], changes)
+        self.assertEqual("closed", s.stats()[uris[0]]["state"])
+
+        self._serve(s, uris[0], 0.001, ok=False)
+        self.assertEqual([(uris[0], "closed", "open")], changes)
+        self.assertEqual("open", s.stats()[uris[0]]["state"])
+
+        time.sleep(0.1)
+        s.order(uris)
+        self.assertEqual((uris[0], "open", "half_open"), changes[-1])
+        self.assertEqual("half_open", s.stats()[uris[0]]["state"])
+
+        self._serve(s, uris[0], 0.001, ok=False)
+        self.assertEqual((uris[0], "half_open", "open"), changes[-1])
+
+        time.sleep(0.2)
+        s.order(uris)
+        self._serve(s, uris[0], 0.001)
+        self.assertEqual((uris[0], "half_open", "closed"), changes[-1])
+        self.assertEqual(5, len(changes))
+
+    def test_probe_not_sent(self):
+        s = k3etcd.EndpointSelector(max_failures=1, cooldown=0.1)
+        s.probe_reserve = 0.1
+        self._serve(s, uris[0], 0.001, ok=False)
+        time.sleep(0.1)
+
+        self.assertEqual(uris[0], s.order(uris)[0])
+        self.assertNotEqual(uris[0], s.order(uris)[0])
+
+        # released by the caller that did not send it
+        s.release(uris[0])
+        self.assertEqual("open", s.stats()[uris[0]]["state"])
+        self.assertEqual(uris[0], s.order(uris)[0])
+
+        # or expired
+        self.assertEqual("half_open", s.stats()[uris[0]]["state"])
+        time.sleep(0.1)
+        self.assertEqual("open", s.stats()[uris[0]]["state"])
+        self.assertEqual(uris[0], s.order(uris)[0])
+
+        # it is probing once sent
+        self._serve(s, uris[0], 0.001)
+        self.assertEqual("closed", s.stats()[uris[0]]["state"])
+
+    def test_state_change_error(self):
+        def _raise(*args):
+            raise ValueError("monitoring is down")
+
+        s = k3etcd.EndpointSelector(max_failures=1, on_state_change=_raise)
+        self._serve(s, uris[0], 0.001, ok=False)
+        self.assertEqual("open", s.stats()[uris[0]]["state"])
+
+    def test_not_judged(self):
+        s = k3etcd.EndpointSelector(max_failures=1)
+        s.begin(uris[0])
+        s.done(uris[0], None, None)
+        s.begin(uris[0])
+        s.done(uris[0], None, True)
+
+        st = s.stats()[uris[0]]
+        self.assertEqual(
+            {"latency": None, "error_rate": 0, "failures": 0, "inflight": 0, "ejected": False, "state": "closed"}, st
+        )
+
+    def test_latency_outlier(self):
+        s = k3etcd.EndpointSelector(outlier_ratio=5)
+        self._serve(s, uris[0], 0.002, n=10)
+        self._serve(s, uris[1], 0.05, n=9)
+        self.assertFalse(s.stats()[uris[1]]["ejected"])
+
+        self._serve(s, uris[1], 0.05)
+        self.assertTrue(s.stats()[uris[1]]["ejected"])
+
+        # not an outlier if all are slow
+        self._serve(s, uris[2], 0.005, n=20)
+        self.assertFalse(s.stats()[uris[2]]["ejected"])
+
+
+class TestClientSelector(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.members = self.cluster.members
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.c.set("k", "v")
+
+    def tearDown(self):
+        self.c.close()
+        self.cluster.stop()
+
+    def _requests(self):
+        return [m.requests for m in self.members]
+
+    def test_spread(self):
+        before = self._requests()
+        for _ in range(60):
+            self.c.get("k")
+
+        for a, b in zip(self._requests(), before):
+            self.assertGreater(a - b, 5)
+
+    def test_slow_member(self):
+        for _ in range(30):
+            self.c.get("k")
+
+        self.members[1].delay = 0.05
+        before = self._requests()
+        for _ in range(100):
+            self.c.get("k")
+
+        sent = [a - b for a, b in zip(self._requests(), before)]
+        self.assertLess(sent[1], 10)
+        self.assertEqual(100, sum(sent))
+
+    def test_down_member(self):
+        self.members[0].stop()
+        for _ in range(20):
+            self.assertEqual("v", self.c.get("k").value)
+
+        # it is avoided after the first failure, or ejected
+        st = self.c.endpoint_selector.stats()[self.members[0].url]
+        self.assertGreater(st["error_rate"], 0)
+        self.assertLessEqual(st["failures"], 3)
+
+    def test_black_hole(self):
+        changes = []
+        s = k3etcd.EndpointSelector(max_failures=1, on_state_change=lambda *a: changes.append(a))
+        c = k3etcd.Client(host=self.cluster.hosts, read_timeout=0.2, endpoint_selector=s)
+        self.members[0].delay = 2
+        try:
+            timeouts = 0
+            for _ in range(30):
+                try:
+                    self.assertEqual("v", c.get("k").value)
+                except k3etcd.EtcdReadTimeoutError:
+                    timeouts += 1
+
+            # short-circuited once it has failed
+            self.assertEqual(1, timeouts)
+            self.assertEqual([(self.members[0].url, "closed", "open")], changes)
+            self.assertEqual("open", s.stats()[self.members[0].url]["state"])
+        finally:
+            c.close()
+
+    def test_probe_hedged_spread(self):
+        s = k3etcd.EndpointSelector(max_failures=1, cooldown=0.1)
+        c = k3etcd.Client(host=self.cluster.hosts, endpoint_selector=s)
+        down = self.members[0]
+        try:
+            down.stop()
+            # until it is chosen and fails
+            for _ in range(50):
+                self.assertEqual("v", c.get("k").value)
+                if s.stats().get(down.url, {}).get("state") == "open":
+                    break
+            self.assertEqual("open", s.stats()[down.url]["state"])
+
+            down.start()
+            time.sleep(0.1)
+            c.get_many(["k"], spread=True, hedge=True, coalesce=0)
+            for _ in range(20):
+                self.assertEqual("v", c.get("k", hedge=True).value)
+
+            self.assertEqual("closed", s.stats()[down.url]["state"])
+        finally:
+            c.close()
+
+    def test_connect_time(self):
+        m = self.members[0]
+        c = k3etcd.Client(host=m.host, port=m.port, allow_reconnect=False)
+        try:
+            c.get("k")
+            st = c.endpoint_selector.stats()[m.url]
+            self.assertIsNone(st["latency"])
+            self.assertEqual(0, st["failures"])
+
+            c.get("k")
+            self.assertIsNotNone(c.endpoint_selector.stats()[m.url]["latency"])
+        finally:
+            c.close()
+
+    def test_shared(self):
+        s = k3etcd.EndpointSelector()
+        c = k3etcd.Client(host=self.cluster.hosts, endpoint_selector=s)
+        c.get("k")
+        c.close()
+
+        self.assertIs(s, c.endpoint_selector)
+        self.assertEqual(set(m.url for m in self.members), set(s.stats()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import threading
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+class TestEternalWatch(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=3).start()
+        self.member = self.cluster.members[0]
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.writer = k3etcd.Client(host=self.cluster.hosts)
+
+    def tearDown(self):
+        self.c.close()
+        self.writer.close()
+        self.cluster.stop()
+
+    def _write_later(self, key, vals, interval=0.05):
+        def _write():
+            for v in vals:
+                time.sleep(interval)
+                self.writer.set(key, v)
+
+        th = threading.Thread(target=_write)
+        th.daemon = True
+        th.start()
+        return th
+
+    def test_keep_alive(self):
+        # only talk to self.member
+        for c in (self.c, self.writer):
+            c.close()
+        self.c = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+        self.writer = k3etcd.Client(host=self.cluster.hosts, allow_reconnect=False)
+
+        res = self.writer.set("key", "v0")
+        vals = ["v%d" % i for i in range(1, 6)]
+        th = self._write_later("key", vals)
+
+        got = []
+        for r in self.c.eternal_watch("key", waitindex=res.modifiedIndex + 1, until=res.modifiedIndex + 5):
+            got.append(r.value)
+
+        th.join()
+        self.assertEqual(vals, got)
+        # one for the writer, one for all the watch requests
+        self.assertEqual(2, self.member.connections)
+
+    def test_stream(self):
+        res = self.writer.set("key", "v0")
+        for i in range(1, 6):
+            self.writer.set("key", "v%d" % i)
+
+        requests = sum(m.requests for m in self.cluster.members)
+        got = []
+        for r in self.c.eternal_watch("key", waitindex=res.modifiedIndex + 1, until=res.modifiedIndex + 5, stream=True):
+            got.append(r.value)
+            self.assertEqual("set", r.action)
+
+        self.assertEqual(["v%d" % i for i in range(1, 6)], got)
+        self.assertEqual(requests + 1, sum(m.requests for m in self.cluster.members))
+
+    def test_stream_live(self):
+        res = self.writer.set("dir/a", "v0")
+        vals = ["v%d" % i for i in range(1, 4)]
+        th = self._write_later("dir/a", vals)
+
+        got = []
+        for r in self.c.eternal_watch("dir", until=res.modifiedIndex + 3, stream=True, recursive=True):
+            got.append((r.key, r.value))
+
+        th.join()
+        self.assertEqual([("/dir/a", v) for v in vals], got)
+
+    def test_stream_reopen(self):
+        res = self.writer.set("key", "v0")
+        for i in range(1, 3):
+            self.writer.set("key", "v%d" % i)
+
+        got = []
+        for r in self.c.eternal_watch("key", waitindex=res.modifiedIndex + 1, until=res.modifiedIndex + 4, stream=True):
+            got.append(r.value)
+            if r.value == "v2":
+                self.member = [m for m in self.cluster.members if m.streams > 0][0]
+                self.member.stop()
+                self.writer.set("key", "v3")
+                self.writer.set("key", "v4")
+
+        self.assertEqual(["v1", "v2", "v3", "v4"], got)
+
+    def test_stream_error(self):
+        for i in range(1001):
+            self.cluster.store.set("other", str(i))
+
+        self.assertRaises(k3etcd.EtcdWatchError, next, self.c.eternal_watch("key", waitindex=1, stream=True))
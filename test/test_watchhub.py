@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import queue
+import threading
+import time
+import unittest
+
+import k3etcd
+from k3etcd.benchmark.fake_etcd import FakeEtcdCluster
+
+
+def _wait_for(cond, timeout=3):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+
+    return False
+
+
+class TestWatchHub(unittest.TestCase):
+    def setUp(self):
+        self.cluster = FakeEtcdCluster(size=1).start()
+        self.member = self.cluster.members[0]
+        self.c = k3etcd.Client(host=self.cluster.hosts)
+        self.hub = k3etcd.WatchHub(self.c, retry_interval=0.1)
+
+    def tearDown(self):
+        self.hub.close()
+        self.c.close()
+        self.cluster.stop()
+
+    def test_fan_out(self):
+        subs = [self.hub.subscribe("svc/k%d" % i) for i in range(50)]
+        self.assertEqual(["/svc"], list(self.hub._watchers))
+
+        for i in range(50):
+            self.c.set("svc/k%d" % i, "v%d" % i)
+
+        for i, s in enumerate(subs):
+            res = s.get(timeout=3)
+            self.assertEqual("/svc/k%d" % i, res.key)
+            self.assertEqual("v%d" % i, res.value)
+            self.assertEqual(res.modifiedIndex + 1, s.index)
+            self.assertRaises(queue.Empty, s.get, timeout=0)
+
+        # one waiting request for all subscribers
+        self.assertTrue(_wait_for(lambda: self.cluster.store.stats["watchers"] == 1))
+
+    def test_recursive(self):
+        s = self.hub.subscribe("svc", recursive=True)
+        self.assertEqual(["/svc"], list(self.hub._watchers))
+
+        s2 = self.hub.subscribe("svc/web/1")
+        self.assertEqual(["/svc"], list(self.hub._watchers))
+
+        self.c.set("svc/web/1", "a")
+        self.c.set("svc/db/1", "b")
+        self.c.set("other", "c")
+
+        self.assertEqual("/svc/web/1", s.get(timeout=3).key)
+        self.assertEqual("/svc/db/1", s.get(timeout=3).key)
+        self.assertEqual("/svc/web/1", s2.get(timeout=3).key)
+        self.assertRaises(queue.Empty, s.get, timeout=0.2)
+        self.assertRaises(queue.Empty, s2.get, timeout=0)
+
+    def test_callback(self):
+        got = []
+        slow = threading.Event()
+
+        def _slow(res):
+            slow.wait()
+
+        self.hub.subscribe("svc/a", callback=_slow)
+        self.hub.subscribe("svc/a", callback=got.append)
+
+        for i in range(3):
+            self.c.set("svc/a", "v%d" % i)
+
+        # the slow one does not block the other one
+        self.assertTrue(_wait_for(lambda: len(got) == 3))
+        self.assertEqual(["v0", "v1", "v2"], [r.value for r in got])
+        slow.set()
+
+    def test_waitindex(self):
+        r1 = self.c.set("svc/a", "v1")
+        self.c.set("svc/a", "v2")
+
+        s = self.hub.subscribe("svc/a")
+        self.c.set("svc/a", "v3")
+        self.assertEqual("v3", s.get(timeout=3).value)
+
+        # resume from an older index on the same watch request
+        s2 = self.hub.subscribe("svc/a", waitindex=r1.modifiedIndex)
+        self.c.set("svc/a", "v4")
+        self.assertEqual(["v1", "v2", "v3", "v4"], [s2.get(timeout=3).value for _ in range(4)])
+
+        self.assertEqual("v4", s.get(timeout=3).value)
+        self.assertRaises(queue.Empty, s.get, timeout=0.2)
+
+    def test_cleared_index(self):
+        s = self.hub.subscribe("svc/a")
+
+        # v1 is cleared from the history before the watch receives it
+        store = self.cluster.store
+        with store.cond:
+            store.history = [(10**6, "/x", None)] * 1000
+        self.c.set("svc/a", "v1")
+        self.assertRaises(k3etcd.EtcdWatchError, s.get, timeout=3)
+        with store.cond:
+            store.history = []
+
+        # wait for the watch to resume from the current index
+        w = self.hub._watchers["/svc"]
+        index = self.c.get("svc/a").etcd_index + 1
+        self.assertTrue(_wait_for(lambda: w.next_index == index and store.stats["watchers"] == 1))
+
+        self.c.set("svc/a", "v2")
+        self.assertEqual("v2", s.get(timeout=3).value)
+
+    def test_subscribe_while_cancelled(self):
+        s1 = self.hub.subscribe("svc/a")
+        old = s1._watcher
+
+        # the last subscription is cancelled after the watcher is found
+        s1.cancel()
+        find = self.hub._find_watcher
+
+        def _find(key, prefix):
+            self.hub._find_watcher = find
+            return old
+
+        self.hub._find_watcher = _find
+        s2 = self.hub.subscribe("svc/a")
+        self.assertIsNot(old, s2._watcher)
+        self.assertEqual(["/svc"], list(self.hub._watchers))
+
+        self.c.set("svc/a", "v1")
+        self.assertEqual("v1", s2.get(timeout=3).value)
+
+    def test_cancel(self):
+        s1 = self.hub.subscribe("svc/a")
+        s2 = self.hub.subscribe("svc/b")
+
+        s1.cancel()
+        self.assertEqual(["/svc"], list(self.hub._watchers))
+        s2.cancel()
+        self.assertEqual({}, self.hub._watchers)
+
+        self.c.set("svc/a", "v1")
+        self.assertRaises(queue.Empty, s1.get, timeout=0.2)
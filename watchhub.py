@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import logging
+import queue
+import threading
+
+from .client import (
+    EcodeKeyNotFound,
+    EtcdException,
+    EtcdReadTimeoutError,
+    EtcdWatchError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(object):
+    """
+    A subscription to the changes of a key, or of the keys in a dir,
+    returned by `etcd.WatchHub.subscribe`.
+
+    Events are put into `queue` by the hub. If a callback is given, a
+    thread of the subscription calls it with each event, so a slow
+    callback delays only its own subscription.
+
+    ##  etcd.Subscription.key
+
+    Type is `str`, the watched key.
+
+    ##  etcd.Subscription.recursive
+
+    Type is `bool`, whether the keys in the dir `key` are watched too.
+
+    ##  etcd.Subscription.index
+
+    Type is `int`, the index of the next event this subscription waits for.
+
+    ##  etcd.Subscription.queue
+
+    A `queue.Queue` of the events not yet consumed.
+    """
+
+    def __init__(self, hub, key, recursive, index, callback=None, error_callback=None):
+        self.hub = hub
+        self.key = key
+        self.recursive = recursive
+        self.index = index
+        self.queue = queue.Queue()
+        self._watcher = None
+        self._cancelled = threading.Event()
+
+        self._callback = callback
+        self._error_callback = error_callback
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(target=self._deliver, name="etcd-watch-subscription")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _match(self, key):
+        if key == self.key:
+            return True
+
+        return self.recursive and key.startswith(self.key.rstrip("/") + "/")
+
+    def _put(self, ev):
+        # called by the watcher thread only
+        if ev.modifiedIndex < self.index or not self._match(ev.key):
+            return
+
+        self.index = ev.modifiedIndex + 1
+        self.queue.put(ev)
+
+    def _put_error(self, err, index):
+        # events before `index` are lost
+        if self.index >= index:
+            return
+
+        self.index = index
+        self.queue.put(err)
+
+    def get(self, timeout=None):
+        """
+        Get the next event.
+        Raise a `queue.Empty` if there is no event in `timeout` seconds.
+        Raise a `etcd.EtcdWatchError` if some events have been cleared by
+        etcd before being received, `index` is moved to the current etcd
+        index then.
+        :param timeout: seconds to wait. If `None`, wait until an event arrives.
+        :return: A `etcd.EtcdKeysResult` object.
+        """
+        item = self.queue.get(timeout=timeout)
+        if isinstance(item, Exception):
+            raise item
+
+        return item
+
+    def _deliver(self):
+        while not self._cancelled.is_set():
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if isinstance(item, Exception):
+                    if self._error_callback is not None:
+                        self._error_callback(item)
+                    else:
+                        logger.warning("{err} in watch of {k}".format(err=repr(item), k=self.key))
+                else:
+                    self._callback(item)
+            except Exception as e:
+                logger.exception(repr(e) + " in watch callback of {k}".format(k=self.key))
+
+    def cancel(self):
+        """
+        Stop receiving events.
+        :return: nothing
+        """
+        self._cancelled.set()
+        self.hub._unsubscribe(self)
+
+
+class _PrefixWatcher(object):
+    def __init__(self, hub, prefix, index):
+        self.hub = hub
+        self.prefix = prefix
+        self.next_index = index
+        self.subs = []
+        self._rewind = None
+        self._stopped = threading.Event()
+
+        self._thread = threading.Thread(target=self._watch_loop, name="etcd-watch-hub")
+        self._thread.daemon = True
+
+    def covers(self, key):
+        return key == self.prefix or key.startswith(self.prefix.rstrip("/") + "/")
+
+    def rewind(self, index):
+        # called with hub._lock held
+        if index >= self.next_index:
+            return
+
+        if self._rewind is None or index < self._rewind:
+            self._rewind = index
+
+    def _advance(self, index):
+        # called with hub._lock held
+        if self._rewind is not None:
+            index = min(index, self._rewind)
+            self._rewind = None
+        self.next_index = index
+
+    def _watch_loop(self):
+        client = self.hub.client
+        while not self._stopped.is_set():
+            try:
+                ev = client._watch(self.prefix, self.next_index, timeout=self.hub.watch_timeout, recursive=True)
+            except EtcdReadTimeoutError:
+                with self.hub._lock:
+                    self._advance(self.next_index)
+                continue
+            except EtcdWatchError as e:
+                logger.info("{err} while watch {p}".format(err=repr(e), p=self.prefix))
+                try:
+                    index = self.hub._current_index(self.prefix)
+                except EtcdException as e:
+                    logger.info("{err} while get index of {p}".format(err=repr(e), p=self.prefix))
+                    self._stopped.wait(self.hub.retry_interval)
+                    continue
+
+                with self.hub._lock:
+                    for s in self.subs:
+                        s._put_error(e, index)
+                    self._advance(index)
+                continue
+            except EtcdException as e:
+                logger.info("{err} while watch {p}, retry".format(err=repr(e), p=self.prefix))
+                self._stopped.wait(self.hub.retry_interval)
+                continue
+
+            with self.hub._lock:
+                if self._rewind is not None:
+                    # a new subscriber wants older events, this one is
+                    # delivered to everyone again after them.
+                    self._advance(ev.modifiedIndex)
+                    continue
+
+                # putting into queues does not block
+                for s in self.subs:
+                    s._put(ev)
+                self._advance(ev.modifiedIndex + 1)
+
+
+class WatchHub(object):
+    """
+    Share one recursive long-poll watch per dir among many subscribers.
+
+    Each subscriber receives the events of its own key, or of the keys in
+    its dir, through a queue or a callback, and keeps its own resume
+    index. Subscriptions to keys in the same dir share one watch request:
+
+    ```python
+    hub = etcd.WatchHub(c)
+    s1 = hub.subscribe('/svc/web', callback=on_change)
+    s2 = hub.subscribe('/svc/db')
+    res = s2.get(timeout=10)
+    ```
+
+    ##  etcd.WatchHub.watch_timeout
+
+    Type is `int` or `float`, seconds of each long-poll request.
+    """
+
+    def __init__(self, client, watch_timeout=10, retry_interval=1):
+        """
+        :param client: a `etcd.Client` object.
+        :param watch_timeout: seconds of each long-poll request. Defaults to `10`.
+        :param retry_interval: seconds to wait before watching again after an error.
+        Defaults to `1`.
+        """
+        self.client = client
+        self.watch_timeout = watch_timeout
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        # prefix -> _PrefixWatcher
+        self._watchers = {}
+
+    def _current_index(self, key):
+        try:
+            return self.client.read(key).etcd_index + 1
+        except EcodeKeyNotFound as e:
+            return int(e.args[0]["headers"].get("x-etcd-index", 0)) + 1
+
+    def subscribe(self, key, callback=None, recursive=False, waitindex=None, prefix=None, error_callback=None):
+        """
+        Receive the changes of `key`.
+        :param key: the key to watch.
+        :param callback: called with each `etcd.EtcdKeysResult` event in the thread of the
+        subscription. If `None`, get events with `etcd.Subscription.get`. Defaults to `None`.
+        :param recursive: whether to receive the changes of the keys in the dir `key` too.
+        Defaults to `False`.
+        :param waitindex: the index of the first event to receive.
+        If `None`, receive events after now. Defaults to `None`.
+        :param prefix: the dir watched by the shared watch request.
+        If `None`, a dir being watched that contains `key` is used, or else
+        `key` if `recursive`, or the parent dir of `key`. Defaults to `None`.
+        :param error_callback: called with a `etcd.EtcdWatchError` if events are
+        lost, when `callback` is used. Defaults to `None`.
+        :return: A `etcd.Subscription` object.
+        """
+        key = self.client._sanitize_key(key)
+        if prefix is not None:
+            prefix = self.client._sanitize_key(prefix).rstrip("/") or "/"
+
+        while True:
+            with self._lock:
+                watcher = self._find_watcher(key, prefix)
+
+            if watcher is None:
+                watch_prefix = prefix
+                if watch_prefix is None:
+                    watch_prefix = key if recursive else (key.rsplit("/", 1)[0] or "/")
+
+                index = self._current_index(watch_prefix)
+                if waitindex is not None:
+                    index = min(index, waitindex)
+
+                with self._lock:
+                    watcher = self._watchers.get(watch_prefix)
+                    if watcher is None:
+                        watcher = _PrefixWatcher(self, watch_prefix, index)
+                        self._watchers[watch_prefix] = watcher
+                        watcher._thread.start()
+
+            with self._lock:
+                if self._watchers.get(watcher.prefix) is not watcher or watcher._stopped.is_set():
+                    # its last subscription is cancelled meanwhile, it is
+                    # stopped and would not deliver events to a new one.
+                    continue
+
+                sub_index = waitindex
+                if sub_index is None:
+                    sub_index = watcher.next_index
+                else:
+                    watcher.rewind(sub_index)
+
+                sub = Subscription(self, key, recursive, sub_index, callback=callback, error_callback=error_callback)
+                sub._watcher = watcher
+                watcher.subs.append(sub)
+
+            return sub
+
+    def _find_watcher(self, key, prefix):
+        # called with self._lock held
+        if prefix is not None:
+            return self._watchers.get(prefix)
+
+        for w in self._watchers.values():
+            if w.covers(key):
+                return w
+
+        return None
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            watcher = sub._watcher
+            if watcher is None or sub not in watcher.subs:
+                return
+
+            watcher.subs.remove(sub)
+            if len(watcher.subs) == 0:
+                watcher._stopped.set()
+                del self._watchers[watcher.prefix]
+
+    def close(self):
+        """
+        Cancel all subscriptions.
+        The watch requests stop when they return.
+        :return: nothing
+        """
+        with self._lock:
+            subs = [s for w in self._watchers.values() for s in w.subs]
+
+        for s in subs:
+            s.cancel()